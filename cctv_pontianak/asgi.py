@@ -0,0 +1,16 @@
+"""
+ASGI config for cctv_pontianak project.
+
+Dipakai server ASGI (misal: uvicorn cctv_pontianak.asgi:application).
+View refresh status, API baca dan SSE berjalan async di event loop,
+sehingga satu proses bisa melayani ratusan refresh dan koneksi stream
+bersamaan.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cctv_pontianak.settings')
+
+application = get_asgi_application()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +65,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'cctv_pontianak.wsgi.application'
+ASGI_APPLICATION = 'cctv_pontianak.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -77,6 +79,12 @@ if USE_SQLITE:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # BEGIN IMMEDIATE + busy timeout: penulisan bersamaan (checker paralel,
+            # cache, gunicorn) menunggu giliran, bukan langsung gagal "database is locked"
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
         }
     }
 else:
@@ -140,6 +148,20 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
 
+# Cache bersama (dipakai semua worker gunicorn & proses checker)
+# Default DatabaseCache: jalankan `python manage.py createcachetable` setelah migrate.
+# Di produksi bisa diarahkan ke Redis/Memcached lewat CACHE_BACKEND & CACHE_LOCATION.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'dashboard_cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000')),
+        },
+    }
+}
+
 # Local settings (for development only)
 try:
     from .local_settings import *
@@ -148,3 +170,67 @@ except ImportError:
 
 # YouTube Data API
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', '')
+
+# HTTP client YouTube (connection pool & retry)
+YOUTUBE_HTTP_POOL_SIZE = int(os.getenv('YOUTUBE_HTTP_POOL_SIZE', '16'))
+YOUTUBE_HTTP_MAX_RETRIES = int(os.getenv('YOUTUBE_HTTP_MAX_RETRIES', '2'))
+YOUTUBE_HTTP_BACKOFF_BASE = float(os.getenv('YOUTUBE_HTTP_BACKOFF_BASE', '0.5'))
+
+# Maksimum request async ke YouTube bersamaan per proses (view async di deployment ASGI)
+YOUTUBE_ASYNC_CONCURRENCY = int(os.getenv('YOUTUBE_ASYNC_CONCURRENCY', '100'))
+
+# Base URL YouTube Data API v3 (bisa diarahkan ke stand-in lokal untuk benchmark)
+YOUTUBE_API_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3')
+
+# Cache status video YouTube per video ID
+YOUTUBE_STATUS_CACHE_ALIAS = 'default'
+YOUTUBE_STATUS_CACHE_TTL = int(os.getenv('YOUTUBE_STATUS_CACHE_TTL', '60'))
+YOUTUBE_STATUS_CACHE_MAX_ENTRIES = int(os.getenv('YOUTUBE_STATUS_CACHE_MAX_ENTRIES', '2048'))
+
+# Budget kuota YouTube Data API (unit per hari, reset tengah malam waktu Pacific)
+YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', '10000'))
+YOUTUBE_QUOTA_BURST = int(os.getenv('YOUTUBE_QUOTA_BURST', '3000'))
+YOUTUBE_QUOTA_DISCOVERY_RESERVE = int(os.getenv('YOUTUBE_QUOTA_DISCOVERY_RESERVE', '1500'))
+
+# Auto-discovery: maksimum halaman search.list (50 siaran/halaman) per channel per siklus
+YOUTUBE_DISCOVERY_MAX_PAGES = int(os.getenv('YOUTUBE_DISCOVERY_MAX_PAGES', '4'))
+
+# Cache-Control max-age (detik) untuk respons API data CCTV/Kecamatan (divalidasi ulang via ETag)
+DASHBOARD_API_MAX_AGE = int(os.getenv('DASHBOARD_API_MAX_AGE', '5'))
+
+# CCTV dianggap stale di statistik jika belum dicek selama ini (detik)
+CCTV_STATUS_STALE_AFTER = int(os.getenv('CCTV_STATUS_STALE_AFTER', '900'))
+
+# Riwayat status: heartbeat per CCTV (detik) dan masa simpan (hari) data mentah / per jam
+STATUS_HISTORY_HEARTBEAT = int(os.getenv('STATUS_HISTORY_HEARTBEAT', '900'))
+STATUS_HISTORY_RAW_RETENTION_DAYS = int(os.getenv('STATUS_HISTORY_RAW_RETENTION_DAYS', '14'))
+STATUS_HISTORY_HOURLY_RETENTION_DAYS = int(os.getenv('STATUS_HISTORY_HOURLY_RETENTION_DAYS', '730'))
+
+# Rollup uptime: selang antar pengecekan lebih dari ini (detik) dianggap tidak terpantau
+UPTIME_MAX_GAP = int(os.getenv('UPTIME_MAX_GAP', '900'))
+
+# Jumlah card per halaman di grid dashboard
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '24'))
+
+# SSE status realtime (/api/cctv/stream/) selalu aktif di ASGI; di WSGI hanya jika diaktifkan di sini
+# (worker gunicorn async seperti gevent). Worker sync tertahan selama koneksi SSE terbuka
+STATUS_STREAM_SYNC = os.getenv('STATUS_STREAM_SYNC', 'False').lower() in ('true', '1', 'yes')
+
+# Penjadwal adaptif check_cctv_status --schedule: interval awal, minimum (status berubah/flapping)
+# dan maksimum (stabil lama) per CCTV dalam detik, serta jitter (fraksi interval)
+SCHEDULER_BASE_INTERVAL = int(os.getenv('SCHEDULER_BASE_INTERVAL', '300'))
+SCHEDULER_MIN_INTERVAL = int(os.getenv('SCHEDULER_MIN_INTERVAL', '60'))
+SCHEDULER_MAX_INTERVAL = int(os.getenv('SCHEDULER_MAX_INTERVAL', '3600'))
+SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', '0.1'))
+
+# Lama lease batch CCTV per worker penjadwal (detik); lease worker yang mati kedaluwarsa setelah ini
+CHECKER_LEASE_SECONDS = int(os.getenv('CHECKER_LEASE_SECONDS', '300'))
+
+# Job pengecekan running tanpa heartbeat selama ini (detik) diantrikan ulang (worker dianggap mati)
+STATUS_JOB_STALE_SECONDS = int(os.getenv('STATUS_JOB_STALE_SECONDS', '300'))
+
+# Endpoint /metrics (Prometheus): interval salin metrik proses ke database (detik),
+# masa simpan baris proses yang sudah berhenti (hari), dan token Bearer opsional
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '15'))
+METRICS_STALE_DAYS = int(os.getenv('METRICS_STALE_DAYS', '7'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
@@ -2,10 +2,26 @@
 Django Admin configuration untuk Dashboard CCTV
 """
 
+import hashlib
+import json
+
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import (
+    Count, DateTimeField, DurationField, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Cast, NullIf
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Kecamatan, CCTV
+from .models import (
+    Kecamatan, CCTV, CheckerWorker, CheckSchedule, MetricSeries, QuotaUsage, StatusCheckJob, UptimeRollup,
+)
+from .data_version import get_data_version
+from .uptime import window_start
 from .forms import AdminLoginForm
 
 # Admin Customization Branding
@@ -14,6 +30,63 @@ admin.site.site_title = "Admin Dishub Pontianak"
 admin.site.index_title = "Manajemen CCTV Lalu Lintas"
 admin.site.login_form = AdminLoginForm
 
+COUNT_CACHE_PREFIX = 'dashboard:admin-count:'
+COUNT_CACHE_TIMEOUT = 300
+
+# Di bawah jumlah ini estimasi statistik tabel tidak akurat, pakai COUNT(*) biasa
+ESTIMATE_MIN_ROWS = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator changelist dengan total baris yang murah:
+    - PostgreSQL/MySQL tanpa filter: estimasi dari statistik tabel
+      (pg_class.reltuples / information_schema.TABLES.TABLE_ROWS)
+    - selain itu (termasuk SQLite yang tidak punya statistik jumlah baris):
+      COUNT(*) di-cache per versi data (versi naik setiap CCTV/kecamatan berubah)
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimated_rows(queryset)
+            if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+                return estimate
+
+        # Kunci cache dari filter saja: urutan dan anotasi (misal waktu acuan) tidak memengaruhi total
+        query = queryset.query.chain()
+        query.clear_ordering(force=True)
+        query.set_annotation_mask(())
+        try:
+            sql = str(query)
+        except EmptyResultSet:
+            return 0
+        key = f'{COUNT_CACHE_PREFIX}{get_data_version()}:{hashlib.sha1(sql.encode()).hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout=COUNT_CACHE_TIMEOUT)
+        return count
+
+    @staticmethod
+    def _estimated_rows(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        elif connection.vendor == 'mysql':
+            # InnoDB: perkiraan dari statistik tabel (bisa meleset puluhan persen, cukup untuk paginasi)
+            sql = (
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+            )
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row and row[0] and row[0] > 0 else None
+
 
 @admin.register(Kecamatan)
 class KecamatanAdmin(admin.ModelAdmin):
@@ -22,11 +95,18 @@ class KecamatanAdmin(admin.ModelAdmin):
     list_display = ['nama', 'jumlah_cctv', 'created_at']
     search_fields = ['nama']
     ordering = ['nama']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        """Sertakan jumlah CCTV per kecamatan (satu query agregat untuk seluruh halaman)"""
+        return super().get_queryset(request).annotate(cctv_count=Count('cctv_list'))
     
     def jumlah_cctv(self, obj):
-        """Hitung jumlah CCTV di kecamatan ini"""
-        return obj.cctv_list.count()
+        """Jumlah CCTV di kecamatan ini"""
+        return obj.cctv_count
     jumlah_cctv.short_description = 'Jumlah CCTV'
+    jumlah_cctv.admin_order_field = 'cctv_count'
 
 
 @admin.register(CCTV)
@@ -42,11 +122,15 @@ class CCTVAdmin(admin.ModelAdmin):
         'youtube_video_id',
         'koordinat',
         'last_check_info',
+        'uptime_7d',
         'updated_at'
     ]
     list_filter = ['kecamatan', 'is_active']
+    list_select_related = ['kecamatan']
     search_fields = ['nama_lokasi', 'deskripsi', 'youtube_video_id']
     ordering = ['kecamatan', 'nama_lokasi']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_editable = []
     readonly_fields = ['is_active', 'created_at', 'updated_at', 'last_status_check', 'status_check_error']
     actions = ['refresh_status_action']
@@ -72,6 +156,31 @@ class CCTVAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """
+        Sertakan total rollup uptime 7 hari terakhir dan umur pengecekan terakhir
+        (dihitung di database terhadap satu waktu acuan per request)
+        """
+        queryset = super().get_queryset(request)
+        # Subquery per CCTV (maks. 7 rollup harian lewat unique index cctv+period+period_start),
+        # bukan JOIN + GROUP BY ke seluruh riwayat rollup
+        week_rollups = UptimeRollup.objects.filter(
+            cctv=OuterRef('pk'),
+            period=UptimeRollup.PERIOD_DAY,
+            period_start__gte=window_start('week'),
+        ).order_by().values('cctv')
+        return queryset.annotate(
+            uptime_observed=Subquery(week_rollups.annotate(total=Sum('observed_seconds')).values('total')),
+            uptime_online=Subquery(week_rollups.annotate(total=Sum('online_seconds')).values('total')),
+        ).annotate(
+            # Rasio yang ditampilkan kolom uptime_7d, dipakai untuk pengurutan
+            uptime_ratio=Cast('uptime_online', FloatField()) / NullIf('uptime_observed', 0),
+            status_check_age=ExpressionWrapper(
+                Value(timezone.now(), output_field=DateTimeField()) - F('last_status_check'),
+                output_field=DurationField(),
+            ),
+        )
+    
     def status_badge(self, obj):
         """Tampilkan status dengan badge berwarna"""
         if obj.is_active:
@@ -89,20 +198,19 @@ class CCTVAdmin(admin.ModelAdmin):
         if not obj.last_status_check:
             return format_html('<span style="color: #999;">Belum pernah dicek</span>')
         
-        now = timezone.now()
-        diff = now - obj.last_status_check
+        age = getattr(obj, 'status_check_age', None)
+        if age is None:
+            age = timezone.now() - obj.last_status_check
+        seconds = age.total_seconds()
         
-        if diff.total_seconds() < 60:
+        if seconds < 60:
             time_ago = 'Baru saja'
-        elif diff.total_seconds() < 3600:
-            minutes = int(diff.total_seconds() / 60)
-            time_ago = f'{minutes} menit lalu'
-        elif diff.total_seconds() < 86400:
-            hours = int(diff.total_seconds() / 3600)
-            time_ago = f'{hours} jam lalu'
+        elif seconds < 3600:
+            time_ago = f'{int(seconds / 60)} menit lalu'
+        elif seconds < 86400:
+            time_ago = f'{int(seconds / 3600)} jam lalu'
         else:
-            days = int(diff.total_seconds() / 86400)
-            time_ago = f'{days} hari lalu'
+            time_ago = f'{int(seconds / 86400)} hari lalu'
         
         if obj.status_check_error:
             return format_html(
@@ -117,28 +225,112 @@ class CCTVAdmin(admin.ModelAdmin):
                 time_ago
             )
     last_check_info.short_description = 'Terakhir Dicek'
+    last_check_info.admin_order_field = 'last_status_check'
     
-    def refresh_status_action(self, request, queryset):
-        """Admin action untuk refresh status CCTV yang dipilih"""
-        updated = 0
-        errors = 0
+    def uptime_7d(self, obj):
+        """Tampilkan persentase ketersediaan 7 hari terakhir dari rollup uptime"""
+        observed = getattr(obj, 'uptime_observed', None)
+        if not observed:
+            return format_html('<span style="color: #999;">-</span>')
         
-        for cctv in queryset:
-            try:
-                cctv.update_status_from_youtube()
-                updated += 1
-            except Exception as e:
-                errors += 1
+        availability = obj.uptime_online * 100 / observed
+        color = '#00b894' if availability >= 95 else '#fdcb6e' if availability >= 80 else '#d63031'
+        return format_html('<span style="color: {};">{}%</span>', color, f'{availability:.1f}')
+    uptime_7d.short_description = 'Uptime 7 Hari'
+    uptime_7d.admin_order_field = 'uptime_ratio'
+    
+    def refresh_status_action(self, request, queryset):
+        """Admin action untuk refresh status CCTV yang dipilih (diproses di background)"""
+        job = StatusCheckJob.enqueue(list(queryset.values_list('pk', flat=True)))
         
-        if errors == 0:
-            self.message_user(
-                request,
-                f'Berhasil refresh status {updated} CCTV'
-            )
-        else:
-            self.message_user(
-                request,
-                f'Refresh selesai: {updated} berhasil, {errors} error',
-                level='WARNING'
-            )
+        self.message_user(
+            request,
+            f'Job #{job.pk} dibuat untuk refresh status {job.total} CCTV. '
+            f'Status akan diperbarui oleh worker di background.'
+        )
     refresh_status_action.short_description = 'Refresh status dari YouTube'
+
+
+@admin.register(StatusCheckJob)
+class StatusCheckJobAdmin(admin.ModelAdmin):
+    """Admin untuk memantau antrian job pengecekan status"""
+    
+    list_display = ['id', 'status', 'progress', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = [
+        'status', 'cctv_ids', 'total', 'done', 'online', 'results', 'error',
+        'created_at', 'started_at', 'heartbeat_at', 'attempts', 'finished_at'
+    ]
+    
+    def progress(self, obj):
+        """Tampilkan progress job"""
+        return f"{obj.done}/{obj.total}"
+    progress.short_description = 'Progress'
+    
+    def results(self, obj):
+        """Hasil per CCTV yang sudah terkumpul (dari chunk yang selesai)"""
+        return format_html('<pre>{}</pre>', json.dumps(obj.collected_results(), ensure_ascii=False, indent=2))
+    results.short_description = 'Hasil'
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(QuotaUsage)
+class QuotaUsageAdmin(admin.ModelAdmin):
+    """Admin untuk memantau pemakaian kuota YouTube Data API"""
+    
+    list_display = ['date', 'endpoint', 'units', 'calls', 'denied']
+    list_filter = ['endpoint']
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CheckSchedule)
+class CheckScheduleAdmin(admin.ModelAdmin):
+    """Admin untuk memantau jadwal pengecekan adaptif per CCTV"""
+    
+    list_display = ['cctv', 'next_check_at', 'interval', 'flap_score', 'leased_by', 'lease_expires_at']
+    list_select_related = ['cctv']
+    search_fields = ['cctv__nama_lokasi']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CheckerWorker)
+class CheckerWorkerAdmin(admin.ModelAdmin):
+    """Admin untuk memantau throughput worker penjadwal"""
+    
+    list_display = ['worker_id', 'cycles', 'checked', 'changed', 'cameras_per_second', 'started_at', 'last_seen']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MetricSeries)
+class MetricSeriesAdmin(admin.ModelAdmin):
+    """Admin untuk melihat metrik yang disalin tiap proses (sumber endpoint /metrics)"""
+    
+    list_display = ['name', 'labels', 'process', 'value', 'count', 'updated_at']
+    list_filter = ['name']
+    search_fields = ['name', 'labels', 'process']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,242 @@
+"""
+Helper pengecekan status CCTV: penyimpanan hasil dan pemrosesan job antrian
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .data_version import bump_data_version_on_commit
+from .events import record_status_changes
+from .history import record_history
+from .uptime import update_rollups
+from .models import CCTV, StatusCheckJob, StatusCheckJobChunk
+
+logger = logging.getLogger(__name__)
+
+# Field yang dibandingkan untuk menentukan apakah sebuah baris benar-benar berubah
+STATUS_FIELDS = ('is_active', 'status_check_error', 'youtube_video_id')
+
+# Jumlah baris per statement bulk_update (aman untuk batas parameter SQLite/MySQL)
+BULK_UPDATE_BATCH_SIZE = 500
+
+# Jumlah CCTV per langkah job (sama dengan batas ID per request videos.list)
+JOB_CHUNK_SIZE = 50
+
+# Job running tanpa heartbeat selama ini (detik) dianggap ditinggal worker yang mati
+DEFAULT_JOB_STALE_SECONDS = 300
+
+# Job yang ditinggal worker sebanyak ini ditandai gagal, bukan diantrikan ulang
+JOB_MAX_ATTEMPTS = 3
+
+
+def snapshot_status(cctv: CCTV) -> tuple:
+    """Ambil nilai field status saat ini, untuk dibandingkan setelah pengecekan"""
+    return tuple(getattr(cctv, field) for field in STATUS_FIELDS)
+
+
+def save_check_results(cctv_list: list, snapshots: dict, checked_at) -> dict:
+    """
+    Simpan hasil pengecekan secara bulk, hanya menulis baris yang berubah.
+
+    - Baris yang status/error/video ID-nya berubah disimpan dengan bulk_update
+      (per chunk) di dalam satu transaksi.
+    - Baris yang tidak berubah cukup diperbarui last_status_check-nya dengan
+      satu UPDATE berbasis set.
+    - Setiap baris yang berubah dicatat di change log (StatusChangeEvent)
+      untuk event stream SSE.
+    - Transisi status dan heartbeat berkala dicatat di StatusHistory.
+    - Rollup uptime per jam/hari (UptimeRollup) ditambah secara inkremental.
+
+    Args:
+        cctv_list: Objek CCTV yang field statusnya sudah diisi hasil pengecekan
+        snapshots: Dict {pk: snapshot_status(cctv)} sebelum pengecekan
+        checked_at: Waktu pengecekan untuk last_status_check
+
+    Returns:
+        dict: {'changed': jumlah baris berubah, 'unchanged': jumlah baris yang hanya diperbarui waktunya}
+    """
+    changed = []
+    unchanged_ids = []
+    previous_checks = {cctv.pk: cctv.last_status_check for cctv in cctv_list}
+
+    for cctv in cctv_list:
+        cctv.last_status_check = checked_at
+        if snapshot_status(cctv) != snapshots.get(cctv.pk):
+            # bulk_update tidak mengisi auto_now, jadi updated_at diisi manual
+            cctv.updated_at = checked_at
+            changed.append(cctv)
+        else:
+            unchanged_ids.append(cctv.pk)
+
+    with transaction.atomic():
+        if changed:
+            CCTV.objects.bulk_update(
+                changed,
+                list(STATUS_FIELDS) + ['last_status_check', 'updated_at'],
+                batch_size=BULK_UPDATE_BATCH_SIZE,
+            )
+            record_status_changes(changed, checked_at)
+        if unchanged_ids:
+            CCTV.objects.filter(pk__in=unchanged_ids).update(last_status_check=checked_at)
+        record_history(cctv_list, snapshots, checked_at)
+        update_rollups(cctv_list, snapshots, previous_checks, checked_at)
+
+    # bulk_update/update tidak memicu signal, jadi versi data dinaikkan di sini
+    if changed:
+        bump_data_version_on_commit()
+
+    logger.info(f"Check results saved: {len(changed)} changed, {len(unchanged_ids)} unchanged")
+    return {'changed': len(changed), 'unchanged': len(unchanged_ids)}
+
+
+def recover_stale_jobs(now=None) -> int:
+    """
+    Pulihkan job running yang heartbeat-nya berhenti (worker crash/dimatikan).
+
+    Job dikembalikan ke antrian (pending) agar diambil worker lain; setelah
+    JOB_MAX_ATTEMPTS percobaan job ditandai gagal.
+
+    Returns:
+        int: Jumlah job yang dipulihkan
+    """
+    now = now or timezone.now()
+    stale_after = getattr(settings, 'STATUS_JOB_STALE_SECONDS', DEFAULT_JOB_STALE_SECONDS)
+    stale = StatusCheckJob.objects.filter(
+        status=StatusCheckJob.STATUS_RUNNING,
+        heartbeat_at__lt=now - timedelta(seconds=stale_after),
+    )
+
+    failed = stale.filter(attempts__gte=JOB_MAX_ATTEMPTS).update(
+        status=StatusCheckJob.STATUS_FAILED,
+        error='Worker berhenti di tengah job terlalu sering',
+        finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=JOB_MAX_ATTEMPTS).update(
+        status=StatusCheckJob.STATUS_PENDING,
+        started_at=None,
+        heartbeat_at=None,
+        done=0,
+        online=0,
+    )
+    if failed or requeued:
+        logger.warning(f"Status check jobs recovered: {requeued} requeued, {failed} failed")
+    return failed + requeued
+
+
+def claim_next_job():
+    """
+    Ambil job pending tertua dan tandai sebagai running.
+
+    Klaim dilakukan dengan UPDATE bersyarat (status masih pending), sehingga
+    aman dijalankan oleh beberapa worker sekaligus tanpa job diproses dua kali.
+    Sebelumnya job yang ditinggal worker mati dipulihkan (recover_stale_jobs).
+
+    Returns:
+        StatusCheckJob atau None jika tidak ada job pending
+    """
+    recover_stale_jobs()
+
+    while True:
+        job = StatusCheckJob.objects.filter(
+            status=StatusCheckJob.STATUS_PENDING
+        ).order_by('created_at', 'pk').first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        claimed = StatusCheckJob.objects.filter(
+            pk=job.pk, status=StatusCheckJob.STATUS_PENDING
+        ).update(
+            status=StatusCheckJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+        # Sudah diklaim worker lain, coba job berikutnya
+
+
+def run_status_job(job: StatusCheckJob, max_workers: int = 1) -> StatusCheckJob:
+    """
+    Proses satu job pengecekan status memakai jalur batch check_multiple_videos.
+
+    CCTV diproses per chunk JOB_CHUNK_SIZE; setelah tiap chunk counter
+    progress (done/online), heartbeat dan satu baris StatusCheckJobChunk berisi
+    hasil chunk itu ditulis, sehingga hasil yang sudah terkumpul bisa dibaca
+    selama job berjalan tanpa menulis ulang seluruh hasil. Jika job sudah
+    dipulihkan ke worker lain (heartbeat terlambat), pemrosesan dihentikan
+    tanpa menimpa job tersebut.
+    """
+    from .quota import QUOTA_DEFERRED_MESSAGE
+    from .utils import check_multiple_videos
+
+    # Update progress hanya berlaku selama job masih dipegang percobaan ini
+    owned = StatusCheckJob.objects.filter(
+        pk=job.pk, status=StatusCheckJob.STATUS_RUNNING, attempts=job.attempts
+    )
+
+    try:
+        queryset = CCTV.objects.all()
+        if job.cctv_ids is not None:
+            queryset = queryset.filter(pk__in=job.cctv_ids)
+        cctv_list = list(queryset.order_by('pk'))
+
+        job.total = len(cctv_list)
+        job.done = 0
+        job.online = 0
+        owned.update(total=job.total, done=0, online=0)
+        # Hasil percobaan sebelumnya (worker yang mati) tidak dipakai lagi
+        job.chunks.exclude(attempt=job.attempts).delete()
+
+        for i in range(0, len(cctv_list), JOB_CHUNK_SIZE):
+            chunk = cctv_list[i:i + JOB_CHUNK_SIZE]
+            snapshots = {cctv.pk: snapshot_status(cctv) for cctv in chunk}
+            results = check_multiple_videos(
+                [cctv.youtube_video_id for cctv in chunk], max_workers=max_workers
+            )
+
+            checked = []
+            chunk_results = []
+            for cctv in chunk:
+                is_online, error_msg = results.get(cctv.youtube_video_id, (False, "Check skipped/failed"))
+                if error_msg == QUOTA_DEFERRED_MESSAGE:
+                    # Status lama dipertahankan, hanya dilaporkan di hasil job
+                    is_online = cctv.is_active
+                else:
+                    cctv.is_active = is_online
+                    cctv.status_check_error = error_msg if error_msg else None
+                    checked.append(cctv)
+                job.online += 1 if is_online else 0
+                chunk_results.append({
+                    'id': cctv.id,
+                    'nama_lokasi': cctv.nama_lokasi,
+                    'is_active': is_online,
+                    'error_message': error_msg,
+                })
+
+            save_check_results(checked, snapshots, timezone.now())
+
+            job.done += len(chunk)
+            with transaction.atomic():
+                if not owned.update(done=job.done, online=job.online, heartbeat_at=timezone.now()):
+                    logger.warning(f"Status check job #{job.pk} diambil alih worker lain, pemrosesan dihentikan")
+                    return job
+                StatusCheckJobChunk.objects.create(job=job, attempt=job.attempts, offset=i, results=chunk_results)
+
+        job.status = StatusCheckJob.STATUS_DONE
+    except Exception as e:
+        logger.error(f"Status check job #{job.pk} failed: {str(e)}")
+        job.status = StatusCheckJob.STATUS_FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    owned.update(
+        status=job.status, error=job.error, finished_at=job.finished_at,
+        done=job.done, online=job.online,
+    )
+    return job
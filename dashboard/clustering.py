@@ -0,0 +1,203 @@
+"""
+Clustering marker CCTV di sisi server (piramida per level zoom)
+
+Titik CCTV diproyeksikan ke koordinat piksel Web Mercator (sama dengan
+Leaflet) lalu dikelompokkan per sel persegi CLUSTER_RADIUS_PX piksel. Sel di
+level zoom z adalah gabungan tepat empat sel di level z+1, sehingga piramida
+dibangun sekali dari level terdalam lalu digabung ke atas.
+
+Piramida disimpan di memori proses bersama indeks spasial dan ikut dibangun
+ulang ketika indeks berganti; selama piramida baru dibangun di thread latar
+belakang, piramida indeks sebelumnya tetap dilayani. Di atas CLUSTER_MAX_ZOOM
+peta menampilkan marker individual (lihat cctv_in_bbox).
+"""
+
+import math
+import threading
+
+from .spatial import get_index
+
+TILE_SIZE = 256
+
+# Lebar sel cluster dalam piksel layar
+CLUSTER_RADIUS_PX = 60
+
+# Level zoom terendah dan tertinggi yang dihitung; di atas max tampil marker individual
+CLUSTER_MIN_ZOOM = 8
+CLUSTER_MAX_ZOOM = 15
+
+MAX_LATITUDE = 85.05112878
+
+# previous: piramida indeks sebelumnya, dilayani sampai piramida indeks baru selesai
+_state = {'index': None, 'pyramids': {}, 'previous': {}, 'building': set()}
+_lock = threading.Lock()
+
+
+def world_pixel(lat: float, lng: float, zoom: int) -> tuple:
+    """Koordinat piksel dunia Web Mercator (EPSG:3857) untuk level zoom"""
+    scale = TILE_SIZE * 2 ** zoom
+    sin_lat = math.sin(math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))))
+    x = (lng + 180) / 360 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def _new_cluster(lat: float, lng: float, data: dict) -> list:
+    # [jumlah, total_lat, total_lng, aktif, min_lat, min_lng, max_lat, max_lng, id_tunggal]
+    return [1, lat, lng, 1 if data['is_active'] else 0, lat, lng, lat, lng, data['id']]
+
+
+def _merge(target: list, source: list):
+    target[0] += source[0]
+    target[1] += source[1]
+    target[2] += source[2]
+    target[3] += source[3]
+    target[4] = min(target[4], source[4])
+    target[5] = min(target[5], source[5])
+    target[6] = max(target[6], source[6])
+    target[7] = max(target[7], source[7])
+    target[8] = None
+
+
+def build_pyramid(points) -> dict:
+    """
+    Bangun piramida cluster dari titik CCTV.
+
+    Args:
+        points: Iterable (lat, lng, data) dengan data hasil serialize_cctv
+
+    Returns:
+        dict: {zoom: {(sel_x, sel_y): cluster}}
+    """
+    leaf = {}
+    for lat, lng, data in points:
+        x, y = world_pixel(lat, lng, CLUSTER_MAX_ZOOM)
+        key = (int(x // CLUSTER_RADIUS_PX), int(y // CLUSTER_RADIUS_PX))
+        cluster = leaf.get(key)
+        if cluster is None:
+            leaf[key] = _new_cluster(lat, lng, data)
+        else:
+            _merge(cluster, _new_cluster(lat, lng, data))
+
+    pyramid = {CLUSTER_MAX_ZOOM: leaf}
+    for zoom in range(CLUSTER_MAX_ZOOM - 1, CLUSTER_MIN_ZOOM - 1, -1):
+        level = {}
+        for (cell_x, cell_y), cluster in pyramid[zoom + 1].items():
+            key = (cell_x // 2, cell_y // 2)
+            parent = level.get(key)
+            if parent is None:
+                level[key] = list(cluster)
+            else:
+                _merge(parent, cluster)
+        pyramid[zoom] = level
+    return pyramid
+
+
+def get_pyramid(kecamatan_id=None) -> dict:
+    """Piramida cluster untuk indeks spasial saat ini (opsional per kecamatan)"""
+    index = get_index()
+    key = str(kecamatan_id) if kecamatan_id else 'all'
+
+    with _lock:
+        if _state['index'] is not index:
+            _state['index'] = index
+            _state['previous'] = {**_state['previous'], **_state['pyramids']}
+            _state['pyramids'] = {}
+        pyramid = _state['pyramids'].get(key)
+        stale = _state['previous'].get(key)
+        if pyramid is None and stale is not None and key not in _state['building']:
+            _state['building'].add(key)
+            threading.Thread(
+                target=_build_in_background, args=(index, key), name='cluster-pyramid-build', daemon=True
+            ).start()
+    if pyramid is not None:
+        return pyramid
+    if stale is not None:
+        return stale
+
+    pyramid = _build_for(index, key)
+    with _lock:
+        if _state['index'] is index:
+            _state['pyramids'][key] = pyramid
+    return pyramid
+
+
+def _build_for(index, key: str) -> dict:
+    points = index.points()
+    if key != 'all':
+        points = [point for point in points if str(point[2]['kecamatan_id']) == key]
+    return build_pyramid(points)
+
+
+def _build_in_background(index, key: str):
+    try:
+        pyramid = _build_for(index, key)
+        with _lock:
+            if _state['index'] is index:
+                _state['pyramids'][key] = pyramid
+    finally:
+        with _lock:
+            _state['building'].discard(key)
+
+
+def _format_cluster(cluster: list) -> dict:
+    count = cluster[0]
+    result = {
+        'latitude': round(cluster[1] / count, 7),
+        'longitude': round(cluster[2] / count, 7),
+        'count': count,
+        'active': cluster[3],
+        'inactive': count - cluster[3],
+        'bounds': [cluster[5], cluster[4], cluster[7], cluster[6]],
+    }
+    if count == 1:
+        result['id'] = cluster[8]
+    return result
+
+
+def clusters_in_bbox(zoom: int, bbox: tuple = None, kecamatan_id=None) -> list:
+    """
+    Cluster di level zoom yang selnya bersinggungan dengan bbox.
+
+    Args:
+        zoom: Level zoom peta (dibatasi ke CLUSTER_MIN_ZOOM..CLUSTER_MAX_ZOOM)
+        bbox: (min_lng, min_lat, max_lng, max_lat) atau None untuk semua
+        kecamatan_id: Filter kecamatan (opsional)
+    """
+    zoom = max(CLUSTER_MIN_ZOOM, min(CLUSTER_MAX_ZOOM, zoom))
+    level = get_pyramid(kecamatan_id)[zoom]
+    if bbox is None:
+        return [_format_cluster(cluster) for cluster in level.values()]
+
+    min_lng, min_lat, max_lng, max_lat = bbox
+    left, bottom = world_pixel(min_lat, min_lng, zoom)
+    right, top = world_pixel(max_lat, max_lng, zoom)
+    x_start, x_end = int(left // CLUSTER_RADIUS_PX), int(right // CLUSTER_RADIUS_PX)
+    y_start, y_end = int(top // CLUSTER_RADIUS_PX), int(bottom // CLUSTER_RADIUS_PX)
+
+    if (x_end - x_start + 1) * (y_end - y_start + 1) > len(level):
+        return [
+            _format_cluster(cluster) for (cell_x, cell_y), cluster in level.items()
+            if x_start <= cell_x <= x_end and y_start <= cell_y <= y_end
+        ]
+    result = []
+    for cell_x in range(x_start, x_end + 1):
+        for cell_y in range(y_start, y_end + 1):
+            cluster = level.get((cell_x, cell_y))
+            if cluster is not None:
+                result.append(_format_cluster(cluster))
+    return result
+
+
+def data_extent(kecamatan_id=None):
+    """Bounding box seluruh CCTV [min_lng, min_lat, max_lng, max_lat], None jika kosong"""
+    level = get_pyramid(kecamatan_id)[CLUSTER_MIN_ZOOM]
+    if not level:
+        return None
+    clusters = level.values()
+    return [
+        min(cluster[5] for cluster in clusters),
+        min(cluster[4] for cluster in clusters),
+        max(cluster[7] for cluster in clusters),
+        max(cluster[6] for cluster in clusters),
+    ]
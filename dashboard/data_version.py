@@ -0,0 +1,168 @@
+"""
+Versi data global dan cache respons API berbasis versi
+
+Setiap perubahan data CCTV/Kecamatan (signal post_save/post_delete, maupun
+penulisan bulk oleh checker) menaikkan satu angka versi global di cache
+bersama. Payload JSON API disimpan di cache satu key per varian, dengan
+versi pembuatnya ikut disimpan di nilai: payload dari versi lama dianggap
+tidak ada dan ditimpa, jadi jumlah entri tidak bertambah setiap versi naik.
+
+ETag respons diturunkan dari versi, jadi request dengan If-None-Match yang
+masih cocok dibalas 304 tanpa query ORM sama sekali. Hal yang sama dipakai
+untuk HTML halaman dashboard (versioned_page_response).
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+VERSION_KEY = 'dashboard:data-version'
+RESPONSE_PREFIX = 'dashboard:response:'
+
+# Versi dibaca ulang dari cache bersama paling sering sekali per detik per proses
+LOCAL_VERSION_TTL = 1.0
+
+# Lama payload per varian disimpan di cache (detik); ditimpa saat versi data berubah
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+
+# Fragmen template memakai versi di key-nya, jadi dibuat singkat agar
+# fragmen versi lama cepat kedaluwarsa dan tidak memenuhi cache
+FRAGMENT_TIMEOUT = 5 * 60
+
+DEFAULT_API_MAX_AGE = 5
+
+# Halaman HTML selalu divalidasi ulang (ETag/Last-Modified) agar perubahan langsung terlihat
+DEFAULT_PAGE_MAX_AGE = 0
+
+_local = {'version': None, 'expires_at': 0.0}
+_local_lock = threading.Lock()
+
+
+def _initial_version() -> int:
+    # Berbasis waktu agar versi baru tidak bentrok dengan payload lama di cache
+    return int(time.time() * 1000)
+
+
+def get_data_version() -> int:
+    """Versi data global saat ini"""
+    now = time.monotonic()
+    with _local_lock:
+        if _local['version'] is not None and _local['expires_at'] > now:
+            return _local['version']
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY) or _initial_version()
+
+    with _local_lock:
+        _local['version'] = version
+        _local['expires_at'] = now + LOCAL_VERSION_TTL
+    return version
+
+
+def bump_data_version() -> int:
+    """Naikkan versi data global (semua payload versi lama otomatis tidak dipakai lagi)"""
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+
+    with _local_lock:
+        _local['version'] = version
+        _local['expires_at'] = time.monotonic() + LOCAL_VERSION_TTL
+    return version
+
+
+def bump_data_version_on_commit():
+    """Naikkan versi setelah transaksi aktif commit (agar pembaca tidak meng-cache data lama di versi baru)"""
+    transaction.on_commit(bump_data_version)
+
+
+def _variant_digest(variant: str) -> str:
+    return hashlib.sha1(variant.encode('utf-8')).hexdigest()[:16]
+
+
+def _versioned_response(request, variant: str, build_body, content_type: str, max_age: int) -> HttpResponse:
+    """
+    Respons yang body-nya di-cache per varian (berlaku untuk satu versi
+    data), dengan ETag (versi + varian) dan Last-Modified (waktu body dibuat).
+    """
+    version = get_data_version()
+    digest = _variant_digest(variant)
+    etag = f'"{version}-{digest}"'
+
+    def finish(response):
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=max_age, must_revalidate=True)
+        return response
+
+    # ETag masih cocok: 304 tanpa membaca cache body maupun database
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return finish(not_modified)
+
+    key = f'{RESPONSE_PREFIX}{digest}'
+    entry = cache.get(key)
+    if entry is None or entry[0] != version:
+        entry = (version, build_body(), int(time.time()))
+        cache.set(key, entry, timeout=PAYLOAD_TIMEOUT)
+    _, body, last_modified = entry
+
+    response = HttpResponse(body, content_type=content_type)
+    response['Last-Modified'] = http_date(last_modified)
+    finish(response)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def versioned_json_response(request, variant: str, build_payload) -> HttpResponse:
+    """
+    Respons JSON yang di-cache per versi data dan per varian (misal filter).
+
+    Args:
+        request: HttpRequest
+        variant: Nama unik varian payload, misal "cctv:kecamatan=3"
+        build_payload: Callable tanpa argumen yang mengembalikan dict payload
+
+    Returns:
+        HttpResponse (200 dengan ETag) atau HttpResponseNotModified (304)
+    """
+    return _versioned_response(
+        request,
+        variant,
+        lambda: json.dumps(build_payload(), cls=DjangoJSONEncoder),
+        'application/json',
+        getattr(settings, 'DASHBOARD_API_MAX_AGE', DEFAULT_API_MAX_AGE),
+    )
+
+
+def versioned_page_response(request, variant: str, render_page) -> HttpResponse:
+    """
+    Respons HTML yang di-cache per versi data (halaman tanpa konten per pengguna).
+
+    Args:
+        request: HttpRequest
+        variant: Nama unik halaman, misal "index"
+        render_page: Callable tanpa argumen yang mengembalikan HTML (str)
+
+    Returns:
+        HttpResponse (200 dengan ETag & Last-Modified) atau HttpResponseNotModified (304)
+    """
+    return _versioned_response(
+        request,
+        variant,
+        render_page,
+        'text/html; charset=utf-8',
+        getattr(settings, 'DASHBOARD_PAGE_MAX_AGE', DEFAULT_PAGE_MAX_AGE),
+    )
@@ -0,0 +1,123 @@
+"""
+Pencocokan lokal judul siaran live YouTube dengan lokasi CCTV
+
+Auto-discovery mengambil daftar siaran live sebuah channel sekali per siklus,
+lalu judulnya dicocokkan secara lokal dengan search_keyword / nama_lokasi
+setiap CCTV lewat indeks token yang sudah dinormalisasi. Dengan begitu biaya
+search.list menjadi O(channel), bukan O(CCTV).
+"""
+
+import re
+import unicodedata
+
+# Singkatan umum nama jalan/lokasi -> bentuk baku
+TOKEN_ALIASES = {
+    'jl': 'jalan',
+    'jln': 'jalan',
+    'simp': 'simpang',
+    'smpg': 'simpang',
+    'spg': 'simpang',
+    'simpg': 'simpang',
+    'sp': 'simpang',
+    'gg': 'gang',
+    'kom': 'komodor',
+    'bdr': 'bundaran',
+    'bunderan': 'bundaran',
+    'psr': 'pasar',
+    'pelab': 'pelabuhan',
+    'rs': 'rumah sakit',
+}
+
+# Token yang tidak membedakan lokasi dan diabaikan saat pencocokan
+STOP_TOKENS = {'cctv', 'live', 'streaming', 'stream', 'di', 'ke', 'dan', 'kota', 'pontianak'}
+
+_PARENTHESES_RE = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+_NON_WORD_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_tokens(text: str, strip_parentheses: bool = False) -> list:
+    """
+    Ubah teks menjadi daftar token baku.
+
+    Contoh: "Simpang Jl. Ahmad Yani" -> ['simpang', 'jalan', 'ahmad', 'yani']
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    if strip_parentheses:
+        text = _PARENTHESES_RE.sub(' ', text)
+
+    tokens = []
+    for raw in _NON_WORD_RE.split(text):
+        if not raw:
+            continue
+        for token in TOKEN_ALIASES.get(raw, raw).split():
+            if token not in STOP_TOKENS:
+                tokens.append(token)
+    return tokens
+
+
+def keyword_tokens(keyword: str) -> set:
+    """Token wajib untuk sebuah keyword CCTV (keterangan dalam kurung diabaikan)"""
+    tokens = set(normalize_tokens(keyword, strip_parentheses=True))
+    return tokens or set(normalize_tokens(keyword))
+
+
+class BroadcastIndex:
+    """
+    Indeks token terbalik untuk daftar siaran live satu channel.
+
+    Sebuah siaran cocok dengan keyword jika judulnya memuat semua token
+    keyword. Jika beberapa siaran cocok, dipilih yang judulnya paling spesifik
+    (token tambahan paling sedikit).
+    """
+
+    def __init__(self, broadcasts: list):
+        """
+        Args:
+            broadcasts: Daftar tuple (video_id, title)
+        """
+        self.broadcasts = list(broadcasts)
+        self._title_tokens = []
+        self._postings = {}
+        for position, (_, title) in enumerate(self.broadcasts):
+            tokens = set(normalize_tokens(title))
+            self._title_tokens.append(tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(position)
+
+    def __len__(self):
+        return len(self.broadcasts)
+
+    def match(self, keyword: str, offline_video_id: str = None):
+        """
+        Cari siaran yang cocok dengan keyword.
+
+        offline_video_id (video yang baru dilaporkan offline oleh videos.list)
+        diurutkan paling akhir: hasil search bisa terlambat dan masih memuat
+        siaran lama, jadi siaran cocok lain didahulukan.
+
+        Returns:
+            Tuple (video_id, title) atau None jika tidak ada yang cocok
+        """
+        tokens = keyword_tokens(keyword)
+        if not tokens:
+            return None
+
+        # Irisan posting list, mulai dari token paling jarang
+        candidates = None
+        for token in sorted(tokens, key=lambda t: len(self._postings.get(t, ()))):
+            postings = self._postings.get(token)
+            if not postings:
+                return None
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return None
+
+        def rank(position):
+            video_id = self.broadcasts[position][0]
+            extra = len(self._title_tokens[position] - tokens)
+            return (video_id == offline_video_id, extra, position)
+
+        best = min(candidates, key=rank)
+        return self.broadcasts[best]
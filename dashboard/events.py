@@ -0,0 +1,266 @@
+"""
+Change log status CCTV dan Server-Sent Events (SSE) untuk dashboard
+
+Checker (save_check_results) dan refresh per CCTV menambahkan satu baris
+StatusChangeEvent untuk setiap CCTV yang status/video ID-nya berubah. Endpoint
+SSE membaca log ini berdasarkan ID event, sehingga klien yang terputus bisa
+melanjutkan dari Last-Event-ID tanpa kehilangan perubahan.
+
+Di deployment ASGI stream memakai astream_events: koneksi yang menunggu event
+hanya berupa coroutine, bukan thread/worker yang tertahan. Polling change log
+dilakukan oleh satu EventPoller per event loop (per proses) yang membagikan
+event baru ke semua stream yang terhubung, sehingga jumlah query tidak ikut
+bertambah dengan jumlah koneksi.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import weakref
+from collections import deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import StatusChangeEvent
+
+logger = logging.getLogger(__name__)
+
+# Interval polling change log (detik)
+POLL_INTERVAL = 2.0
+
+# Komentar heartbeat dikirim jika tidak ada event selama ini (detik)
+HEARTBEAT_INTERVAL = 15.0
+
+# Satu koneksi SSE ditutup setelah durasi ini (detik); browser otomatis reconnect
+# dengan Last-Event-ID, sehingga worker server tidak tertahan selamanya
+DEFAULT_STREAM_MAX_DURATION = 300
+
+# Jeda reconnect yang disarankan ke EventSource (milidetik)
+RECONNECT_DELAY_MS = 3000
+
+# Event lebih tua dari ini dihapus dari log (detik)
+DEFAULT_EVENT_RETENTION = 24 * 60 * 60
+
+BATCH_SIZE = 200
+
+# Jumlah event terbaru yang disimpan EventPoller untuk dibagikan ke stream
+POLLER_BUFFER_SIZE = 1000
+
+
+def record_status_changes(cctv_list: list, checked_at=None):
+    """
+    Tambahkan event perubahan status untuk daftar CCTV (satu INSERT bulk).
+
+    Args:
+        cctv_list: Objek CCTV yang statusnya berubah (sudah berisi nilai baru)
+        checked_at: Waktu pengecekan (default last_status_check masing-masing CCTV)
+    """
+    if not cctv_list:
+        return
+    StatusChangeEvent.objects.bulk_create([
+        StatusChangeEvent(
+            cctv_id=cctv.pk,
+            is_active=cctv.is_active,
+            youtube_video_id=cctv.youtube_video_id,
+            checked_at=checked_at or cctv.last_status_check,
+        )
+        for cctv in cctv_list
+    ], batch_size=BATCH_SIZE)
+    prune_events()
+
+
+def prune_events():
+    """Hapus event yang sudah lewat masa simpan"""
+    retention = getattr(settings, 'STATUS_EVENT_RETENTION', DEFAULT_EVENT_RETENTION)
+    deleted, _ = StatusChangeEvent.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=retention)
+    ).delete()
+    return deleted
+
+
+def latest_event_id() -> int:
+    event = StatusChangeEvent.objects.order_by('-id').values_list('id', flat=True).first()
+    return event or 0
+
+
+def events_after(last_id: int, limit: int = BATCH_SIZE) -> list:
+    """Event dengan ID lebih besar dari last_id, urut naik"""
+    return list(
+        StatusChangeEvent.objects.filter(id__gt=last_id)
+        .order_by('id')
+        .values('id', 'cctv_id', 'is_active', 'youtube_video_id', 'checked_at')[:limit]
+    )
+
+
+def format_event(event: dict) -> str:
+    """Format satu event sebagai pesan SSE"""
+    data = json.dumps({
+        'id': event['cctv_id'],
+        'is_active': event['is_active'],
+        'youtube_video_id': event['youtube_video_id'],
+        'checked_at': event['checked_at'],
+    }, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: status\ndata: {data}\n\n"
+
+
+def stream_events(last_id=None):
+    """
+    Generator pesan SSE dari change log.
+
+    Args:
+        last_id: ID event terakhir yang sudah diterima klien; None berarti
+                 mulai dari event terbaru (hanya perubahan berikutnya)
+    """
+    if last_id is None:
+        last_id = latest_event_id()
+
+    max_duration = getattr(settings, 'STATUS_STREAM_MAX_DURATION', DEFAULT_STREAM_MAX_DURATION)
+    started = time.monotonic()
+    last_sent = started
+
+    yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+
+    while time.monotonic() - started < max_duration:
+        events = events_after(last_id)
+        if events:
+            for event in events:
+                yield format_event(event)
+            last_id = events[-1]['id']
+            last_sent = time.monotonic()
+            if len(events) == BATCH_SIZE:
+                # Masih ada sisa backlog, lanjutkan tanpa menunggu
+                continue
+        elif time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            yield ": heartbeat\n\n"
+            last_sent = time.monotonic()
+
+        time.sleep(POLL_INTERVAL)
+
+
+class EventPoller:
+    """
+    Satu poller change log untuk semua stream async dalam satu event loop.
+
+    Poller hanya berjalan selama ada stream yang berlangganan. Event baru
+    disimpan di buffer (POLLER_BUFFER_SIZE terakhir); stream yang tertinggal
+    lebih jauh dari buffer (mis. resume dari Last-Event-ID lama) membaca
+    sisanya langsung dari database.
+    """
+
+    def __init__(self):
+        self.last_id = 0
+        # Buffer lengkap untuk semua event dengan ID > floor
+        self.floor = 0
+        self.recent = deque()
+        self._subscribers = 0
+        self._task = None
+        self._ready = None
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        self._subscribers += 1
+        if self._task is None:
+            self._ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        await self._ready.wait()
+
+    def unsubscribe(self):
+        self._subscribers -= 1
+
+    def events_since(self, last_id: int):
+        """Event di buffer setelah last_id, atau None jika buffer tidak mencakupnya"""
+        if last_id < self.floor:
+            return None
+        return [event for event in self.recent if event['id'] > last_id]
+
+    async def wait(self, last_id: int, timeout: float):
+        """Tunggu sampai ada event setelah last_id atau timeout habis"""
+        if self.last_id > last_id:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        # Mulai dari event terbaru; buffer lama bisa sudah tertinggal jauh
+        try:
+            self.last_id = self.floor = await sync_to_async(latest_event_id)()
+        except Exception as e:
+            logger.error(f"Gagal membaca change log status: {e}")
+        self.recent.clear()
+        self._ready.set()
+
+        while self._subscribers > 0:
+            try:
+                events = await sync_to_async(events_after)(self.last_id)
+            except Exception as e:
+                logger.error(f"Gagal membaca change log status: {e}")
+                events = []
+            if events:
+                self.recent.extend(events)
+                while len(self.recent) > POLLER_BUFFER_SIZE:
+                    self.floor = self.recent.popleft()['id']
+                self.last_id = events[-1]['id']
+                changed, self._changed = self._changed, asyncio.Event()
+                changed.set()
+                if len(events) == BATCH_SIZE:
+                    continue
+            await asyncio.sleep(POLL_INTERVAL)
+        self._task = None
+
+
+_pollers = weakref.WeakKeyDictionary()
+
+
+def get_poller() -> EventPoller:
+    """EventPoller milik event loop yang sedang berjalan"""
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(loop)
+    if poller is None:
+        poller = _pollers[loop] = EventPoller()
+    return poller
+
+
+async def astream_events(last_id=None):
+    """Versi async stream_events (async generator untuk StreamingHttpResponse di ASGI)"""
+    poller = get_poller()
+    await poller.subscribe()
+    try:
+        if last_id is None:
+            last_id = poller.last_id
+
+        max_duration = getattr(settings, 'STATUS_STREAM_MAX_DURATION', DEFAULT_STREAM_MAX_DURATION)
+        started = time.monotonic()
+        last_sent = started
+
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+
+        while time.monotonic() - started < max_duration:
+            events = poller.events_since(last_id)
+            if events is None:
+                # Tertinggal lebih jauh dari buffer poller, kejar dari database
+                events = await sync_to_async(events_after)(last_id)
+                if not events:
+                    last_id = max(last_id, poller.floor)
+                    continue
+            if events:
+                for event in events:
+                    yield format_event(event)
+                last_id = events[-1]['id']
+                last_sent = time.monotonic()
+                continue
+            if time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+                yield ": heartbeat\n\n"
+                last_sent = time.monotonic()
+
+            now = time.monotonic()
+            timeout = min(last_sent + HEARTBEAT_INTERVAL, started + max_duration) - now
+            await poller.wait(last_id, max(timeout, 0))
+    finally:
+        poller.unsubscribe()
@@ -0,0 +1,199 @@
+"""
+Riwayat status CCTV (time-series) dengan retensi dan downsampling
+
+Checker menulis StatusHistory secara bulk, tetapi hanya untuk:
+- transisi (status aktif/tidak aktif berubah), dan
+- heartbeat jika CCTV belum punya baris selama STATUS_HISTORY_HEARTBEAT detik.
+
+Status di antara dua baris dianggap tetap (fungsi tangga), sehingga waktu
+online per jam bisa dihitung ulang dari baris mentah. Command
+compact_status_history menggulung baris mentah yang lebih tua dari masa simpan
+menjadi StatusHistoryHourly, lalu menghapus baris mentahnya. Dengan begitu
+ukuran tabel terbatas: mentah ~ CCTV x (86400 / heartbeat) x hari_simpan,
+per jam ~ CCTV x 24 x hari_simpan_per_jam.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .models import StatusHistory, StatusHistoryHourly
+
+DEFAULT_HEARTBEAT = 15 * 60
+DEFAULT_RAW_RETENTION_DAYS = 14
+DEFAULT_HOURLY_RETENTION_DAYS = 730
+
+# Baris heartbeat dianggap masih berlaku maksimal sekian kali interval heartbeat;
+# lebih dari itu (misal checker mati) waktunya tidak dihitung sebagai terpantau
+MAX_GAP_HEARTBEATS = 2
+
+BATCH_SIZE = 500
+
+ERROR_MAX_LENGTH = 255
+
+ONE_HOUR = timedelta(hours=1)
+
+
+def heartbeat_interval() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'STATUS_HISTORY_HEARTBEAT', DEFAULT_HEARTBEAT))
+
+
+def _truncate_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_history(cctv_list: list, snapshots: dict, checked_at) -> int:
+    """
+    Tulis baris riwayat untuk hasil satu siklus pengecekan (satu INSERT bulk).
+
+    Args:
+        cctv_list: Objek CCTV yang sudah berisi hasil pengecekan
+        snapshots: Dict {pk: snapshot_status(cctv)} sebelum pengecekan
+        checked_at: Waktu pengecekan
+
+    Returns:
+        int: Jumlah baris yang ditulis
+    """
+    if not cctv_list:
+        return 0
+
+    # Satu query grouped lewat indeks (cctv, checked_at): baris terakhir dalam jendela heartbeat
+    recent = set(
+        StatusHistory.objects.filter(
+            cctv_id__in=[cctv.pk for cctv in cctv_list],
+            checked_at__gt=checked_at - heartbeat_interval(),
+        ).order_by().values_list('cctv_id', flat=True).distinct()
+    )
+
+    rows = []
+    for cctv in cctv_list:
+        previous = snapshots.get(cctv.pk)
+        is_transition = previous is None or previous[0] != cctv.is_active
+        if not is_transition and cctv.pk in recent:
+            continue
+        rows.append(StatusHistory(
+            cctv_id=cctv.pk,
+            checked_at=checked_at,
+            is_active=cctv.is_active,
+            is_transition=is_transition,
+            error=(cctv.status_check_error or '')[:ERROR_MAX_LENGTH] or None,
+        ))
+
+    StatusHistory.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _add_interval(buckets: dict, start, end, is_active: bool):
+    """Bagi interval [start, end) ke bucket per jam"""
+    while start < end:
+        hour = _truncate_hour(start)
+        segment_end = min(end, hour + ONE_HOUR)
+        seconds = (segment_end - start).total_seconds()
+        bucket = buckets[hour]
+        bucket['observed_seconds'] += seconds
+        if is_active:
+            bucket['online_seconds'] += seconds
+        start = segment_end
+
+
+def _compact_cctv(cctv_id: int, raw_before, not_before, max_gap) -> tuple:
+    """
+    Gulung baris mentah satu CCTV sebelum raw_before menjadi bucket per jam.
+
+    Baris mentah terakhir sebelum raw_before tidak dihapus, karena statusnya
+    masih berlaku untuk jam-jam setelahnya (dihitung di run berikutnya).
+
+    Returns:
+        tuple: (jumlah bucket dibuat, jumlah baris mentah dihapus)
+    """
+    rows = list(
+        StatusHistory.objects.filter(cctv_id=cctv_id, checked_at__lt=raw_before)
+        .order_by('checked_at')
+        .values('id', 'checked_at', 'is_active', 'is_transition')
+    )
+    if not rows:
+        return 0, 0
+
+    next_checked_at = (
+        StatusHistory.objects.filter(cctv_id=cctv_id, checked_at__gte=raw_before)
+        .order_by('checked_at')
+        .values_list('checked_at', flat=True)
+        .first()
+    )
+
+    buckets = defaultdict(lambda: {'observed_seconds': 0.0, 'online_seconds': 0.0, 'transitions': 0})
+    for i, row in enumerate(rows):
+        following = rows[i + 1]['checked_at'] if i + 1 < len(rows) else next_checked_at
+        end = min(t for t in (following, row['checked_at'] + max_gap, raw_before) if t is not None)
+        start = row['checked_at']
+        if not_before is not None:
+            start = max(start, not_before)
+        _add_interval(buckets, start, end, row['is_active'])
+        if row['is_transition'] and (not_before is None or row['checked_at'] >= not_before):
+            buckets[_truncate_hour(row['checked_at'])]['transitions'] += 1
+
+    hourly = [
+        StatusHistoryHourly(
+            cctv_id=cctv_id,
+            hour=hour,
+            observed_seconds=round(bucket['observed_seconds']),
+            online_seconds=round(bucket['online_seconds']),
+            transitions=bucket['transitions'],
+        )
+        for hour, bucket in sorted(buckets.items())
+        if bucket['observed_seconds'] > 0 or bucket['transitions']
+    ]
+
+    stale_ids = [row['id'] for row in rows[:-1]]
+    with transaction.atomic():
+        StatusHistoryHourly.objects.bulk_create(hourly, batch_size=BATCH_SIZE)
+        for i in range(0, len(stale_ids), BATCH_SIZE):
+            StatusHistory.objects.filter(id__in=stale_ids[i:i + BATCH_SIZE]).delete()
+
+    return len(hourly), len(stale_ids)
+
+
+def compact_history(raw_before, hourly_before=None) -> dict:
+    """
+    Downsampling riwayat mentah ke bucket per jam dan terapkan retensi.
+
+    Args:
+        raw_before: Baris mentah sebelum waktu ini digulung (dibulatkan ke bawah per jam)
+        hourly_before: Bucket per jam sebelum waktu ini dihapus (None = tidak dihapus)
+
+    Returns:
+        dict: {'cctv', 'hourly_created', 'raw_deleted', 'hourly_deleted'}
+    """
+    raw_before = _truncate_hour(raw_before)
+    if hourly_before is not None:
+        hourly_before = _truncate_hour(hourly_before)
+    max_gap = heartbeat_interval() * MAX_GAP_HEARTBEATS
+
+    # Jam terakhir yang sudah digulung per CCTV: interval sebelum itu tidak dihitung ulang
+    compacted_until = {
+        cctv_id: last_hour + ONE_HOUR
+        for cctv_id, last_hour in StatusHistoryHourly.objects.values('cctv_id')
+        .annotate(last_hour=Max('hour')).values_list('cctv_id', 'last_hour')
+    }
+
+    cctv_ids = list(
+        StatusHistory.objects.filter(checked_at__lt=raw_before)
+        .order_by().values_list('cctv_id', flat=True).distinct()
+    )
+
+    summary = {'cctv': len(cctv_ids), 'hourly_created': 0, 'raw_deleted': 0, 'hourly_deleted': 0}
+    for cctv_id in cctv_ids:
+        not_before = compacted_until.get(cctv_id)
+        if hourly_before is not None:
+            not_before = max(not_before, hourly_before) if not_before else hourly_before
+        created, deleted = _compact_cctv(cctv_id, raw_before, not_before, max_gap)
+        summary['hourly_created'] += created
+        summary['raw_deleted'] += deleted
+
+    if hourly_before is not None:
+        summary['hourly_deleted'], _ = StatusHistoryHourly.objects.filter(hour__lt=hourly_before).delete()
+
+    return summary
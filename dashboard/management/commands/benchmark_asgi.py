@@ -0,0 +1,232 @@
+"""
+Django management command benchmark throughput refresh status: deployment WSGI vs ASGI
+
+YouTube Data API diganti stand-in HTTP lokal dengan latency tetap, sehingga
+yang diukur adalah seberapa banyak refresh yang bisa dilayani bersamaan:
+- WSGI: sejumlah worker sync (seperti gunicorn sync worker), satu request per worker
+- ASGI: satu event loop dengan view async, dibatasi --concurrency request bersamaan
+
+Benchmark dijalankan di database test terpisah (file SQLite sementara agar
+bisa diakses banyak thread), data di database utama tidak tersentuh.
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from dashboard import youtube_client
+from dashboard.models import CCTV
+from dashboard.synthetic import seed_synthetic_cctv
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in endpoint videos.list: semua video dianggap live setelah jeda latency"""
+
+    latency = 0.2
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        video_ids = query.get('id', [''])[0].split(',')
+        time.sleep(self.latency)
+        body = json.dumps({
+            'items': [
+                {'id': vid, 'snippet': {'title': f'Stand-in {vid}', 'liveBroadcastContent': 'live'}}
+                for vid in video_ids if vid
+            ],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stand_in(latency: float):
+    handler = type('StandInHandler', (_StandInHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _summary(latencies: list, elapsed: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(statistics.median(ordered), 1) if ordered else 0,
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1) if ordered else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Bandingkan throughput refresh status CCTV antara deployment WSGI dan ASGI (stand-in YouTube API lokal)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            metavar='N',
+            help='Jumlah request refresh per mode (default 200)',
+        )
+        parser.add_argument(
+            '--wsgi-workers',
+            type=int,
+            default=4,
+            metavar='N',
+            help='Jumlah worker sync pada mode WSGI (default 4)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            metavar='N',
+            help='Maksimum request bersamaan pada mode ASGI (default 100)',
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=int,
+            default=200,
+            metavar='MS',
+            help='Latency stand-in YouTube API per request (default 200ms)',
+        )
+        parser.add_argument(
+            '--output',
+            metavar='PATH',
+            help='Tulis hasil dalam format JSON ke file ini',
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        if total < 1 or options['wsgi_workers'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests, --wsgi-workers dan --concurrency harus lebih dari 0')
+
+        server = _start_stand_in(options['latency_ms'] / 1000)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}/youtube/v3'
+
+        test_db = tempfile.NamedTemporaryFile(prefix='benchmark_asgi_', suffix='.sqlite3', delete=False)
+        test_db.close()
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = test_db.name
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                YOUTUBE_API_KEY='benchmark',
+                YOUTUBE_API_BASE_URL=base_url,
+                YOUTUBE_QUOTA_BURST=10 * total + 1000,
+                YOUTUBE_HTTP_MAX_RETRIES=0,
+            ):
+                results = self._run(total, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            server.shutdown()
+            if os.path.exists(test_db.name):
+                os.remove(test_db.name)
+
+        if options.get('output'):
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Hasil ditulis ke {options['output']}")
+
+        if results['wsgi']['errors'] or results['asgi']['errors']:
+            raise CommandError('Sebagian request refresh gagal, lihat kolom Error')
+
+    def _run(self, total, options):
+        # CCTV berbeda per mode dan video unik, sehingga setiap refresh benar-benar ke stand-in
+        seed_synthetic_cctv(2 * total, seed=0)
+        ids = list(CCTV.objects.order_by('pk').values_list('pk', flat=True))
+        cache.clear()
+        youtube_client.reset_stats()
+
+        transport = 'httpx' if youtube_client.httpx is not None else 'thread pool'
+        self.stdout.write(
+            f"{total} refresh per mode, stand-in latency {options['latency_ms']}ms, "
+            f"client async: {transport}"
+        )
+        self.stdout.write(
+            f"  {'Mode':<32} {'Request':>7} {'Error':>5} {'Waktu':>8} {'Req/s':>8} {'p50':>9} {'p95':>9}"
+        )
+
+        wsgi = self._run_wsgi(ids[:total], options['wsgi_workers'])
+        self._report(f"WSGI ({options['wsgi_workers']} worker sync)", wsgi)
+        asgi = asyncio.run(self._run_asgi(ids[total:], options['concurrency']))
+        self._report(f"ASGI (1 proses, {options['concurrency']} bersamaan)", asgi)
+
+        if wsgi['throughput']:
+            self.stdout.write(self.style.SUCCESS(
+                f"ASGI {asgi['throughput'] / wsgi['throughput']:.1f}x throughput WSGI"
+            ))
+        return {
+            'latency_ms': options['latency_ms'],
+            'async_transport': transport,
+            'wsgi': wsgi,
+            'asgi': asgi,
+            'youtube_client': youtube_client.get_stats(),
+        }
+
+    def _report(self, label, result):
+        style = self.style.ERROR if result['errors'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"  {label:<32} {result['requests']:>7} {result['errors']:>5} {result['seconds']:>7.2f}s "
+            f"{result['throughput']:>8.1f} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms"
+        ))
+
+    def _run_wsgi(self, ids, workers):
+        """Handler WSGI di beberapa thread, masing-masing satu request pada satu waktu"""
+        def refresh(cctv_id):
+            started = time.perf_counter()
+            try:
+                response = Client().post(f'/api/cctv/{cctv_id}/refresh-status/')
+                ok = response.status_code == 200 and json.loads(response.content)['is_active']
+            finally:
+                connections.close_all()
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(refresh, ids))
+        elapsed = time.perf_counter() - started
+        return _summary([o[0] * 1000 for o in outcomes], elapsed, sum(1 for o in outcomes if not o[1]))
+
+    async def _run_asgi(self, ids, concurrency):
+        """Handler ASGI di satu event loop, seperti satu proses uvicorn"""
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def refresh(cctv_id):
+            async with semaphore:
+                started = time.perf_counter()
+                # Seperti ASGIHandler: kode sync thread-sensitive per request di thread sendiri
+                async with ThreadSensitiveContext():
+                    response = await client.post(f'/api/cctv/{cctv_id}/refresh-status/')
+                ok = response.status_code == 200 and json.loads(response.content)['is_active']
+                return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(refresh(cctv_id) for cctv_id in ids))
+        elapsed = time.perf_counter() - started
+        return _summary([o[0] * 1000 for o in outcomes], elapsed, sum(1 for o in outcomes if not o[1]))
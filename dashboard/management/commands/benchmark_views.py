@@ -0,0 +1,238 @@
+"""
+Django management command benchmark view dashboard dan admin (jumlah query, latency, ukuran respons)
+
+Benchmark dijalankan di database test terpisah (dibuat dan dihapus otomatis)
+dan cache LocMemCache privat, sehingga data di database utama maupun isi
+cache bersama (lock checker, penanda kuota, ETag) tidak tersentuh.
+"""
+
+import json
+import platform
+import statistics
+import time
+from html.parser import HTMLParser
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+
+from dashboard import spatial
+from dashboard.models import CCTV, Kecamatan
+from dashboard.synthetic import seed_synthetic_cctv
+
+# (nama, path, butuh login admin, batas jumlah query saat cache kosong)
+# Batas query harus konstan terhadap jumlah CCTV/kecamatan
+BENCHMARK_VIEWS = [
+    ('index', '/', False, 3),
+    ('api_cctv_list', '/api/cctv/', False, 2),
+    ('api_cctv_bbox', '/api/cctv/?bbox=109.335,-0.035,109.345,-0.025', False, 1),
+    ('api_cctv_clusters', '/api/cctv/clusters/?zoom=13&bbox=109.28,-0.09,109.40,0.02', False, 1),
+    ('api_cctv_nearest', '/api/cctv/nearest/?lat=-0.03&lng=109.34&k=10', False, 1),
+    ('api_kecamatan_list', '/api/kecamatan/', False, 2),
+    ('api_stats', '/api/stats/', False, 2),
+    ('api_uptime', '/api/uptime/?window=week', False, 3),
+    ('admin_cctv_changelist', '/admin/dashboard/cctv/', True, 5),
+    ('admin_kecamatan_changelist', '/admin/dashboard/kecamatan/', True, 4),
+]
+
+DEFAULT_SIZES = '10,1000,10000'
+
+# Statement kontrol transaksi tidak dihitung sebagai query
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+# Cache privat selama benchmark (cache.clear() tiap iterasi dingin tidak boleh
+# menghapus cache bersama deployment)
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-views',
+    }
+}
+
+
+def _counts_toward_budget(sql: str) -> bool:
+    """Statement kontrol transaksi tidak dihitung"""
+    return not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS)
+
+
+class _ElementCounter(HTMLParser):
+    """Hitung elemen HTML (perkiraan jumlah node DOM halaman sebelum JavaScript berjalan)"""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.count += 1
+
+
+def _dom_nodes(response):
+    if not response.get('Content-Type', '').startswith('text/html'):
+        return None
+    counter = _ElementCounter()
+    counter.feed(response.content.decode(response.charset or 'utf-8'))
+    return counter.count
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark jumlah query, latency p50/p95 dan ukuran respons view dashboard & admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default=DEFAULT_SIZES,
+            help=f'Jumlah CCTV sintetis per putaran, dipisah koma (default {DEFAULT_SIZES})',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            metavar='N',
+            help='Jumlah request per view per mode (dingin/hangat) (default 10)',
+        )
+        parser.add_argument(
+            '--output',
+            metavar='PATH',
+            help='Tulis hasil dalam format JSON ke file ini',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed generator data sintetis (default 0)',
+        )
+        parser.add_argument(
+            '--views',
+            help='Hanya jalankan view tertentu, dipisah koma (misal: index,api_cctv_list)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes harus berupa angka dipisah koma, misal 10,1000,10000')
+        iterations = max(1, options['iterations'])
+
+        views = BENCHMARK_VIEWS
+        if options.get('views'):
+            selected = {name.strip() for name in options['views'].split(',')}
+            views = [view for view in BENCHMARK_VIEWS if view[0] in selected]
+            if not views:
+                raise CommandError(f"View tidak dikenal. Pilihan: {', '.join(v[0] for v in BENCHMARK_VIEWS)}")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                results = self._run(sizes, views, iterations, options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'results': results,
+        }
+
+        if options.get('output'):
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Hasil ditulis ke {options['output']}")
+
+        failures = [r for r in results if not r['within_budget']]
+        if failures:
+            names = ', '.join(f"{r['view']}@{r['cctv']} ({r['queries']}>{r['query_budget']})" for r in failures)
+            raise CommandError(f'Batas query terlampaui: {names}')
+
+        self.stdout.write(self.style.SUCCESS('Semua view dalam batas query.'))
+
+    def _run(self, sizes, views, iterations, seed):
+        from django.contrib.auth import get_user_model
+
+        admin_user = get_user_model().objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        results = []
+
+        for size in sizes:
+            CCTV.objects.all().delete()
+            Kecamatan.objects.all().delete()
+            started = time.monotonic()
+            seed_synthetic_cctv(size, seed=seed)
+            # Indeks spasial lama (ukuran sebelumnya) tidak boleh dilayani sementara
+            spatial.refresh_index()
+            self.stdout.write(f'\n{size} CCTV sintetis dibuat ({time.monotonic() - started:.2f}s)')
+            self.stdout.write(
+                f"  {'View':<28} {'Query':>5} {'Budget':>6} {'p50':>9} {'p95':>9} "
+                f"{'p50 hangat':>10} {'p95 hangat':>10} {'Ukuran':>10} {'DOM':>6}"
+            )
+
+            for name, path, needs_admin, budget in views:
+                client = Client()
+                if needs_admin:
+                    client.force_login(admin_user)
+                result = self._measure(client, path, iterations)
+                result.update({
+                    'view': name,
+                    'path': path,
+                    'cctv': size,
+                    'query_budget': budget,
+                    'within_budget': result['queries'] <= budget,
+                })
+                results.append(result)
+
+                style = self.style.SUCCESS if result['within_budget'] else self.style.ERROR
+                self.stdout.write(style(
+                    f"  {name:<28} {result['queries']:>5} {budget:>6} "
+                    f"{result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+                    f"{result['warm_p50_ms']:>8.1f}ms {result['warm_p95_ms']:>8.1f}ms "
+                    f"{result['bytes']:>10} {result['dom_nodes'] if result['dom_nodes'] is not None else '-':>6}"
+                ))
+
+        return results
+
+    def _measure(self, client, path, iterations):
+        """Ukur request dengan cache kosong (dingin) lalu dengan cache terisi (hangat)"""
+        cold = []
+        queries = 0
+        size = 0
+        for _ in range(iterations):
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path)
+                cold.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{path} mengembalikan HTTP {response.status_code}')
+            queries = max(queries, sum(1 for q in captured.captured_queries if _counts_toward_budget(q['sql'])))
+            size = len(response.content)
+
+        warm = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client.get(path)
+            warm.append((time.perf_counter() - started) * 1000)
+
+        return {
+            'queries': queries,
+            'p50_ms': round(statistics.median(cold), 2),
+            'p95_ms': round(_percentile(cold, 95), 2),
+            'warm_p50_ms': round(statistics.median(warm), 2),
+            'warm_p95_ms': round(_percentile(warm, 95), 2),
+            'bytes': size,
+            'dom_nodes': _dom_nodes(response),
+        }
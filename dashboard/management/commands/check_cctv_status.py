@@ -1,11 +1,26 @@
 """
 Django management command untuk mengecek status semua CCTV
+
+Mode:
+- sekali jalan (default): semua CCTV dicek satu kali
+- --loop SECONDS: semua CCTV dicek ulang setiap SECONDS detik
+- --schedule: penjadwal adaptif per CCTV (lihat dashboard.scheduler); setiap
+  slot --cycle detik hanya CCTV yang jatuh tempo yang dicek, dengan deadline
+  per siklus. Beberapa worker --schedule berbagi CCTV lewat lease.
+- --report: throughput per worker penjadwal
+
+Durasi siklus, jumlah CCTV dicek, hasil discovery dan request YouTube dicatat
+ke dashboard.metrics dan disalin ke database setiap akhir siklus, sehingga
+ikut terbaca di endpoint /metrics proses web.
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from dashboard.models import CCTV
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -32,29 +47,153 @@ class Command(BaseCommand):
             const=300,
             help='Jalankan pengecekan terus menerus dengan interval tertentu (default 300 detik/5 menit)',
         )
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help='Jalankan penjadwal adaptif: interval per CCTV menyesuaikan stabilitas statusnya',
+        )
+        parser.add_argument(
+            '--cycle',
+            type=int,
+            default=60,
+            metavar='SECONDS',
+            help='Panjang slot satu siklus penjadwal; siklus tidak pernah melewati slotnya (default 60)',
+        )
+        parser.add_argument(
+            '--worker-id',
+            metavar='ID',
+            help='ID worker penjadwal untuk lease & laporan throughput (default host:pid)',
+        )
+        parser.add_argument(
+            '--report',
+            action='store_true',
+            help='Tampilkan throughput per worker penjadwal yang aktif lalu keluar',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            metavar='N',
+            help='Jumlah request YouTube yang dijalankan paralel (batch check & discovery). 1 = serial (default 8)',
+        )
 
     def handle(self, *args, **options):
-        import time
-        from dashboard.utils import check_multiple_videos
-        
         video_id = options.get('video_id')
         verbose = options.get('verbose', False)
         loop_interval = options.get('loop')
+        workers = max(1, options.get('workers') or 1)
         
-        if loop_interval:
+        if options.get('report'):
+            self._report_workers()
+        elif options.get('schedule'):
+            self._run_scheduler(verbose, workers, max(1, options['cycle']), options.get('worker_id'))
+        elif loop_interval:
             self.stdout.write(self.style.SUCCESS(f'Starting continuous monitoring (Interval: {loop_interval}s)...'))
             try:
                 while True:
-                    self._check_all_cctv(video_id, verbose)
+                    self._check_all_cctv(video_id, verbose, workers)
                     self.stdout.write(f'Sleeping for {loop_interval} seconds...')
                     time.sleep(loop_interval)
             except KeyboardInterrupt:
                 self.stdout.write(self.style.WARNING('\nMonitoring stopped by user.'))
         else:
-            self._check_all_cctv(video_id, verbose)
+            self._check_all_cctv(video_id, verbose, workers)
 
-    def _check_all_cctv(self, video_id, verbose):
-        from dashboard.utils import check_multiple_videos, discover_live_video_by_keyword
+    def _run_scheduler(self, verbose, workers, cycle, worker_id=None):
+        """
+        Siklus penjadwal adaptif pada slot tetap sepanjang cycle detik (tanpa drift).
+        
+        Beberapa proses --schedule boleh berjalan bersamaan (satu host atau lebih):
+        CCTV dibagi lewat lease di tabel jadwal, bukan lock global.
+        """
+        from dashboard import metrics, scheduler, youtube_client
+        
+        worker_id = worker_id or scheduler.default_worker_id()
+        self.stdout.write(self.style.SUCCESS(
+            f'Starting adaptive scheduler worker {worker_id} (cycle: {cycle}s)...'
+        ))
+        next_slot = time.monotonic()
+        try:
+            while True:
+                started = time.monotonic()
+                deadline = started + cycle * scheduler.DEADLINE_FRACTION
+                youtube_client.reset_stats()
+                
+                if scheduler.full_run_active():
+                    self.stdout.write(self.style.WARNING('Run penuh check_cctv_status sedang berjalan, siklus dilewati.'))
+                else:
+                    totals = scheduler.run_cycle(
+                        lambda batch: self._check_cctv_list(batch, verbose, workers, use_etag=False, leased=True), deadline, worker_id
+                    )
+                    scheduler.record_worker_cycle(worker_id, totals)
+                    metrics.observe('cctv_checker_cycle_duration_seconds', time.monotonic() - started, mode='schedule')
+                    metrics.inc('cctv_checker_checked_total', totals['checked'], mode='schedule')
+                    metrics.flush()
+                    http = youtube_client.get_stats()
+                    rate = totals['checked'] / totals['busy_seconds'] if totals['busy_seconds'] else 0
+                    message = (
+                        f'[{timezone.now().strftime("%H:%M:%S")}] {totals["checked"]} dicek, '
+                        f'{totals["changed"]} berubah, {totals["deferred"]} ditunda, '
+                        f'{totals["remaining"]} masih jatuh tempo, {http["requests"]} request, '
+                        f'{rate:.1f} CCTV/s ({time.monotonic() - started:.2f}s)'
+                    )
+                    style = self.style.WARNING if totals['stopped_by_deadline'] and totals['remaining'] else self.style.SUCCESS
+                    self.stdout.write(style(message))
+                    if totals['stopped_by_full_run']:
+                        self.stdout.write(self.style.WARNING('Run penuh check_cctv_status dimulai, siklus dihentikan.'))
+                
+                # Slot berikutnya dihitung dari jadwal tetap; slot yang terlewat tidak dikejar
+                next_slot += cycle
+                now = time.monotonic()
+                if now > next_slot:
+                    next_slot += cycle * math.ceil((now - next_slot) / cycle)
+                time.sleep(next_slot - now)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nScheduler stopped by user.'))
+
+    def _report_workers(self):
+        """Tampilkan throughput worker penjadwal yang aktif 10 menit terakhir"""
+        from dashboard import scheduler
+        
+        workers = scheduler.active_workers()
+        if not workers:
+            self.stdout.write(self.style.WARNING('Tidak ada worker penjadwal yang aktif dalam 10 menit terakhir.'))
+            return
+        
+        now = timezone.now()
+        self.stdout.write(
+            f"{'Worker':<40} {'Siklus':>7} {'Dicek':>8} {'Berubah':>8} {'CCTV/s':>8} {'CCTV/mnt':>9} {'Terakhir':>9}"
+        )
+        total_per_minute = 0
+        for worker in workers:
+            uptime = max(1.0, (now - worker.started_at).total_seconds())
+            per_minute = worker.checked * 60 / uptime
+            total_per_minute += per_minute
+            rate = worker.cameras_per_second
+            self.stdout.write(
+                f'{worker.worker_id:<40} {worker.cycles:>7} {worker.checked:>8} {worker.changed:>8} '
+                f"{rate if rate is not None else '-':>8} {per_minute:>9.1f} "
+                f'{int((now - worker.last_seen).total_seconds()):>8}s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(workers)} worker aktif, total {total_per_minute:.1f} CCTV/menit, '
+            f'{scheduler.due_count()} CCTV jatuh tempo belum diklaim'
+        ))
+
+    def _check_all_cctv(self, video_id, verbose, workers=1):
+        from dashboard import scheduler
+        
+        with scheduler.check_lock() as acquired:
+            if not acquired:
+                self.stdout.write(self.style.WARNING('Pengecekan lain sedang berjalan, run ini dilewati.'))
+                return
+            self._check_all_cctv_locked(video_id, verbose, workers)
+
+    def _check_all_cctv_locked(self, video_id, verbose, workers):
+        from dashboard import metrics, quota, youtube_client
+
+        started = time.monotonic()
+        youtube_client.reset_stats()
         
         # Filter CCTV yang akan dicek
         if video_id:
@@ -67,29 +206,126 @@ class Command(BaseCommand):
         else:
             cctv_list = CCTV.objects.all()
         
-        total = cctv_list.count()
+        cctv_list = list(cctv_list)
+        total = len(cctv_list)
         self.stdout.write(f'\nMengecek status {total} CCTV (' + timezone.now().strftime("%Y-%m-%d %H:%M:%S") + ')...')
         
+        outcome = self._check_cctv_list(cctv_list, verbose, workers)
+        stats = outcome['stats']
+        written = outcome['written']
+        
+        # Summary
+        elapsed = time.monotonic() - started
+        metrics.observe('cctv_checker_cycle_duration_seconds', elapsed, mode='full')
+        metrics.inc('cctv_checker_checked_total', stats['online'] + stats['offline'], mode='full')
+        metrics.flush()
+        self.stdout.write(f'Result: {stats["online"]} Online, {stats["offline"]} Offline')
+        if stats['deferred']:
+            self.stdout.write(self.style.WARNING(f'Ditunda (budget kuota): {stats["deferred"]} CCTV'))
+        self.stdout.write(
+            f'Rows written: {written["changed"]} changed (bulk_update), '
+            f'{written["unchanged"]} timestamp only (1 UPDATE)'
+        )
+        self.stdout.write(f'Cycle time: {elapsed:.2f}s ({workers} worker)')
+        http = youtube_client.get_stats()
+        self.stdout.write(
+            f'HTTP: {http["requests"]} request, {http["handshakes"]} handshake, '
+            f'{http["retries"]} retry, {http["failures"]} gagal, {http["bytes"] / 1024:.1f} KB, '
+            f'{http["not_modified"]} x 304, parse {http["parse_seconds"] * 1000:.1f} ms'
+        )
+        usage = quota.get_quota_status()
+        self.stdout.write(
+            f'Quota ({usage["date"]} PT): {usage["spent"]}/{usage["daily_quota"]} unit terpakai, '
+            f'{usage["available"]} token tersedia'
+        )
+
+    def _check_cctv_list(self, cctv_list, verbose, workers, use_etag=True, leased=False):
+        """
+        Cek status (batch + auto-discovery) dan simpan hasil untuk daftar CCTV.
+
+        use_etag=False untuk --schedule: isi batch berubah setiap siklus sehingga
+        ETag per chunk tidak pernah cocok dan hanya memenuhi cache.
+        leased=True untuk CCTV hasil claim_due: hanya baris yang lease-nya masih
+        dipegang worker ini yang disimpan.
+
+        Returns:
+            dict: stats (online/offline/deferred), written (hasil save_check_results),
+                  snapshots ({pk: status sebelum cek}) dan deferred (PK yang ditunda)
+        """
+        from dashboard.checker import save_check_results, snapshot_status
+        from dashboard import scheduler
+        from dashboard.discovery import BroadcastIndex
+        from dashboard.utils import check_multiple_videos, list_multiple_channel_live_broadcasts, match_live_video
+        from dashboard import metrics, quota
+
+        # Simpan state awal untuk menghitung diff setelah pengecekan
+        snapshots = {cctv.pk: snapshot_status(cctv) for cctv in cctv_list}
+        
         # Collect video IDs for batch check
-        video_ids = list(cctv_list.values_list('youtube_video_id', flat=True))
+        video_ids = [cctv.youtube_video_id for cctv in cctv_list]
         
-        # Batch Check (Hemat Quota!)
-        results = check_multiple_videos(video_ids)
+        # Batch Check (Hemat Quota!) - chunk 50 ID dijalankan paralel
+        # Cache status tidak dibaca agar susunan chunk stabil dan ETag per chunk tetap cocok
+        results = check_multiple_videos(video_ids, max_workers=workers, use_cache=False, use_etag=use_etag)
         
-        stats = {'online': 0, 'offline': 0, 'error': 0}
+        # --- LOGIKA AUTO-DISCOVERY ---
+        # Jika video offline DAN punya Channel ID, coba cari video live baru
+        # Keyword: Gunakan search_keyword jika ada, jika tidak gunakan nama_lokasi
+        # CCTV dikelompokkan per channel: siaran live tiap channel diambil sekali
+        # (paralel antar channel), lalu judulnya dicocokkan lokal per CCTV
+        discovery_targets = []
+        for cctv in cctv_list:
+            is_online, error_msg = results.get(cctv.youtube_video_id, (False, ""))
+            if error_msg == quota.QUOTA_DEFERRED_MESSAGE:
+                continue
+            if not is_online and cctv.youtube_channel_id:
+                keyword = cctv.search_keyword if cctv.search_keyword else cctv.nama_lokasi
+                discovery_targets.append((cctv, keyword))
+        
+        discoveries = {}
+        if discovery_targets:
+            channel_ids = {cctv.youtube_channel_id for cctv, _ in discovery_targets}
+            self.stdout.write(
+                f'  [Discovery] Mencari siaran live untuk {len(discovery_targets)} CCTV offline '
+                f'di {len(channel_ids)} channel...'
+            )
+            broadcasts = list_multiple_channel_live_broadcasts(channel_ids, max_workers=workers)
+            indexes = {}
+            for channel_id, (items, error_msg) in broadcasts.items():
+                indexes[channel_id] = (BroadcastIndex(items), error_msg)
+                if verbose:
+                    self.stdout.write(f'  [Channel] {channel_id}: {len(items)} siaran live')
+            
+            for cctv, keyword in discovery_targets:
+                index, error_msg = indexes[cctv.youtube_channel_id]
+                if error_msg:
+                    metrics.inc('cctv_discovery_total', result='error')
+                    result = ("", error_msg)
+                else:
+                    result = match_live_video(index, keyword, current_video_id=cctv.youtube_video_id)
+                discoveries[cctv.pk] = (keyword, result)
+        # -----------------------------
+        
+        stats = {'online': 0, 'offline': 0, 'error': 0, 'deferred': 0}
+        checked_at = timezone.now()
+        checked = []
+        deferred = []
         
         for cctv in cctv_list:
             vid = cctv.youtube_video_id
             is_online, error_msg = results.get(vid, (False, "Check skipped/failed"))
             
-            # --- LOGIKA AUTO-DISCOVERY ---
-            # Jika video offline DAN punya Channel ID, coba cari video live baru
-            # Keyword: Gunakan search_keyword jika ada, jika tidak gunakan nama_lokasi
-            if not is_online and cctv.youtube_channel_id:
-                keyword = cctv.search_keyword if cctv.search_keyword else cctv.nama_lokasi
-                
+            # Budget kuota menipis: status lama dipertahankan, tidak disimpan
+            if error_msg == quota.QUOTA_DEFERRED_MESSAGE:
+                stats['deferred'] += 1
+                deferred.append(cctv.pk)
+                if verbose:
+                    self.stdout.write(f'  [{cctv.nama_lokasi}] ' + self.style.WARNING(f'⏸ DITUNDA - {error_msg}'))
+                continue
+            
+            if cctv.pk in discoveries:
+                keyword, (new_vid, discovery_error) = discoveries[cctv.pk]
                 self.stdout.write(f'  [Discovery] "{cctv.nama_lokasi}" offline, mencari "{keyword}"...')
-                new_vid, discovery_error = discover_live_video_by_keyword(cctv.youtube_channel_id, keyword)
                 
                 if new_vid:
                     # Cek apakah ID baru sama dengan yang lama (kadang API search telat update)
@@ -102,19 +338,11 @@ class Command(BaseCommand):
                         error_msg = ""
                 else:
                     self.stdout.write(f'  [Not Found] {discovery_error}')
-            # -----------------------------
             
-            # Update fields
+            # Update fields (disimpan bulk setelah loop)
             cctv.is_active = is_online
-            cctv.last_status_check = timezone.now()
             cctv.status_check_error = error_msg if not is_online else None
-            
-            update_fields = ['is_active', 'last_status_check', 'status_check_error']
-            # Jika video_id berubah (karena discovery), simpan juga
-            if cctv.youtube_video_id != vid:
-                update_fields.append('youtube_video_id')
-                
-            cctv.save(update_fields=update_fields)
+            checked.append(cctv)
             
             if is_online:
                 stats['online'] += 1
@@ -126,5 +354,10 @@ class Command(BaseCommand):
             if verbose:
                 self.stdout.write(f'  [{cctv.nama_lokasi}] {status_text}')
                 
-        # Summary
-        self.stdout.write(f'Result: {stats["online"]} Online, {stats["offline"]} Offline')
+        # Simpan hanya baris yang berubah, sisanya cukup refresh last_status_check
+        with transaction.atomic():
+            if leased:
+                checked = scheduler.filter_leased(checked)
+            written = save_check_results(checked, snapshots, checked_at)
+        
+        return {'stats': stats, 'written': written, 'snapshots': snapshots, 'deferred': deferred}
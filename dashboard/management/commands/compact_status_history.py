@@ -0,0 +1,62 @@
+"""
+Django management command untuk downsampling dan retensi riwayat status CCTV
+
+Rollup uptime ikut dipangkas: rollup per jam di luar jendela laporan
+terpanjang, dan rollup harian mengikuti masa simpan bucket per jam.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dashboard.history import (
+    DEFAULT_HOURLY_RETENTION_DAYS,
+    DEFAULT_RAW_RETENTION_DAYS,
+    compact_history,
+)
+from dashboard.uptime import prune_rollups
+
+
+class Command(BaseCommand):
+    help = 'Gulung riwayat status mentah yang lama menjadi bucket per jam dan hapus data di luar masa simpan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days',
+            type=int,
+            metavar='DAYS',
+            help='Masa simpan riwayat mentah dalam hari (default STATUS_HISTORY_RAW_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--hourly-days',
+            type=int,
+            metavar='DAYS',
+            help='Masa simpan bucket per jam dan rollup uptime harian dalam hari, 0 = simpan selamanya '
+                 '(default STATUS_HISTORY_HOURLY_RETENTION_DAYS)',
+        )
+
+    def handle(self, *args, **options):
+        raw_days = options.get('raw_days')
+        if raw_days is None:
+            raw_days = getattr(settings, 'STATUS_HISTORY_RAW_RETENTION_DAYS', DEFAULT_RAW_RETENTION_DAYS)
+        hourly_days = options.get('hourly_days')
+        if hourly_days is None:
+            hourly_days = getattr(settings, 'STATUS_HISTORY_HOURLY_RETENTION_DAYS', DEFAULT_HOURLY_RETENTION_DAYS)
+
+        now = timezone.now()
+        raw_before = now - timedelta(days=max(0, raw_days))
+        hourly_before = now - timedelta(days=hourly_days) if hourly_days > 0 else None
+
+        self.stdout.write(f'Menggulung riwayat mentah sebelum {raw_before:%Y-%m-%d %H:00} UTC...')
+        summary = compact_history(raw_before, hourly_before)
+        rollups = prune_rollups(now, daily_before=hourly_before)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai: {summary['cctv']} CCTV, {summary['hourly_created']} bucket per jam dibuat, "
+            f"{summary['raw_deleted']} baris mentah dihapus, {summary['hourly_deleted']} bucket lama dihapus"
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup uptime dihapus: {rollups['hourly_deleted']} per jam, {rollups['daily_deleted']} harian"
+        ))
@@ -0,0 +1,68 @@
+"""
+Django management command worker untuk memproses antrian job pengecekan status CCTV
+"""
+
+from django.core.management.base import BaseCommand
+from dashboard import metrics
+from dashboard.checker import claim_next_job, run_status_job
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Worker antrian job pengecekan status CCTV (dari tombol refresh semua & admin action)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Proses semua job yang sedang menunggu lalu berhenti',
+        )
+        parser.add_argument(
+            '--poll',
+            type=int,
+            default=2,
+            metavar='SECONDS',
+            help='Interval pengecekan antrian saat kosong (default 2 detik)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            metavar='N',
+            help='Jumlah request YouTube paralel per job (default 4)',
+        )
+
+    def handle(self, *args, **options):
+        once = options.get('once', False)
+        poll_interval = max(1, options.get('poll') or 1)
+        workers = max(1, options.get('workers') or 1)
+
+        if not once:
+            self.stdout.write(self.style.SUCCESS(f'Status job worker started (Poll: {poll_interval}s)...'))
+
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.stdout.write(f'Memproses Job #{job.pk} ({job.total} CCTV)...')
+                started = time.monotonic()
+                job = run_status_job(job, max_workers=workers)
+                elapsed = time.monotonic() - started
+                metrics.flush()
+
+                if job.status == job.STATUS_DONE:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  Job #{job.pk} selesai: {job.online} Online, {job.done - job.online} Offline ({elapsed:.2f}s)'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'  Job #{job.pk} gagal: {job.error}'))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nWorker stopped by user.'))
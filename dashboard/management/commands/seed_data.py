@@ -2,8 +2,11 @@
 Management command untuk mengisi data dummy CCTV Kota Pontianak
 """
 
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from dashboard.models import Kecamatan, CCTV
+from dashboard.synthetic import BATCH_SIZE, DEFAULT_CHANNELS, seed_synthetic_cctv
 
 
 class Command(BaseCommand):
@@ -15,6 +18,37 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip jika data sudah ada',
         )
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            metavar='N',
+            help='Buat N CCTV sintetis (untuk load testing) alih-alih data dummy',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed generator data sintetis, hasil sama untuk seed yang sama (default 0)',
+        )
+        parser.add_argument(
+            '--channels',
+            type=int,
+            default=DEFAULT_CHANNELS,
+            help=f'Jumlah channel YouTube sintetis, 0 = tanpa channel (default {DEFAULT_CHANNELS})',
+        )
+        parser.add_argument(
+            '--video-pool',
+            type=int,
+            default=0,
+            metavar='K',
+            help='Pakai K video ID bersama secara acak; 0 = video ID unik per CCTV (default 0)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Jumlah baris per bulk_create (default {BATCH_SIZE})',
+        )
     
     def handle(self, *args, **options):
         skip_existing = options['skip_existing']
@@ -25,6 +59,10 @@ class Command(BaseCommand):
                 self.style.WARNING('Data sudah ada, skip seeding.')
             )
             return
+
+        if options.get('synthetic') is not None:
+            self._seed_synthetic(options)
+            return
         
         self.stdout.write('Memulai seeding data...')
         
@@ -218,3 +256,28 @@ class Command(BaseCommand):
                 f'{created_count} CCTV baru ditambahkan.'
             )
         )
+
+    def _seed_synthetic(self, options):
+        count = options['synthetic']
+        if count <= 0:
+            raise CommandError('--synthetic harus lebih besar dari 0')
+        if options['channels'] < 0 or options['video_pool'] < 0:
+            raise CommandError('--channels dan --video-pool tidak boleh negatif')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size harus lebih besar dari 0')
+
+        self.stdout.write(f'Membuat {count} CCTV sintetis (seed {options["seed"]})...')
+        started = time.monotonic()
+        created = seed_synthetic_cctv(
+            count,
+            seed=options['seed'],
+            channels=options['channels'],
+            video_pool=options['video_pool'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Seeding selesai! {created} CCTV sintetis ditambahkan '
+                f'({time.monotonic() - started:.2f}s).'
+            )
+        )
@@ -0,0 +1,391 @@
+"""
+Metrik operasional dalam format teks Prometheus (endpoint /metrics)
+
+Setiap proses (web, check_cctv_status, run_status_jobs) mencatat counter dan
+histogram di memori. Nilai kumulatifnya disalin berkala ke tabel MetricSeries,
+satu baris per proses per seri, sehingga /metrics menjumlahkan semua proses
+termasuk checker yang berjalan terpisah. Proses yang restart mendapat ID baru
+(host:pid) dan barisnya sendiri.
+
+Proses yang tidak menulis selama METRICS_STALE_DAYS dipensiunkan: nilainya
+dijumlahkan ke baris agregat process='retired' lalu barisnya dihapus, jadi
+jumlah lintas proses tetap naik monoton seperti counter Prometheus. Pensiun
+dijalankan paling sering sekali per RETIRE_INTERVAL (lock di cache bersama),
+bukan di setiap scrape. Proses yang ternyata masih hidup setelah barisnya
+dipensiunkan hanya menulis selisih sejak flush terakhirnya.
+
+Gauge (CCTV online/offline per kecamatan, kuota hari ini) dihitung langsung
+dari database saat scrape.
+"""
+
+import contextvars
+import logging
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 15
+DEFAULT_STALE_DAYS = 7
+
+# Baris agregat untuk nilai proses yang sudah dipensiunkan
+RETIRED_PROCESS = 'retired'
+RETIRE_LOCK_KEY = 'dashboard:metrics-retire'
+RETIRE_INTERVAL = 60 * 60
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+GAUGE = 'gauge'
+
+# Batas atas bucket histogram (detik / jumlah query)
+YOUTUBE_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CYCLE_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600)
+VIEW_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+SQL_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Metrik yang dicatat proses: nama -> (tipe, keterangan, bucket histogram)
+METRICS = {
+    'cctv_youtube_request_duration_seconds': (
+        HISTOGRAM, 'Latency request ke YouTube per endpoint (per percobaan)', YOUTUBE_LATENCY_BUCKETS,
+    ),
+    'cctv_youtube_request_failures_total': (
+        COUNTER, 'Request YouTube yang tetap gagal setelah semua retry', None,
+    ),
+    'cctv_youtube_quota_units_total': (
+        COUNTER, 'Unit kuota YouTube Data API yang dipakai per endpoint', None,
+    ),
+    'cctv_checker_cycle_duration_seconds': (
+        HISTOGRAM, 'Durasi satu run/siklus check_cctv_status', CYCLE_DURATION_BUCKETS,
+    ),
+    'cctv_checker_checked_total': (
+        COUNTER, 'CCTV yang selesai dicek oleh check_cctv_status', None,
+    ),
+    'cctv_discovery_total': (
+        COUNTER, 'Hasil auto-discovery per CCTV offline (hit, miss, error)', None,
+    ),
+    'cctv_http_request_duration_seconds': (
+        HISTOGRAM, 'Latency request HTTP per view', VIEW_LATENCY_BUCKETS,
+    ),
+    'cctv_http_request_queries': (
+        HISTOGRAM, 'Jumlah query SQL per request HTTP per view', SQL_QUERY_BUCKETS,
+    ),
+}
+
+# Gauge yang dihitung dari database saat scrape: nama -> keterangan
+GAUGES = {
+    'cctv_cameras': 'Jumlah CCTV per kecamatan dan status (online/offline)',
+    'cctv_youtube_quota_used_today': 'Unit kuota terpakai hari ini (tanggal Pacific) per endpoint',
+    'cctv_youtube_quota_available': 'Token kuota yang boleh dipakai saat ini',
+}
+
+_lock = threading.Lock()
+# (nama, label) -> [nilai/sum, jumlah observasi, list bucket (non-kumulatif, terakhir = +Inf)]
+_series = {}
+_dirty = set()
+_last_flush = time.monotonic()
+# Nilai yang terakhir berhasil ditulis ke MetricSeries dan kapan, serta nilai
+# yang sudah dipindahkan ke baris 'retired' (dikurangkan saat menulis)
+_written = {}
+_last_written_at = None
+_baseline = {}
+
+# Penghitung query SQL untuk request yang sedang diproses (lihat count_queries)
+_query_counter = contextvars.ContextVar('metrics_query_counter', default=None)
+
+
+def process_id() -> str:
+    """ID proses untuk baris MetricSeries (host:pid, dihitung ulang setelah fork)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _label_string(labels: dict) -> str:
+    """Label dalam format exposition, diurutkan agar seri yang sama selalu sama"""
+    parts = []
+    for key in sorted(labels):
+        value = str(labels[key]).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return ','.join(parts)
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Tambah counter"""
+    key = (name, _label_string(labels))
+    with _lock:
+        series = _series.setdefault(key, [0.0, 0, []])
+        series[0] += amount
+        _dirty.add(key)
+
+
+def observe(name: str, value: float, **labels):
+    """Catat satu observasi histogram"""
+    buckets = METRICS[name][2]
+    key = (name, _label_string(labels))
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = [0.0, 0, [0] * (len(buckets) + 1)]
+        series[0] += value
+        series[1] += 1
+        series[2][bisect_left(buckets, value)] += 1
+        _dirty.add(key)
+
+
+def flush_due() -> bool:
+    """True jika ada perubahan dan sudah lewat METRICS_FLUSH_INTERVAL sejak flush terakhir"""
+    interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+    return bool(_dirty) and time.monotonic() - _last_flush >= interval
+
+
+def _stale_days() -> int:
+    return getattr(settings, 'METRICS_STALE_DAYS', DEFAULT_STALE_DAYS)
+
+
+def _subtract(current: tuple, base) -> tuple:
+    if base is None:
+        return current
+    value, count, buckets = current
+    return value - base[0], count - base[1], [a - b for a, b in zip(buckets, base[2])] if base[2] else buckets
+
+
+def _rebase_if_retired(process: str, now):
+    """
+    Jika baris proses ini sudah dipensiunkan (lama tidak menulis), nilai yang
+    terakhir ditulis sudah masuk baris 'retired': jadikan baseline dan tulis
+    ulang semua seri sebagai selisih, agar tidak terhitung dua kali.
+    """
+    global _baseline
+    if _last_written_at is None or now - _last_written_at < timedelta(days=_stale_days()):
+        return
+    from .models import MetricSeries
+
+    if MetricSeries.objects.filter(process=process).exists():
+        return
+    with _lock:
+        _baseline = dict(_written)
+        _dirty.update(_series)
+
+
+def flush():
+    """Salin nilai kumulatif seri yang berubah ke MetricSeries (satu query upsert)"""
+    from .models import MetricSeries
+
+    global _last_flush, _last_written_at
+    process = process_id()
+    now = timezone.now()
+    _rebase_if_retired(process, now)
+
+    with _lock:
+        _last_flush = time.monotonic()
+        if not _dirty:
+            return
+        snapshot = {key: (_series[key][0], _series[key][1], list(_series[key][2])) for key in _dirty}
+        _dirty.clear()
+
+    rows = []
+    for (name, labels), current in snapshot.items():
+        value, count, buckets = _subtract(current, _baseline.get((name, labels)))
+        rows.append(MetricSeries(process=process, name=name, labels=labels, value=value,
+                                 count=count, buckets=buckets, updated_at=now))
+    # MySQL tidak menerima unique_fields (ON DUPLICATE KEY memakai semua unique index)
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ['process', 'name', 'labels']
+    try:
+        MetricSeries.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['value', 'count', 'buckets', 'updated_at'],
+        )
+    except Exception as e:
+        # Ditulis ulang pada flush berikutnya
+        logger.error(f"Metrics flush error: {str(e)}")
+        with _lock:
+            _dirty.update(snapshot)
+        return
+    _written.update(snapshot)
+    _last_written_at = now
+
+
+def retire_stale_processes(now=None) -> int:
+    """
+    Pindahkan nilai proses yang tidak menulis selama METRICS_STALE_DAYS ke baris
+    agregat 'retired', lalu hapus baris prosesnya.
+
+    Returns:
+        int: Jumlah proses yang dipensiunkan
+    """
+    from .models import MetricSeries
+
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=_stale_days())
+    with transaction.atomic():
+        stale = list(
+            MetricSeries.objects.exclude(process=RETIRED_PROCESS)
+            .order_by().values('process').annotate(last=Max('updated_at')).filter(last__lt=cutoff)
+            .values_list('process', flat=True)
+        )
+        if not stale:
+            return 0
+
+        rows = list(MetricSeries.objects.select_for_update().filter(process__in=stale))
+        keys = {(row.name, row.labels) for row in rows}
+        retired = {
+            (row.name, row.labels): row
+            for row in MetricSeries.objects.select_for_update().filter(process=RETIRED_PROCESS)
+            if (row.name, row.labels) in keys
+        }
+        for row in rows:
+            total = retired.get((row.name, row.labels))
+            if total is None:
+                total = retired[(row.name, row.labels)] = MetricSeries(
+                    process=RETIRED_PROCESS, name=row.name, labels=row.labels, value=0, count=0,
+                    buckets=[0] * len(row.buckets), updated_at=now,
+                )
+            if len(total.buckets) != len(row.buckets):
+                # Bucket dengan batas berbeda tidak bisa dijumlahkan (juga dilewati saat scrape)
+                continue
+            total.value += row.value
+            total.count += row.count
+            total.buckets = [a + b for a, b in zip(total.buckets, row.buckets)]
+            total.updated_at = now
+
+        for total in retired.values():
+            total.save()
+        MetricSeries.objects.filter(pk__in=[row.pk for row in rows]).delete()
+
+    logger.info(f"Metrics: {len(stale)} stale processes retired")
+    return len(stale)
+
+
+def flush_if_due():
+    if flush_due():
+        flush()
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper: hitung query SQL milik request yang sedang diukur"""
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def start_request():
+    """Mulai menghitung query untuk request ini; kembalikan state untuk finish_request"""
+    counter = [0]
+    return _query_counter.set(counter), counter, time.perf_counter()
+
+
+def finish_request(request, state):
+    """Catat latency dan jumlah query request per view"""
+    token, counter, started = state
+    elapsed = time.perf_counter() - started
+    _query_counter.reset(token)
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unresolved'
+    observe('cctv_http_request_duration_seconds', elapsed, view=view)
+    observe('cctv_http_request_queries', counter[0], view=view)
+
+
+def _collect_shared() -> dict:
+    """Jumlahkan seri semua proses dari MetricSeries: {(nama, label): [nilai, count, bucket]}"""
+    from .models import MetricSeries
+
+    if cache.add(RETIRE_LOCK_KEY, process_id(), timeout=RETIRE_INTERVAL):
+        retire_stale_processes()
+
+    totals = {}
+    rows = MetricSeries.objects.filter(name__in=METRICS).values_list('name', 'labels', 'value', 'count', 'buckets')
+    for name, labels, value, count, buckets in rows.iterator():
+        expected = METRICS[name][2]
+        if expected is not None and len(buckets) != len(expected) + 1:
+            # Bucket dari versi lama dengan batas berbeda tidak bisa dijumlahkan
+            continue
+        total = totals.setdefault((name, labels), [0.0, 0, [0] * len(buckets)])
+        total[0] += value
+        total[1] += count
+        total[2] = [a + b for a, b in zip(total[2], buckets)]
+    return totals
+
+
+def _collect_gauges() -> dict:
+    """Gauge dari database: {nama: [(label, nilai), ...]}"""
+    from . import quota
+    from .models import CCTV
+
+    cameras = []
+    rows = CCTV.objects.values('kecamatan__nama', 'is_active').annotate(total=Count('id')).order_by('kecamatan__nama')
+    for row in rows:
+        cameras.append((
+            _label_string({
+                'kecamatan': row['kecamatan__nama'] or '',
+                'status': 'online' if row['is_active'] else 'offline',
+            }),
+            row['total'],
+        ))
+
+    usage = quota.get_quota_status()
+    used = [
+        (_label_string({'endpoint': endpoint}), row['units'])
+        for endpoint, row in sorted(usage['endpoints'].items())
+    ]
+    return {
+        'cctv_cameras': cameras,
+        'cctv_youtube_quota_used_today': used,
+        'cctv_youtube_quota_available': [('', usage['available'])],
+    }
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _sample(name: str, labels: str, value, extra: str = '') -> str:
+    labels = ','.join(part for part in (labels, extra) if part)
+    return f'{name}{{{labels}}} {_format_value(value)}' if labels else f'{name} {_format_value(value)}'
+
+
+def render() -> str:
+    """Seluruh metrik (semua proses + gauge database) dalam format teks Prometheus"""
+    flush()
+    shared = _collect_shared()
+    lines = []
+
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, total) for (metric, labels), total in shared.items() if metric == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, (value, count, counts) in series:
+            if kind == HISTOGRAM:
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(_sample(f'{name}_bucket', labels, cumulative, f'le="{_format_value(float(bound))}"'))
+                lines.append(_sample(f'{name}_bucket', labels, count, 'le="+Inf"'))
+                lines.append(_sample(f'{name}_sum', labels, value))
+                lines.append(_sample(f'{name}_count', labels, count))
+            else:
+                lines.append(_sample(name, labels, value))
+
+    for name, samples in _collect_gauges().items():
+        lines.append(f'# HELP {name} {GAUGES[name]}')
+        lines.append(f'# TYPE {name} {GAUGE}')
+        for labels, value in samples:
+            lines.append(_sample(name, labels, value))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,47 @@
+"""
+Middleware untuk Dashboard CCTV
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Catat latency dan jumlah query SQL setiap request per view (lihat dashboard.metrics).
+    
+    Mendukung view sync maupun async; di mode async query dihitung lewat
+    contextvar yang ikut terbawa ke thread sync_to_async. Metrik proses
+    disalin ke MetricSeries paling sering setiap METRICS_FLUSH_INTERVAL detik.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(request, state)
+        metrics.flush_if_due()
+        return response
+    
+    async def __acall__(self, request):
+        state = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(request, state)
+        if metrics.flush_due():
+            await sync_to_async(metrics.flush)()
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_cctv_search_keyword_cctv_youtube_channel_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusCheckJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Menunggu'), ('running', 'Diproses'), ('done', 'Selesai'), ('failed', 'Gagal')], db_index=True, default='pending', max_length=20, verbose_name='Status Job')),
+                ('cctv_ids', models.JSONField(blank=True, help_text='Daftar ID CCTV yang dicek (kosong = semua CCTV)', null=True, verbose_name='ID CCTV')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total CCTV')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='Selesai Dicek')),
+                ('results', models.JSONField(blank=True, default=list, help_text='Hasil pengecekan per CCTV (terisi bertahap selama job berjalan)', verbose_name='Hasil')),
+                ('error', models.TextField(blank=True, help_text='Pesan error jika job gagal', null=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat Pada')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Mulai Diproses')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Selesai Pada')),
+            ],
+            options={
+                'verbose_name': 'Job Pengecekan Status',
+                'verbose_name_plural': 'Job Pengecekan Status',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_statuscheckjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Tanggal kuota, mengikuti reset harian YouTube (America/Los_Angeles)', verbose_name='Tanggal (Pacific)')),
+                ('endpoint', models.CharField(max_length=50, verbose_name='Endpoint')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Unit Terpakai')),
+                ('calls', models.PositiveIntegerField(default=0, verbose_name='Jumlah Request')),
+                ('denied', models.PositiveIntegerField(default=0, help_text='Jumlah request yang ditahan karena budget kuota menipis', verbose_name='Request Ditunda')),
+            ],
+            options={
+                'verbose_name': 'Pemakaian Kuota',
+                'verbose_name_plural': 'Pemakaian Kuota',
+                'ordering': ['-date', 'endpoint'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'endpoint'), name='unique_quota_usage_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_quotausage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CCTVTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cctv_id', models.BigIntegerField(verbose_name='ID CCTV')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Dihapus Pada')),
+            ],
+            options={
+                'verbose_name': 'CCTV Terhapus',
+                'verbose_name_plural': 'CCTV Terhapus',
+                'ordering': ['-deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cctv',
+            index=models.Index(fields=['updated_at'], name='cctv_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cctv',
+            index=models.Index(fields=['last_status_check'], name='cctv_last_status_check_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_cctv_sync_indexes_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cctv_id', models.BigIntegerField(verbose_name='ID CCTV')),
+                ('is_active', models.BooleanField(verbose_name='Status')),
+                ('youtube_video_id', models.CharField(max_length=50, verbose_name='YouTube Video ID')),
+                ('checked_at', models.DateTimeField(blank=True, null=True, verbose_name='Waktu Pengecekan')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Dicatat Pada')),
+            ],
+            options={
+                'verbose_name': 'Event Perubahan Status',
+                'verbose_name_plural': 'Event Perubahan Status',
+                'ordering': ['id'],
+            },
+        ),
+    ]
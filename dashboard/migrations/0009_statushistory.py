@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_statuschangeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_at', models.DateTimeField(verbose_name='Waktu Pengecekan')),
+                ('is_active', models.BooleanField(choices=[(True, 'Aktif'), (False, 'Tidak Aktif')], verbose_name='Status')),
+                ('is_transition', models.BooleanField(default=False, help_text='True jika status berubah pada pengecekan ini, False untuk heartbeat', verbose_name='Transisi')),
+                ('error', models.CharField(blank=True, max_length=255, null=True, verbose_name='Error Pengecekan')),
+                ('cctv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='dashboard.cctv', verbose_name='CCTV')),
+            ],
+            options={
+                'verbose_name': 'Riwayat Status',
+                'verbose_name_plural': 'Riwayat Status',
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['cctv', 'checked_at'], name='status_history_cctv_time_idx'), models.Index(fields=['checked_at'], name='status_history_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatusHistoryHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Jam (UTC)')),
+                ('observed_seconds', models.PositiveIntegerField(default=0, verbose_name='Detik Terpantau')),
+                ('online_seconds', models.PositiveIntegerField(default=0, verbose_name='Detik Online')),
+                ('transitions', models.PositiveIntegerField(default=0, verbose_name='Jumlah Transisi')),
+                ('cctv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history_hourly', to='dashboard.cctv', verbose_name='CCTV')),
+            ],
+            options={
+                'verbose_name': 'Riwayat Status per Jam',
+                'verbose_name_plural': 'Riwayat Status per Jam',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='status_hourly_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cctv', 'hour'), name='unique_status_history_hourly')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_statushistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UptimeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Per Jam'), ('day', 'Per Hari')], max_length=10, verbose_name='Periode')),
+                ('period_start', models.DateTimeField(verbose_name='Awal Periode')),
+                ('observed_seconds', models.PositiveIntegerField(default=0, verbose_name='Detik Terpantau')),
+                ('online_seconds', models.PositiveIntegerField(default=0, verbose_name='Detik Online')),
+                ('checks', models.PositiveIntegerField(default=0, verbose_name='Jumlah Pengecekan')),
+                ('errors', models.JSONField(blank=True, default=dict, help_text='Jumlah pengecekan gagal per kategori error', verbose_name='Rincian Error')),
+                ('cctv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uptime_rollups', to='dashboard.cctv', verbose_name='CCTV')),
+            ],
+            options={
+                'verbose_name': 'Rekap Uptime',
+                'verbose_name_plural': 'Rekap Uptime',
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['period', 'period_start'], name='uptime_period_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cctv', 'period', 'period_start'), name='unique_uptime_rollup')],
+            },
+        ),
+    ]
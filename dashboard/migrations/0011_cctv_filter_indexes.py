@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_uptimerollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cctv',
+            index=models.Index(fields=['kecamatan', 'nama_lokasi'], name='cctv_kecamatan_nama_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cctv',
+            index=models.Index(fields=['is_active', 'kecamatan'], name='cctv_active_kecamatan_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_cctv_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckSchedule',
+            fields=[
+                ('cctv', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='check_schedule', serialize=False, to='dashboard.cctv', verbose_name='CCTV')),
+                ('next_check_at', models.DateTimeField(db_index=True, verbose_name='Cek Berikutnya')),
+                ('interval', models.PositiveIntegerField(help_text='Mengecil saat status berubah/flapping, membesar (backoff) saat stabil', verbose_name='Interval (detik)')),
+                ('flap_score', models.FloatField(default=0, help_text='Jumlah perubahan status terkini (meluruh setiap pengecekan)', verbose_name='Skor Flapping')),
+            ],
+            options={
+                'verbose_name': 'Jadwal Pengecekan',
+                'verbose_name_plural': 'Jadwal Pengecekan',
+                'ordering': ['next_check_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_checkschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckerWorker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.CharField(max_length=100, unique=True, verbose_name='ID Worker')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Mulai')),
+                ('last_seen', models.DateTimeField(db_index=True, verbose_name='Terakhir Aktif')),
+                ('cycles', models.PositiveIntegerField(default=0, verbose_name='Jumlah Siklus')),
+                ('checked', models.PositiveIntegerField(default=0, verbose_name='CCTV Dicek')),
+                ('changed', models.PositiveIntegerField(default=0, verbose_name='Status Berubah')),
+                ('busy_seconds', models.FloatField(default=0, help_text='Total waktu memproses batch (tanpa waktu tidur antar siklus)', verbose_name='Detik Sibuk')),
+            ],
+            options={
+                'verbose_name': 'Worker Checker',
+                'verbose_name_plural': 'Worker Checker',
+                'ordering': ['-last_seen'],
+            },
+        ),
+        migrations.AddField(
+            model_name='checkschedule',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='Setelah waktu ini CCTV boleh diambil worker lain (worker mati/macet)', null=True, verbose_name='Lease Berakhir'),
+        ),
+        migrations.AddField(
+            model_name='checkschedule',
+            name='leased_by',
+            field=models.CharField(blank=True, default='', help_text='ID worker checker yang sedang memproses CCTV ini', max_length=100, verbose_name='Di-lease oleh'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_checker_leases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('process', models.CharField(help_text='host:pid proses yang mencatat metrik', max_length=100, verbose_name='Proses')),
+                ('name', models.CharField(max_length=100, verbose_name='Metrik')),
+                ('labels', models.CharField(blank=True, default='', max_length=255, verbose_name='Label')),
+                ('value', models.FloatField(default=0, help_text='Nilai counter, atau jumlah (sum) observasi histogram', verbose_name='Nilai')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='Jumlah Observasi')),
+                ('buckets', models.JSONField(blank=True, default=list, help_text='Jumlah observasi per bucket histogram (tidak kumulatif, terakhir = +Inf)', verbose_name='Bucket')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Terakhir Ditulis')),
+            ],
+            options={
+                'verbose_name': 'Seri Metrik',
+                'verbose_name_plural': 'Seri Metrik',
+                'ordering': ['name', 'labels', 'process'],
+                'constraints': [models.UniqueConstraint(fields=('process', 'name', 'labels'), name='unique_metric_series_per_process')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_metric_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statuscheckjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Jumlah Percobaan'),
+        ),
+        migrations.AddField(
+            model_name='statuscheckjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Diperbarui worker setiap chunk; job running tanpa heartbeat dianggap ditinggal worker', null=True, verbose_name='Heartbeat Terakhir'),
+        ),
+        migrations.AddField(
+            model_name='statuscheckjob',
+            name='online',
+            field=models.PositiveIntegerField(default=0, verbose_name='Online'),
+        ),
+        migrations.AlterField(
+            model_name='statuscheckjob',
+            name='results',
+            field=models.JSONField(blank=True, default=list, help_text='Hasil pengecekan per CCTV (ditulis sekali setelah job selesai)', verbose_name='Hasil'),
+        ),
+    ]
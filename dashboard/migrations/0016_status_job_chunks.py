@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_status_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='statuscheckjob',
+            name='results',
+        ),
+        migrations.CreateModel(
+            name='StatusCheckJobChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt', models.PositiveSmallIntegerField(help_text='Percobaan job yang menulis chunk ini; hasil percobaan lama diabaikan', verbose_name='Percobaan')),
+                ('offset', models.PositiveIntegerField(verbose_name='Posisi Awal')),
+                ('results', models.JSONField(default=list, help_text='Hasil pengecekan per CCTV dalam chunk ini', verbose_name='Hasil')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='dashboard.statuscheckjob', verbose_name='Job')),
+            ],
+            options={
+                'verbose_name': 'Hasil Chunk Job',
+                'verbose_name_plural': 'Hasil Chunk Job',
+                'ordering': ['job', 'attempt', 'offset'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'attempt', 'offset'), name='unique_status_job_chunk')],
+            },
+        ),
+    ]
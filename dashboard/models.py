@@ -116,6 +116,14 @@ class CCTV(models.Model):
         verbose_name = 'CCTV'
         verbose_name_plural = 'CCTV'
         ordering = ['kecamatan', 'nama_lokasi']
+        indexes = [
+            # Dipakai sinkronisasi delta (?since=) di API CCTV
+            models.Index(fields=['updated_at'], name='cctv_updated_at_idx'),
+            models.Index(fields=['last_status_check'], name='cctv_last_status_check_idx'),
+            # Filter kecamatan/is_active di admin dan dashboard, urut nama lokasi
+            models.Index(fields=['kecamatan', 'nama_lokasi'], name='cctv_kecamatan_nama_idx'),
+            models.Index(fields=['is_active', 'kecamatan'], name='cctv_active_kecamatan_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nama_lokasi} ({self.kecamatan.nama})"
@@ -132,14 +140,558 @@ class CCTV(models.Model):
     
     def update_status_from_youtube(self):
         """Update status CCTV berdasarkan ketersediaan video YouTube"""
-        from django.utils import timezone
         from .utils import check_youtube_video_status
         
         is_online, error_msg = check_youtube_video_status(self.youtube_video_id)
+        return self.apply_status_check(is_online, error_msg)
+    
+    async def aupdate_status_from_youtube(self):
+        """Versi async update_status_from_youtube (untuk view async / ASGI)"""
+        from asgiref.sync import sync_to_async
+        from .utils import check_youtube_video_status_async
         
+        is_online, error_msg = await check_youtube_video_status_async(self.youtube_video_id)
+        return await sync_to_async(self.apply_status_check)(is_online, error_msg)
+    
+    def apply_status_check(self, is_online, error_msg):
+        """Simpan hasil pengecekan status (dan event perubahan status jika berubah)"""
+        from django.db import transaction
+        from django.utils import timezone
+        from .events import record_status_changes
+        from .quota import QUOTA_DEFERRED_MESSAGE
+        
+        # Pengecekan ditunda karena budget kuota: status lama dipertahankan
+        if error_msg == QUOTA_DEFERRED_MESSAGE:
+            return self.is_active, error_msg
+        
+        status_changed = self.is_active != is_online
         self.is_active = is_online
         self.last_status_check = timezone.now()
         self.status_check_error = error_msg if error_msg else None
-        self.save()
+        with transaction.atomic():
+            self.save()
+            if status_changed:
+                record_status_changes([self])
         
         return is_online, error_msg
+
+
+class StatusCheckJob(models.Model):
+    """Model antrian job pengecekan status CCTV (diproses oleh command run_status_jobs)"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Menunggu'),
+        (STATUS_RUNNING, 'Diproses'),
+        (STATUS_DONE, 'Selesai'),
+        (STATUS_FAILED, 'Gagal'),
+    ]
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+        verbose_name='Status Job'
+    )
+    cctv_ids = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='ID CCTV',
+        help_text='Daftar ID CCTV yang dicek (kosong = semua CCTV)'
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Total CCTV'
+    )
+    done = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Selesai Dicek'
+    )
+    online = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Online'
+    )
+    error = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name='Error',
+        help_text='Pesan error jika job gagal'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Dibuat Pada'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Mulai Diproses'
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Heartbeat Terakhir',
+        help_text='Diperbarui worker setiap chunk; job running tanpa heartbeat dianggap ditinggal worker'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Jumlah Percobaan'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Selesai Pada'
+    )
+    
+    class Meta:
+        verbose_name = 'Job Pengecekan Status'
+        verbose_name_plural = 'Job Pengecekan Status'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Job #{self.pk} ({self.get_status_display()}, {self.done}/{self.total})"
+    
+    @classmethod
+    def enqueue(cls, cctv_ids=None):
+        """Buat job baru untuk CCTV tertentu (atau semua CCTV jika cctv_ids None)"""
+        if cctv_ids is None:
+            total = CCTV.objects.count()
+        else:
+            cctv_ids = sorted(set(int(pk) for pk in cctv_ids))
+            total = len(cctv_ids)
+        return cls.objects.create(cctv_ids=cctv_ids, total=total)
+    
+    @property
+    def is_finished(self):
+        """True jika job sudah selesai atau gagal"""
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+    
+    def collected_results(self) -> list:
+        """Hasil per CCTV yang sudah terkumpul pada percobaan terakhir, urut seperti diproses"""
+        results = []
+        for chunk in self.chunks.filter(attempt=self.attempts).order_by('offset'):
+            results.extend(chunk.results)
+        return results
+
+
+class StatusCheckJobChunk(models.Model):
+    """Hasil satu chunk job pengecekan status (ditulis setiap chunk selesai)"""
+    
+    job = models.ForeignKey(
+        StatusCheckJob,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name='Job'
+    )
+    attempt = models.PositiveSmallIntegerField(
+        verbose_name='Percobaan',
+        help_text='Percobaan job yang menulis chunk ini; hasil percobaan lama diabaikan'
+    )
+    offset = models.PositiveIntegerField(
+        verbose_name='Posisi Awal'
+    )
+    results = models.JSONField(
+        default=list,
+        verbose_name='Hasil',
+        help_text='Hasil pengecekan per CCTV dalam chunk ini'
+    )
+    
+    class Meta:
+        verbose_name = 'Hasil Chunk Job'
+        verbose_name_plural = 'Hasil Chunk Job'
+        ordering = ['job', 'attempt', 'offset']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'attempt', 'offset'], name='unique_status_job_chunk'),
+        ]
+    
+    def __str__(self):
+        return f"Job #{self.job_id} percobaan {self.attempt} mulai {self.offset}"
+
+
+class QuotaUsage(models.Model):
+    """Ledger pemakaian kuota YouTube Data API per hari (zona waktu Pacific) per endpoint"""
+    
+    date = models.DateField(
+        verbose_name='Tanggal (Pacific)',
+        help_text='Tanggal kuota, mengikuti reset harian YouTube (America/Los_Angeles)'
+    )
+    endpoint = models.CharField(
+        max_length=50,
+        verbose_name='Endpoint'
+    )
+    units = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Unit Terpakai'
+    )
+    calls = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Jumlah Request'
+    )
+    denied = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Request Ditunda',
+        help_text='Jumlah request yang ditahan karena budget kuota menipis'
+    )
+    
+    class Meta:
+        verbose_name = 'Pemakaian Kuota'
+        verbose_name_plural = 'Pemakaian Kuota'
+        ordering = ['-date', 'endpoint']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'endpoint'], name='unique_quota_usage_per_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.endpoint}: {self.units} unit"
+
+
+class CCTVTombstone(models.Model):
+    """Catatan CCTV yang dihapus, agar klien sinkronisasi delta ikut menghapusnya"""
+    
+    cctv_id = models.BigIntegerField(
+        verbose_name='ID CCTV'
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Dihapus Pada'
+    )
+    
+    class Meta:
+        verbose_name = 'CCTV Terhapus'
+        verbose_name_plural = 'CCTV Terhapus'
+        ordering = ['-deleted_at']
+    
+    def __str__(self):
+        return f"CCTV #{self.cctv_id} dihapus {self.deleted_at}"
+
+
+class StatusChangeEvent(models.Model):
+    """Log perubahan status CCTV, sumber event stream SSE dashboard"""
+    
+    cctv_id = models.BigIntegerField(
+        verbose_name='ID CCTV'
+    )
+    is_active = models.BooleanField(
+        verbose_name='Status'
+    )
+    youtube_video_id = models.CharField(
+        max_length=50,
+        verbose_name='YouTube Video ID'
+    )
+    checked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Waktu Pengecekan'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Dicatat Pada'
+    )
+    
+    class Meta:
+        verbose_name = 'Event Perubahan Status'
+        verbose_name_plural = 'Event Perubahan Status'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.pk} CCTV {self.cctv_id}: {'aktif' if self.is_active else 'tidak aktif'}"
+
+
+class StatusHistory(models.Model):
+    """Riwayat status CCTV (mentah): hanya transisi status dan heartbeat berkala"""
+    
+    cctv = models.ForeignKey(
+        CCTV,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name='CCTV'
+    )
+    checked_at = models.DateTimeField(
+        verbose_name='Waktu Pengecekan'
+    )
+    is_active = models.BooleanField(
+        choices=CCTV.STATUS_CHOICES,
+        verbose_name='Status'
+    )
+    is_transition = models.BooleanField(
+        default=False,
+        verbose_name='Transisi',
+        help_text='True jika status berubah pada pengecekan ini, False untuk heartbeat'
+    )
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        verbose_name='Error Pengecekan'
+    )
+    
+    class Meta:
+        verbose_name = 'Riwayat Status'
+        verbose_name_plural = 'Riwayat Status'
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['cctv', 'checked_at'], name='status_history_cctv_time_idx'),
+            models.Index(fields=['checked_at'], name='status_history_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.cctv_id} @ {self.checked_at}: {'aktif' if self.is_active else 'tidak aktif'}"
+
+
+class StatusHistoryHourly(models.Model):
+    """Riwayat status CCTV hasil downsampling per jam (dari StatusHistory yang sudah lewat masa simpan)"""
+    
+    cctv = models.ForeignKey(
+        CCTV,
+        on_delete=models.CASCADE,
+        related_name='status_history_hourly',
+        verbose_name='CCTV'
+    )
+    hour = models.DateTimeField(
+        verbose_name='Jam (UTC)'
+    )
+    observed_seconds = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Detik Terpantau'
+    )
+    online_seconds = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Detik Online'
+    )
+    transitions = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Jumlah Transisi'
+    )
+    
+    class Meta:
+        verbose_name = 'Riwayat Status per Jam'
+        verbose_name_plural = 'Riwayat Status per Jam'
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['cctv', 'hour'], name='unique_status_history_hourly'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='status_hourly_hour_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.cctv_id} @ {self.hour}: {self.online_seconds}/{self.observed_seconds}s"
+
+
+class UptimeRollup(models.Model):
+    """Rekap ketersediaan CCTV per jam / per hari, diperbarui inkremental setiap siklus pengecekan"""
+    
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+    
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Per Jam'),
+        (PERIOD_DAY, 'Per Hari'),
+    ]
+    
+    cctv = models.ForeignKey(
+        CCTV,
+        on_delete=models.CASCADE,
+        related_name='uptime_rollups',
+        verbose_name='CCTV'
+    )
+    period = models.CharField(
+        max_length=10,
+        choices=PERIOD_CHOICES,
+        verbose_name='Periode'
+    )
+    period_start = models.DateTimeField(
+        verbose_name='Awal Periode'
+    )
+    observed_seconds = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Detik Terpantau'
+    )
+    online_seconds = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Detik Online'
+    )
+    checks = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Jumlah Pengecekan'
+    )
+    errors = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Rincian Error',
+        help_text='Jumlah pengecekan gagal per kategori error'
+    )
+    
+    class Meta:
+        verbose_name = 'Rekap Uptime'
+        verbose_name_plural = 'Rekap Uptime'
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['cctv', 'period', 'period_start'], name='unique_uptime_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='uptime_period_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.cctv_id} {self.period} {self.period_start}: {self.online_seconds}/{self.observed_seconds}s"
+    
+    @property
+    def availability(self):
+        """Persentase online terhadap waktu terpantau (None jika belum ada data)"""
+        if not self.observed_seconds:
+            return None
+        return round(self.online_seconds * 100 / self.observed_seconds, 2)
+
+
+class CheckSchedule(models.Model):
+    """Jadwal pengecekan status adaptif per CCTV (antrian prioritas check_cctv_status --schedule)"""
+    
+    cctv = models.OneToOneField(
+        CCTV,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='check_schedule',
+        verbose_name='CCTV'
+    )
+    next_check_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='Cek Berikutnya'
+    )
+    interval = models.PositiveIntegerField(
+        verbose_name='Interval (detik)',
+        help_text='Mengecil saat status berubah/flapping, membesar (backoff) saat stabil'
+    )
+    flap_score = models.FloatField(
+        default=0,
+        verbose_name='Skor Flapping',
+        help_text='Jumlah perubahan status terkini (meluruh setiap pengecekan)'
+    )
+    leased_by = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Di-lease oleh',
+        help_text='ID worker checker yang sedang memproses CCTV ini'
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Lease Berakhir',
+        help_text='Setelah waktu ini CCTV boleh diambil worker lain (worker mati/macet)'
+    )
+    
+    class Meta:
+        verbose_name = 'Jadwal Pengecekan'
+        verbose_name_plural = 'Jadwal Pengecekan'
+        ordering = ['next_check_at']
+    
+    def __str__(self):
+        return f"{self.cctv_id} @ {self.next_check_at} (tiap {self.interval}s)"
+
+
+class CheckerWorker(models.Model):
+    """Worker penjadwal (check_cctv_status --schedule) beserta throughput kumulatifnya"""
+    
+    worker_id = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='ID Worker'
+    )
+    started_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Mulai'
+    )
+    last_seen = models.DateTimeField(
+        db_index=True,
+        verbose_name='Terakhir Aktif'
+    )
+    cycles = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Jumlah Siklus'
+    )
+    checked = models.PositiveIntegerField(
+        default=0,
+        verbose_name='CCTV Dicek'
+    )
+    changed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Status Berubah'
+    )
+    busy_seconds = models.FloatField(
+        default=0,
+        verbose_name='Detik Sibuk',
+        help_text='Total waktu memproses batch (tanpa waktu tidur antar siklus)'
+    )
+    
+    class Meta:
+        verbose_name = 'Worker Checker'
+        verbose_name_plural = 'Worker Checker'
+        ordering = ['-last_seen']
+    
+    def __str__(self):
+        return self.worker_id
+    
+    @property
+    def cameras_per_second(self):
+        """CCTV dicek per detik sibuk (None jika belum ada batch)"""
+        if not self.busy_seconds:
+            return None
+        return round(self.checked / self.busy_seconds, 1)
+
+
+class MetricSeries(models.Model):
+    """Nilai kumulatif satu seri metrik dari satu proses; /metrics menjumlahkan semua proses"""
+    
+    process = models.CharField(
+        max_length=100,
+        verbose_name='Proses',
+        help_text='host:pid proses yang mencatat metrik'
+    )
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Metrik'
+    )
+    labels = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Label'
+    )
+    value = models.FloatField(
+        default=0,
+        verbose_name='Nilai',
+        help_text='Nilai counter, atau jumlah (sum) observasi histogram'
+    )
+    count = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Jumlah Observasi'
+    )
+    buckets = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Bucket',
+        help_text='Jumlah observasi per bucket histogram (tidak kumulatif, terakhir = +Inf)'
+    )
+    updated_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='Terakhir Ditulis'
+    )
+    
+    class Meta:
+        verbose_name = 'Seri Metrik'
+        verbose_name_plural = 'Seri Metrik'
+        ordering = ['name', 'labels', 'process']
+        constraints = [
+            models.UniqueConstraint(fields=['process', 'name', 'labels'], name='unique_metric_series_per_process'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name}{{{self.labels}}} @ {self.process}"
@@ -0,0 +1,248 @@
+"""
+Governor budget kuota YouTube Data API
+
+Kuota YouTube dihitung per hari dan di-reset tengah malam waktu Pacific.
+Setiap request API dicatat di ledger QuotaUsage (per tanggal Pacific per
+endpoint), sehingga checker, endpoint refresh, worker job dan admin berbagi
+satu budget yang sama.
+
+Budget berbentuk token bucket yang terisi terus sepanjang hari Pacific:
+
+    token = QUOTA_BURST + (QUOTA_HARIAN / 86400) x detik_sejak_reset - terpakai
+
+dibatasi sisa kuota harian. Request prioritas rendah (search.list untuk
+auto-discovery, 100 unit) hanya diizinkan jika setelahnya token masih di atas
+YOUTUBE_QUOTA_DISCOVERY_RESERVE, sehingga discovery ditunda lebih dulu dan
+batch check videos.list (1 unit) tetap berjalan.
+
+Total unit per hari disimpan di baris ledger endpoint TOTAL_ENDPOINT. Izin
+diberikan dengan satu UPDATE bersyarat pada baris itu
+(units + biaya <= batas), jadi banyak proses (worker gunicorn, checker,
+run_status_jobs) tidak bisa bersama-sama melewati budget.
+"""
+
+import logging
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
+
+# Biaya unit per endpoint YouTube Data API v3
+ENDPOINT_COSTS = {
+    'videos': 1,
+    'search': 100,
+}
+
+PRIORITY_HIGH = 'high'
+PRIORITY_LOW = 'low'
+
+DEFAULT_DAILY_QUOTA = 10000
+DEFAULT_BURST = 3000
+DEFAULT_DISCOVERY_RESERVE = 1500
+
+QUOTA_DEFERRED_MESSAGE = 'Budget kuota API menipis, pengecekan ditunda'
+DISCOVERY_DEFERRED_MESSAGE = 'Discovery ditunda: sisa kuota dihemat untuk pengecekan status'
+
+EXHAUSTED_KEY = 'yt-quota-exhausted:'
+
+# Baris ledger berisi total unit semua endpoint per hari (dasar izin atomik)
+TOTAL_ENDPOINT = 'total'
+
+
+def quota_day(now: datetime = None):
+    """Tanggal kuota saat ini (zona waktu Pacific)"""
+    now = now or datetime.now(tz=PACIFIC_TZ)
+    return now.astimezone(PACIFIC_TZ).date()
+
+
+def _seconds_since_reset(now: datetime) -> float:
+    now = now.astimezone(PACIFIC_TZ)
+    midnight = datetime.combine(now.date(), dt_time.min, tzinfo=PACIFIC_TZ)
+    return (now - midnight).total_seconds()
+
+
+def _seconds_until_reset(now: datetime) -> int:
+    now = now.astimezone(PACIFIC_TZ)
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), dt_time.min, tzinfo=PACIFIC_TZ)
+    return max(1, int((next_midnight - now).total_seconds()))
+
+
+def daily_quota() -> int:
+    return getattr(settings, 'YOUTUBE_DAILY_QUOTA', DEFAULT_DAILY_QUOTA)
+
+
+def spent_today(day=None) -> int:
+    """Total unit yang sudah terpakai hari ini (semua endpoint)"""
+    from .models import QuotaUsage
+
+    day = day or quota_day()
+    total = QuotaUsage.objects.filter(date=day, endpoint=TOTAL_ENDPOINT).values_list('units', flat=True).first()
+    if total is not None:
+        return total
+    return QuotaUsage.objects.filter(date=day).aggregate(total=Sum('units'))['total'] or 0
+
+
+def _bucket_limit(now: datetime) -> int:
+    """Batas total unit terpakai yang diizinkan saat ini (token bucket, maks. kuota harian)"""
+    daily = daily_quota()
+    burst = getattr(settings, 'YOUTUBE_QUOTA_BURST', DEFAULT_BURST)
+    refill = daily / 86400.0 * _seconds_since_reset(now)
+    return int(min(daily, burst + refill))
+
+
+def available_tokens(now: datetime = None) -> int:
+    """Jumlah unit yang boleh dipakai saat ini menurut token bucket"""
+    now = now or datetime.now(tz=PACIFIC_TZ)
+    day = quota_day(now)
+
+    if cache.get(EXHAUSTED_KEY + day.isoformat()):
+        return 0
+
+    return max(0, _bucket_limit(now) - spent_today(day))
+
+
+def _ensure_total_row(day):
+    """Buat baris total hari ini (diisi jumlah ledger endpoint yang sudah ada)"""
+    from .models import QuotaUsage
+
+    if QuotaUsage.objects.filter(date=day, endpoint=TOTAL_ENDPOINT).exists():
+        return
+    spent = QuotaUsage.objects.filter(date=day).aggregate(total=Sum('units'))['total'] or 0
+    try:
+        with transaction.atomic():
+            QuotaUsage.objects.create(date=day, endpoint=TOTAL_ENDPOINT, units=spent)
+    except IntegrityError:
+        # Dibuat proses lain lebih dulu
+        pass
+
+
+def _claim_units(cost: int, required: int, now: datetime) -> bool:
+    """
+    Tambah total unit hari ini sebesar cost jika setelah ditambah required unit
+    masih dalam batas bucket. Satu UPDATE bersyarat: atomik lintas proses.
+    """
+    from .models import QuotaUsage
+
+    day = quota_day(now)
+    if cache.get(EXHAUSTED_KEY + day.isoformat()):
+        return False
+
+    claim = QuotaUsage.objects.filter(
+        date=day, endpoint=TOTAL_ENDPOINT, units__lte=_bucket_limit(now) - required,
+    )
+    if claim.update(units=F('units') + cost, calls=F('calls') + 1):
+        return True
+    _ensure_total_row(day)
+    return bool(claim.update(units=F('units') + cost, calls=F('calls') + 1))
+
+
+def try_consume(endpoint: str, priority: str = PRIORITY_HIGH) -> bool:
+    """
+    Minta izin untuk satu request ke endpoint dan catat pemakaiannya.
+
+    Returns:
+        bool: True jika request boleh dijalankan (unit sudah dicatat),
+              False jika ditunda karena budget tidak cukup
+    """
+    cost = ENDPOINT_COSTS.get(endpoint, 0)
+    if cost == 0:
+        return True
+
+    required = cost
+    if priority == PRIORITY_LOW:
+        required += getattr(settings, 'YOUTUBE_QUOTA_DISCOVERY_RESERVE', DEFAULT_DISCOVERY_RESERVE)
+
+    if not _claim_units(cost, required, datetime.now(tz=PACIFIC_TZ)):
+        logger.warning(f"Quota: {endpoint} request deferred ({available_tokens()} token tersisa, butuh {required})")
+        _record(endpoint, units=0, calls=0, denied=1)
+        return False
+
+    _record(endpoint, units=cost, calls=1)
+    metrics.inc('cctv_youtube_quota_units_total', cost, endpoint=endpoint)
+    return True
+
+
+def charge_retry(endpoint: str):
+    """
+    Catat unit untuk retry yang sampai ke API (respons 5xx atau read timeout).
+
+    Izin try_consume hanya mencakup percobaan pertama, padahal setiap request
+    yang diterima API ikut memakai kuota. Retry tidak bisa dibatalkan lagi,
+    jadi unitnya dicatat tanpa cek budget.
+    """
+    from .models import QuotaUsage
+
+    cost = ENDPOINT_COSTS.get(endpoint, 0)
+    if cost == 0:
+        return
+
+    day = quota_day()
+    _record(endpoint, units=cost, calls=1)
+    try:
+        total = QuotaUsage.objects.filter(date=day, endpoint=TOTAL_ENDPOINT)
+        if not total.update(units=F('units') + cost, calls=F('calls') + 1):
+            # Baris total dibuat dari ledger endpoint yang sudah berisi retry ini
+            _ensure_total_row(day)
+    except Exception as e:
+        logger.error(f"Quota ledger write error: {str(e)}")
+    metrics.inc('cctv_youtube_quota_units_total', cost, endpoint=endpoint)
+
+
+def mark_exhausted():
+    """Tandai kuota habis sampai reset Pacific berikutnya (dipanggil saat API membalas 403 quotaExceeded)"""
+    now = datetime.now(tz=PACIFIC_TZ)
+    cache.set(EXHAUSTED_KEY + quota_day(now).isoformat(), True, timeout=_seconds_until_reset(now))
+    logger.error("Quota: kuota YouTube habis, semua request ditunda sampai reset harian (Pacific)")
+
+
+def _record(endpoint: str, units: int, calls: int, denied: int = 0):
+    """Tambah counter ledger secara atomik (aman dipakai banyak proses)"""
+    from .models import QuotaUsage
+
+    day = quota_day()
+    increments = {
+        'units': F('units') + units,
+        'calls': F('calls') + calls,
+        'denied': F('denied') + denied,
+    }
+    try:
+        updated = QuotaUsage.objects.filter(date=day, endpoint=endpoint).update(**increments)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    QuotaUsage.objects.create(date=day, endpoint=endpoint, units=units, calls=calls, denied=denied)
+            except IntegrityError:
+                # Baris dibuat proses lain di antara UPDATE dan INSERT
+                QuotaUsage.objects.filter(date=day, endpoint=endpoint).update(**increments)
+    except Exception as e:
+        logger.error(f"Quota ledger write error: {str(e)}")
+
+
+def get_quota_status() -> dict:
+    """Ringkasan kuota hari ini untuk laporan checker / API"""
+    from .models import QuotaUsage
+
+    day = quota_day()
+    usage = {
+        row['endpoint']: row
+        for row in QuotaUsage.objects.filter(date=day).exclude(endpoint=TOTAL_ENDPOINT)
+        .values('endpoint', 'units', 'calls', 'denied')
+    }
+    spent = spent_today(day)
+    return {
+        'date': day.isoformat(),
+        'daily_quota': daily_quota(),
+        'spent': spent,
+        'remaining': max(0, daily_quota() - spent),
+        'available': available_tokens(),
+        'endpoints': usage,
+    }
@@ -0,0 +1,383 @@
+"""
+Penjadwal pengecekan status adaptif per CCTV
+
+Setiap CCTV punya waktu cek berikutnya (CheckSchedule.next_check_at, ter-indeks)
+sehingga tabel jadwal berfungsi sebagai antrian prioritas bersama: satu siklus
+mengambil CCTV yang sudah jatuh tempo, paling terlambat lebih dulu.
+
+Interval per CCTV:
+- status berubah / flapping (skor perubahan terkini >= FLAP_THRESHOLD): interval minimum
+- stabil: interval dikali BACKOFF_FACTOR setiap pengecekan, hingga interval maksimum
+- jitter acak +/- SCHEDULER_JITTER agar pengecekan tidak menumpuk di detik yang sama
+
+Satu siklus berhenti mengambil batch baru jika sisa waktu sebelum deadline
+lebih pendek dari batch terlama sejauh ini, sehingga siklus tidak melewati
+slotnya; CCTV yang belum sempat dicek tetap jatuh tempo dan didahulukan di
+siklus berikutnya.
+
+Beberapa worker penjadwal (satu host atau lebih) berbagi antrian yang sama:
+setiap batch diklaim dengan lease (leased_by + lease_expires_at) lewat
+SELECT ... FOR UPDATE SKIP LOCKED jika database mendukung, atau UPDATE
+bersyarat (SQLite). Lease dilepas saat jadwal berikutnya disimpan; lease
+worker yang mati kedaluwarsa sendiri sehingga CCTV-nya diambil worker lain.
+Hasil cek, jadwal berikutnya dan pelepasan lease hanya disimpan untuk baris
+yang lease-nya masih sama dengan saat diklaim, jadi worker lambat yang
+lease-nya sudah kedaluwarsa tidak menimpa status maupun jadwal milik worker
+yang mengambil alih.
+Run penuh check_cctv_status (sekali jalan/cron atau --loop) memegang lock di
+cache bersama; selama lock itu ada, siklus penjadwal dilewati dan siklus yang
+sedang berjalan berhenti mengklaim batch baru.
+"""
+
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .checker import STATUS_FIELDS
+from .models import CCTV, CheckSchedule, CheckerWorker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_INTERVAL = 300
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+DEFAULT_JITTER = 0.1
+
+# Pertumbuhan interval per pengecekan stabil
+BACKOFF_FACTOR = 1.5
+
+# Skor flapping: +1 setiap perubahan status, dikali FLAP_DECAY setiap pengecekan
+FLAP_DECAY = 0.8
+FLAP_THRESHOLD = 1.0
+
+# Jumlah CCTV per batch (sama dengan batas ID per request videos.list)
+BATCH_SIZE = 50
+
+# Bagian slot siklus yang boleh dipakai untuk pengecekan, sisanya cadangan
+DEADLINE_FRACTION = 0.8
+
+CHECK_LOCK_KEY = 'dashboard:status-check-lock'
+DEFAULT_LOCK_TIMEOUT = 30 * 60
+
+# Lama lease satu batch (detik); harus lebih lama dari waktu proses satu batch
+DEFAULT_LEASE_SECONDS = 300
+
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def base_interval() -> int:
+    return getattr(settings, 'SCHEDULER_BASE_INTERVAL', DEFAULT_BASE_INTERVAL)
+
+
+def min_interval() -> int:
+    return getattr(settings, 'SCHEDULER_MIN_INTERVAL', DEFAULT_MIN_INTERVAL)
+
+
+def max_interval() -> int:
+    return getattr(settings, 'SCHEDULER_MAX_INTERVAL', DEFAULT_MAX_INTERVAL)
+
+
+def next_interval(interval: int, flap_score: float, changed: bool) -> tuple:
+    """
+    Interval dan skor flapping baru setelah satu pengecekan.
+
+    Returns:
+        tuple: (interval_detik, flap_score)
+    """
+    flap_score = flap_score * FLAP_DECAY + (1 if changed else 0)
+    if flap_score >= FLAP_THRESHOLD:
+        return min_interval(), flap_score
+    grown = int(interval * BACKOFF_FACTOR)
+    return max(min_interval(), min(max_interval(), grown)), flap_score
+
+
+def with_jitter(seconds: float, rng=random) -> float:
+    """Tambahkan jitter acak +/- SCHEDULER_JITTER (fraksi) ke durasi"""
+    jitter = getattr(settings, 'SCHEDULER_JITTER', DEFAULT_JITTER)
+    return seconds * (1 + rng.uniform(-jitter, jitter))
+
+
+def ensure_schedules(now=None) -> int:
+    """Buat jadwal (langsung jatuh tempo) untuk CCTV yang belum punya; mengembalikan jumlahnya"""
+    now = now or timezone.now()
+    missing = CCTV.objects.filter(check_schedule__isnull=True).values_list('pk', flat=True)
+    schedules = [
+        CheckSchedule(cctv_id=pk, next_check_at=now, interval=base_interval())
+        for pk in missing
+    ]
+    CheckSchedule.objects.bulk_create(schedules, batch_size=BULK_UPDATE_BATCH_SIZE, ignore_conflicts=True)
+    return len(schedules)
+
+
+def default_worker_id() -> str:
+    """ID worker unik per proses: host:pid"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def lease_seconds() -> int:
+    return getattr(settings, 'CHECKER_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+
+
+def _claimable(now) -> Q:
+    """Jadwal jatuh tempo yang tidak sedang di-lease (atau lease-nya sudah kedaluwarsa)"""
+    return Q(next_check_at__lte=now) & (Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+
+
+def claim_due(worker_id: str, limit: int = BATCH_SIZE, now=None) -> list:
+    """
+    Klaim hingga limit CCTV jatuh tempo untuk worker ini, paling terlambat lebih dulu.
+
+    Dengan SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8+) worker lain
+    langsung melewati baris yang sedang diklaim. Tanpa dukungan itu (SQLite)
+    lease dipasang dengan UPDATE bersyarat lease masih kosong/kedaluwarsa,
+    sehingga satu baris hanya dimenangkan satu worker.
+
+    Returns:
+        list: CCTV (beserta check_schedule) yang di-lease worker ini
+    """
+    now = now or timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds())
+    candidates = CheckSchedule.objects.filter(_claimable(now)).order_by('next_check_at', 'pk')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(candidates.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            CheckSchedule.objects.filter(pk__in=pks).update(leased_by=worker_id, lease_expires_at=expires_at)
+    else:
+        pks = list(candidates.values_list('pk', flat=True)[:limit])
+        CheckSchedule.objects.filter(_claimable(now), pk__in=pks).update(
+            leased_by=worker_id, lease_expires_at=expires_at
+        )
+
+    return list(
+        CCTV.objects.select_related('check_schedule')
+        .filter(check_schedule__leased_by=worker_id, check_schedule__lease_expires_at=expires_at)
+        .order_by('check_schedule__next_check_at', 'pk')
+    )
+
+
+def _group_by_lease(cctv_list: list) -> dict:
+    """Kelompokkan jadwal per lease saat diklaim: {(leased_by, lease_expires_at): [CheckSchedule]}"""
+    groups = {}
+    for cctv in cctv_list:
+        schedule = cctv.check_schedule
+        groups.setdefault((schedule.leased_by, schedule.lease_expires_at), []).append(schedule)
+    return groups
+
+
+def release(cctv_list: list) -> int:
+    """
+    Lepas lease tanpa mengubah jadwal (misal batch gagal diproses).
+
+    Hanya baris yang lease-nya masih sama dengan saat diklaim yang dilepas.
+
+    Returns:
+        int: Jumlah lease yang dilepas
+    """
+    released = 0
+    for (worker_id, expires_at), schedules in _group_by_lease(cctv_list).items():
+        released += CheckSchedule.objects.filter(
+            pk__in=[schedule.pk for schedule in schedules], leased_by=worker_id, lease_expires_at=expires_at
+        ).update(leased_by='', lease_expires_at=None)
+    return released
+
+
+def filter_leased(cctv_list: list) -> list:
+    """
+    CCTV dari cctv_list yang lease-nya masih sama dengan saat diklaim.
+
+    Dipanggil di dalam transaksi sebelum hasil cek disimpan: baris jadwal
+    dikunci (SELECT ... FOR UPDATE) sehingga worker lain tidak bisa
+    mengklaimnya hingga hasil tersimpan, dan hasil worker yang lease-nya sudah
+    diambil alih tidak menimpa status dari pemilik baru.
+    """
+    owned = set()
+    for (worker_id, expires_at), schedules in _group_by_lease(cctv_list).items():
+        owned.update(
+            CheckSchedule.objects.select_for_update()
+            .filter(pk__in=[schedule.pk for schedule in schedules], leased_by=worker_id, lease_expires_at=expires_at)
+            .values_list('pk', flat=True)
+        )
+    lost = len(cctv_list) - len(owned)
+    if lost:
+        logger.warning(f"Scheduler lease lost for {lost} CCTV, check results discarded")
+    return [cctv for cctv in cctv_list if cctv.pk in owned]
+
+
+def due_count(now=None) -> int:
+    """Jumlah CCTV jatuh tempo yang belum diklaim worker mana pun"""
+    return CheckSchedule.objects.filter(_claimable(now or timezone.now())).count()
+
+
+def reschedule(cctv_list: list, changed_ids: set, deferred_ids: set, now=None, rng=random) -> int:
+    """
+    Hitung jadwal berikutnya untuk CCTV yang baru diproses dan lepas lease-nya (satu bulk_update).
+
+    Baris yang lease-nya sudah kedaluwarsa dan diklaim worker lain dilewati.
+
+    Args:
+        cctv_list: CCTV hasil claim_due
+        changed_ids: PK CCTV yang status aktif / video ID-nya berubah
+        deferred_ids: PK CCTV yang ditunda (budget kuota), interval tidak diubah
+
+    Returns:
+        int: Jumlah jadwal yang disimpan
+    """
+    now = now or timezone.now()
+    # Lease dicatat sebelum field schedule diubah
+    leases = _group_by_lease(cctv_list)
+    for cctv in cctv_list:
+        schedule = cctv.check_schedule
+        if cctv.pk in deferred_ids:
+            delay = min(schedule.interval, base_interval())
+        else:
+            schedule.interval, schedule.flap_score = next_interval(
+                schedule.interval, schedule.flap_score, cctv.pk in changed_ids
+            )
+            delay = schedule.interval
+        schedule.next_check_at = now + timedelta(seconds=with_jitter(delay, rng))
+        schedule.leased_by = ''
+        schedule.lease_expires_at = None
+
+    saved = 0
+    for (worker_id, expires_at), schedules in leases.items():
+        saved += CheckSchedule.objects.filter(leased_by=worker_id, lease_expires_at=expires_at).bulk_update(
+            schedules,
+            ['next_check_at', 'interval', 'flap_score', 'leased_by', 'lease_expires_at'],
+            batch_size=BULK_UPDATE_BATCH_SIZE,
+        )
+    if saved < len(cctv_list):
+        logger.warning(f"Scheduler lease lost for {len(cctv_list) - saved} CCTV, their schedule was left to the new owner")
+    return saved
+
+
+def run_cycle(check_batch, deadline: float, worker_id: str = None, batch_size: int = BATCH_SIZE,
+              clock=time.monotonic) -> dict:
+    """
+    Klaim dan proses CCTV yang jatuh tempo per batch hingga habis atau mendekati deadline.
+
+    Args:
+        check_batch: Callable(list CCTV) -> dict dengan 'snapshots' ({pk: snapshot_status}
+            sebelum cek) dan 'deferred' (list PK yang ditunda); CCTV di list sudah berisi hasil cek
+        deadline: Batas waktu siklus dalam satuan clock()
+        worker_id: ID pemegang lease (default host:pid)
+
+    Returns:
+        dict: checked, changed, deferred, batches, busy_seconds, remaining (masih jatuh tempo
+              dan belum diklaim), stopped_by_deadline, stopped_by_full_run
+    """
+    worker_id = worker_id or default_worker_id()
+    ensure_schedules()
+    totals = {
+        'checked': 0, 'changed': 0, 'deferred': 0, 'batches': 0,
+        'busy_seconds': 0.0, 'stopped_by_deadline': False, 'stopped_by_full_run': False,
+    }
+    longest = 0.0
+
+    while True:
+        if deadline - clock() <= longest:
+            totals['stopped_by_deadline'] = True
+            break
+        # Run penuh bisa mulai di tengah siklus; CCTV sisanya dicek oleh run itu
+        if full_run_active():
+            totals['stopped_by_full_run'] = True
+            break
+        started = clock()
+        batch = claim_due(worker_id, batch_size)
+        if not batch:
+            break
+
+        try:
+            outcome = check_batch(batch)
+        except Exception:
+            release(batch)
+            raise
+        deferred_ids = set(outcome['deferred'])
+        changed_ids = {
+            cctv.pk for cctv in batch
+            if cctv.pk not in deferred_ids and _status_changed(cctv, outcome['snapshots'].get(cctv.pk))
+        }
+        reschedule(batch, changed_ids, deferred_ids)
+        elapsed = clock() - started
+        longest = max(longest, elapsed)
+        totals['busy_seconds'] += elapsed
+
+        totals['batches'] += 1
+        totals['checked'] += len(batch) - len(deferred_ids)
+        totals['changed'] += len(changed_ids)
+        totals['deferred'] += len(deferred_ids)
+
+    totals['remaining'] = due_count()
+    if totals['stopped_by_deadline'] and totals['remaining']:
+        logger.info(f"Scheduler cycle stopped at deadline, {totals['remaining']} CCTV still due")
+    return totals
+
+
+def _status_changed(cctv, snapshot) -> bool:
+    """Perubahan yang relevan untuk penjadwalan: status aktif atau video ID (bukan teks error)"""
+    if snapshot is None:
+        return False
+    previous = dict(zip(STATUS_FIELDS, snapshot))
+    return previous['is_active'] != cctv.is_active or previous['youtube_video_id'] != cctv.youtube_video_id
+
+
+@contextmanager
+def check_lock(timeout: int = None):
+    """
+    Lock di cache bersama untuk satu run/siklus pengecekan status.
+
+    Yields:
+        bool: True jika lock didapat; False jika run lain sedang berjalan
+    """
+    timeout = timeout or getattr(settings, 'STATUS_CHECK_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+    token = uuid.uuid4().hex
+    acquired = cache.add(CHECK_LOCK_KEY, token, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(CHECK_LOCK_KEY) == token:
+            cache.delete(CHECK_LOCK_KEY)
+
+
+def full_run_active() -> bool:
+    """True jika run penuh check_cctv_status (sekali jalan / --loop) sedang memegang lock"""
+    return cache.get(CHECK_LOCK_KEY) is not None
+
+
+def record_worker_cycle(worker_id: str, totals: dict, now=None):
+    """Tambahkan hasil satu siklus ke statistik throughput worker (CheckerWorker)"""
+    now = now or timezone.now()
+    updated = CheckerWorker.objects.filter(worker_id=worker_id).update(
+        last_seen=now,
+        cycles=F('cycles') + 1,
+        checked=F('checked') + totals['checked'],
+        changed=F('changed') + totals['changed'],
+        busy_seconds=F('busy_seconds') + totals['busy_seconds'],
+    )
+    if not updated:
+        CheckerWorker.objects.create(
+            worker_id=worker_id,
+            last_seen=now,
+            cycles=1,
+            checked=totals['checked'],
+            changed=totals['changed'],
+            busy_seconds=totals['busy_seconds'],
+        )
+
+
+def active_workers(since_seconds: int = 600) -> list:
+    """Worker yang aktif dalam since_seconds detik terakhir"""
+    return list(CheckerWorker.objects.filter(
+        last_seen__gte=timezone.now() - timedelta(seconds=since_seconds)
+    ).order_by('worker_id'))
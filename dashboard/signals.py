@@ -0,0 +1,34 @@
+"""
+Signal handler untuk Dashboard CCTV
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .data_version import bump_data_version_on_commit
+from .metrics import count_queries
+from .models import CCTV, Kecamatan
+from .sync import record_deletion
+
+
+@receiver(post_save, sender=CCTV)
+@receiver(post_delete, sender=CCTV)
+@receiver(post_save, sender=Kecamatan)
+@receiver(post_delete, sender=Kecamatan)
+def invalidate_cached_payloads(sender, **kwargs):
+    """Naikkan versi data setiap kali CCTV/Kecamatan berubah"""
+    bump_data_version_on_commit()
+
+
+@receiver(post_delete, sender=CCTV)
+def record_cctv_tombstone(sender, instance, **kwargs):
+    """Catat CCTV yang dihapus untuk sinkronisasi delta klien"""
+    record_deletion(instance.pk)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Pasang penghitung query untuk metrik per view (sekali per koneksi)"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
@@ -0,0 +1,291 @@
+"""
+Indeks spasial in-process untuk koordinat CCTV (grid lat/lng)
+
+Titik CCTV dikelompokkan ke sel grid persegi (derajat) yang ukurannya
+disesuaikan dengan kepadatan data (rata-rata ~POINTS_PER_CELL titik per sel). Indeks
+dibangun ulang otomatis jika versi data global berubah (CCTV ditambah,
+diubah, dihapus atau status dicek ulang), sehingga query viewport (bbox)
+dan k-nearest hanya membaca sel di sekitar area yang diminta tanpa query
+database.
+
+Pembangunan ulang berjalan di satu thread latar belakang; selama itu request
+tetap dilayani indeks lama (paling lama satu kali build tertinggal), sehingga
+bump versi tidak menahan request bbox/nearest/cluster.
+"""
+
+import heapq
+import logging
+import math
+import threading
+from collections import defaultdict
+
+from django.db import connection
+
+from .data_version import get_data_version
+from .models import CCTV
+from .sync import serialize_cctv
+
+logger = logging.getLogger(__name__)
+
+# Target rata-rata jumlah titik per sel grid
+POINTS_PER_CELL = 8
+
+# Batas ukuran sel grid (derajat); 0.0002 derajat ~ 22 meter di khatulistiwa
+MIN_CELL_SIZE = 0.0002
+MAX_CELL_SIZE = 0.05
+
+EARTH_RADIUS_M = 6371008.8
+
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+DEFAULT_NEAREST_K = 5
+MAX_NEAREST_K = 100
+
+# Batas jumlah CCTV per respons bbox (viewport yang sangat besar)
+MAX_BBOX_RESULTS = 5000
+
+# building: versi yang sedang dibangun thread latar belakang (None jika tidak ada)
+_state = {'version': None, 'index': None, 'building': None}
+_lock = threading.Lock()
+
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Jarak lingkaran besar antara dua titik (meter)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(value: str) -> tuple:
+    """
+    Parse parameter bbox 'minLng,minLat,maxLng,maxLat'.
+
+    Raises:
+        ValueError: Jika format atau rentang koordinat tidak valid
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('bbox harus berformat minLng,minLat,maxLng,maxLat')
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= max_lng <= 180):
+        raise ValueError('bbox di luar rentang koordinat atau min lebih besar dari max')
+    return min_lng, min_lat, max_lng, max_lat
+
+
+class GridIndex:
+    """Grid lat/lng berisi (lat, lng, pk) per sel, plus data CCTV terserialisasi"""
+
+    def __init__(self, points: list):
+        """
+        Args:
+            points: List (lat, lng, data) dengan data hasil serialize_cctv
+        """
+        self.cell_size = _cell_size(points)
+        self.cells = defaultdict(list)
+        self.data = {}
+        for lat, lng, data in points:
+            self.cells[self._cell(lat, lng)].append((lat, lng, data['id']))
+            self.data[data['id']] = data
+
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self.bounds = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self.bounds = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def points(self):
+        """Semua titik sebagai (lat, lng, data)"""
+        for cell in self.cells.values():
+            for lat, lng, pk in cell:
+                yield lat, lng, self.data[pk]
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return math.floor(lat / self.cell_size), math.floor(lng / self.cell_size)
+
+    def bbox(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float) -> list:
+        """ID CCTV di dalam bounding box"""
+        if self.bounds is None:
+            return []
+        row_min, row_max, col_min, col_max = self.bounds
+        row_start, col_start = self._cell(min_lat, min_lng)
+        row_end, col_end = self._cell(max_lat, max_lng)
+
+        result = []
+        for row in range(max(row_start, row_min), min(row_end, row_max) + 1):
+            for col in range(max(col_start, col_min), min(col_end, col_max) + 1):
+                for lat, lng, pk in self.cells.get((row, col), ()):
+                    if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                        result.append(pk)
+        return result
+
+    def nearest(self, lat: float, lng: float, k: int) -> list:
+        """
+        k CCTV terdekat dari titik (lat, lng), urut jarak naik.
+
+        Sel diperiksa per cincin di sekitar sel titik; pencarian berhenti jika
+        jarak minimum ke cincin berikutnya sudah lebih besar dari jarak ke-k.
+
+        Returns:
+            list: Tuple (jarak_meter, pk)
+        """
+        if self.bounds is None or k <= 0:
+            return []
+        row_min, row_max, col_min, col_max = self.bounds
+        center_row, center_col = self._cell(lat, lng)
+        # Cincin pertama yang menyentuh grid (titik bisa berada di luar area data)
+        min_ring = max(row_min - center_row, center_row - row_max, col_min - center_col, center_col - col_max, 0)
+        max_ring = max(
+            abs(center_row - row_min), abs(center_row - row_max),
+            abs(center_col - col_min), abs(center_col - col_max),
+        )
+
+        best = []  # max-heap (-jarak, pk) berisi k kandidat terbaik
+        for ring in range(min_ring, max_ring + 1):
+            if len(best) == k and ring > 0:
+                # Jarak minimum ke sel di cincin ini (batas bawah, arah bujur dikoreksi cos lintang)
+                edge_lat = min(90.0, abs(lat) + ring * self.cell_size)
+                min_distance = (ring - 1) * self.cell_size * METERS_PER_DEGREE * math.cos(math.radians(edge_lat))
+                if min_distance > -best[0][0]:
+                    break
+
+            for row, col in _ring_cells(center_row, center_col, ring, self.bounds):
+                for point_lat, point_lng, pk in self.cells.get((row, col), ()):
+                    distance = haversine(lat, lng, point_lat, point_lng)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, pk))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, pk))
+
+        return sorted((-negative, pk) for negative, pk in best)
+
+
+def _cell_size(points: list) -> float:
+    """Ukuran sel agar rata-rata ~POINTS_PER_CELL titik per sel di bounding box data"""
+    if len(points) < 2:
+        return MAX_CELL_SIZE
+    lats = [point[0] for point in points]
+    lngs = [point[1] for point in points]
+    area = max(max(lats) - min(lats), MIN_CELL_SIZE) * max(max(lngs) - min(lngs), MIN_CELL_SIZE)
+    size = math.sqrt(area * POINTS_PER_CELL / len(points))
+    return min(MAX_CELL_SIZE, max(MIN_CELL_SIZE, size))
+
+
+def _ring_cells(center_row: int, center_col: int, ring: int, bounds: tuple):
+    """Sel pada keliling persegi berjarak ring dari sel pusat, dibatasi bounds grid"""
+    row_min, row_max, col_min, col_max = bounds
+    if ring == 0:
+        yield center_row, center_col
+        return
+    cols = range(max(center_col - ring, col_min), min(center_col + ring, col_max) + 1)
+    for row in (center_row - ring, center_row + ring):
+        if row_min <= row <= row_max:
+            for col in cols:
+                yield row, col
+    rows = range(max(center_row - ring + 1, row_min), min(center_row + ring - 1, row_max) + 1)
+    for col in (center_col - ring, center_col + ring):
+        if col_min <= col <= col_max:
+            for row in rows:
+                yield row, col
+
+
+def build_index() -> GridIndex:
+    """Bangun indeks dari semua CCTV yang punya koordinat"""
+    queryset = CCTV.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).select_related('kecamatan').only(
+        'id', 'nama_lokasi', 'kecamatan__nama', 'youtube_video_id', 'latitude',
+        'longitude', 'is_active', 'deskripsi', 'last_status_check',
+    ).order_by()
+    points = [
+        (float(cctv.latitude), float(cctv.longitude), serialize_cctv(cctv))
+        for cctv in queryset.iterator(chunk_size=2000)
+    ]
+    return GridIndex(points)
+
+
+def get_index() -> GridIndex:
+    """
+    Indeks untuk versi data saat ini.
+
+    Jika versi berubah, indeks lama dikembalikan dan indeks baru dibangun di
+    thread latar belakang. Hanya request pertama di proses (belum ada indeks
+    sama sekali) yang menunggu build.
+    """
+    version = get_data_version()
+    index = _state['index']
+    if _state['version'] == version:
+        return index
+
+    if index is None:
+        with _lock:
+            # Thread lain mungkin sudah membangun selagi menunggu lock
+            if _state['index'] is None:
+                _state['index'] = build_index()
+                _state['version'] = version
+            return _state['index']
+
+    _start_rebuild(version)
+    return index
+
+
+def refresh_index() -> GridIndex:
+    """Bangun ulang indeks saat ini juga (tanpa melayani indeks lama)"""
+    version = get_data_version()
+    with _lock:
+        _state['index'] = build_index()
+        _state['version'] = version
+        return _state['index']
+
+
+def _start_rebuild(version):
+    with _lock:
+        if _state['building'] is not None:
+            return
+        _state['building'] = version
+    threading.Thread(target=_rebuild, args=(version,), name='spatial-index-rebuild', daemon=True).start()
+
+
+def _rebuild(version):
+    """Bangun indeks untuk version lalu tukar; versi yang naik lagi selama build memicu build berikutnya"""
+    try:
+        index = build_index()
+        with _lock:
+            _state['index'] = index
+            _state['version'] = version
+    except Exception as e:
+        logger.error(f"Spatial index rebuild error: {str(e)}")
+    finally:
+        with _lock:
+            _state['building'] = None
+        # Koneksi database milik thread ini
+        connection.close()
+
+
+def cctv_in_bbox(bbox: tuple, kecamatan_id=None, limit: int = MAX_BBOX_RESULTS) -> tuple:
+    """
+    Data CCTV di dalam bounding box.
+
+    Returns:
+        tuple: (list data CCTV, True jika hasil dipotong karena melebihi limit)
+    """
+    index = get_index()
+    data = [index.data[pk] for pk in index.bbox(*bbox)]
+    if kecamatan_id:
+        data = [item for item in data if str(item['kecamatan_id']) == str(kecamatan_id)]
+    return data[:limit], len(data) > limit
+
+
+def nearest_cctv(lat: float, lng: float, k: int = DEFAULT_NEAREST_K) -> list:
+    """k CCTV terdekat beserta jaraknya (meter)"""
+    index = get_index()
+    return [
+        {**index.data[pk], 'distance_m': round(distance, 1)}
+        for distance, pk in index.nearest(lat, lng, k)
+    ]
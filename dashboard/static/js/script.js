@@ -7,10 +7,23 @@
 // Global Variables
 // ================================
 let map = null;
-let markers = [];
-let cctvData = []; // Data will be loaded via API
+let mapLayer = null; // L.layerGroup berisi cluster / marker yang sedang tampil
+let mapMode = 'clusters'; // 'clusters' atau 'points' (marker individual di zoom tinggi)
+let mapRequestSeq = 0; // Abaikan respons cluster yang sudah usang
+let mapRefreshTimer = null;
+let cctvData = []; // Data awal disisipkan server (json_script), cadangan via API
+let cctvById = new Map(); // id CCTV -> objek di cctvData (lookup O(1) untuk cluster & update)
+let filteredCCTV = []; // cctvData setelah filter kecamatan (sumber halaman grid)
+let gridPage = 1;
+let gridPageSize = 24; // Dibaca dari data-page-size pada #cctv-grid
 let currentView = 'grid';
 let currentFilter = 'all';
+let markerById = new Map(); // id CCTV -> marker Leaflet
+let syncCursor = null; // Cursor sinkronisasi delta dari /api/cctv/
+let lastSyncAt = 0;
+const SYNC_INTERVAL_MS = 30000;
+const SYNC_INTERVAL_SSE_MS = 300000; // Saat SSE tersambung, delta sync hanya sebagai cadangan
+const MAP_REFRESH_DELAY_MS = 1500; // Jeda sebelum cluster diminta ulang setelah data berubah
 
 // ================================
 // [LANGKAH 1, 2, 3, 4] - Smart Stream Manager
@@ -211,6 +224,46 @@ const StreamManager = {
     reobserveAll() {
         const allContainers = document.querySelectorAll('.cctv-video-container');
         allContainers.forEach(c => this.observe(c));
+    },
+
+    // ================================
+    // Event stream (SSE) perubahan status CCTV
+    // ================================
+    eventSource: null,
+    eventsConnected: false,
+
+    // Buka koneksi SSE; EventSource otomatis reconnect dengan Last-Event-ID.
+    // Hanya jika server mengizinkan (ASGI), agar tab yang terbuka tidak menahan worker sync
+    connectStatusEvents() {
+        if (!window.EventSource || this.eventSource) return;
+        const flag = document.getElementById('status-stream-enabled');
+        if (!flag || !JSON.parse(flag.textContent)) return;
+
+        this.eventSource = new EventSource('/api/cctv/stream/');
+        this.eventSource.addEventListener('open', () => {
+            this.eventsConnected = true;
+        });
+        this.eventSource.addEventListener('error', () => {
+            this.eventsConnected = false;
+        });
+        this.eventSource.addEventListener('status', (e) => {
+            this.applyStatusEvent(JSON.parse(e.data));
+        });
+    },
+
+    // Terapkan satu event status ke data, marker dan card tanpa fetch ulang
+    applyStatusEvent(event) {
+        const cctv = cctvById.get(event.id);
+        // CCTV yang belum dikenal akan diambil oleh sinkronisasi delta
+        if (!cctv) return;
+
+        applyCCTVUpdate({
+            ...cctv,
+            is_active: event.is_active,
+            youtube_video_id: event.youtube_video_id,
+            youtube_embed_url: `https://www.youtube.com/embed/${event.youtube_video_id}`,
+            last_status_check: event.checked_at
+        });
     }
 };
 
@@ -235,14 +288,30 @@ document.addEventListener('DOMContentLoaded', function () {
     // Update indikator awal [Langkah 4]
     StreamManager._updateIndicator();
 
-    // Fetch data via API before initializing map
+    // Ambil data awal sebelum inisialisasi grid & peta
     fetchCCTVData().then(() => {
+        initGridPagination();
         initMap();
+        // Perubahan status realtime via SSE, delta sync berkala sebagai cadangan
+        StreamManager.connectStatusEvents();
+        setInterval(() => {
+            if (StreamManager.eventsConnected && Date.now() - lastSyncAt < SYNC_INTERVAL_SSE_MS) return;
+            syncCCTVData();
+        }, SYNC_INTERVAL_MS);
     });
 
     initKeyboardShortcuts();
 });
 
+// Catat waktu first paint dan jumlah node DOM (acuan benchmark halaman).
+// Hanya aktif saat halaman dibuka dengan ?metrics=1
+window.addEventListener('load', function () {
+    if (new URLSearchParams(window.location.search).get('metrics') !== '1') return;
+    const paint = performance.getEntriesByName('first-contentful-paint')[0];
+    const firstPaint = paint ? `${Math.round(paint.startTime)} ms` : '-';
+    console.log(`[Metrics] First contentful paint: ${firstPaint}, DOM nodes: ${document.getElementsByTagName('*').length}`);
+});
+
 // ================================
 // [Langkah 2] Inisialisasi selector Max Live Streams
 // ================================
@@ -263,11 +332,24 @@ function initMaxStreamSelector() {
 // Data Fetching
 // ================================
 async function fetchCCTVData() {
+    // Data awal sudah disisipkan di halaman, tidak perlu fetch ulang
+    const embedded = document.getElementById('cctv-data');
+    if (embedded) {
+        const result = JSON.parse(embedded.textContent);
+        setCCTVData(result.data);
+        syncCursor = result.cursor;
+        lastSyncAt = Date.now();
+        console.log(`CCTV Data Loaded from page: ${cctvData.length} CCTV`);
+        return;
+    }
+
     try {
         const response = await fetch('/api/cctv/');
         const result = await response.json();
         if (result.success) {
-            cctvData = result.data;
+            setCCTVData(result.data);
+            syncCursor = result.cursor;
+            lastSyncAt = Date.now();
             console.log("CCTV Data Loaded via API:", cctvData);
         } else {
             console.error("Failed to fetch CCTV data:", result.message);
@@ -277,6 +359,190 @@ async function fetchCCTVData() {
     }
 }
 
+// Ambil hanya CCTV yang berubah sejak cursor terakhir, lalu patch marker & card
+async function syncCCTVData() {
+    if (!syncCursor) return;
+
+    try {
+        const response = await fetch(`/api/cctv/?since=${encodeURIComponent(syncCursor)}`);
+        const result = await response.json();
+        if (!result.success) {
+            console.error("Failed to sync CCTV data:", result.error);
+            return;
+        }
+
+        let membershipChanged = false;
+
+        if (result.full) {
+            // Cursor terlalu lama: server mengirim data lengkap
+            const incomingIds = new Set(result.data.map(cctv => cctv.id));
+            cctvData
+                .filter(cctv => !incomingIds.has(cctv.id))
+                .forEach(cctv => {
+                    removeCCTV(cctv.id);
+                    membershipChanged = true;
+                });
+        }
+
+        result.data.forEach(cctv => {
+            if (applyCCTVUpdate(cctv)) membershipChanged = true;
+        });
+
+        result.deleted.forEach(id => {
+            if (removeCCTV(id)) membershipChanged = true;
+        });
+
+        syncCursor = result.cursor;
+        lastSyncAt = Date.now();
+
+        if (membershipChanged) {
+            filterCCTV(currentFilter);
+        }
+    } catch (error) {
+        console.error("Error syncing CCTV data:", error);
+    }
+}
+
+// Ganti seluruh cctvData dan bangun ulang indeks id -> CCTV
+function setCCTVData(data) {
+    cctvData = data;
+    cctvById = new Map(data.map(cctv => [cctv.id, cctv]));
+}
+
+// Terapkan data satu CCTV ke cctvData, marker dan card. Return true jika CCTV baru.
+function applyCCTVUpdate(cctv) {
+    const existing = cctvById.get(cctv.id);
+    const isNew = existing === undefined;
+    if (isNew) {
+        cctvData.push(cctv);
+        cctvById.set(cctv.id, cctv);
+    } else {
+        // Diperbarui di tempat agar filteredCCTV (objek yang sama) ikut terbarui
+        Object.assign(existing, cctv);
+    }
+
+    updateMarker(cctv);
+    updateCard(cctv);
+    return isNew;
+}
+
+// Hapus CCTV dari cctvData, peta dan grid. Return true jika sebelumnya ada.
+function removeCCTV(id) {
+    const existing = cctvById.get(id);
+    if (existing === undefined) return false;
+    cctvData.splice(cctvData.indexOf(existing), 1);
+    cctvById.delete(id);
+
+    const marker = markerById.get(id);
+    if (marker) {
+        if (mapLayer) mapLayer.removeLayer(marker);
+        markerById.delete(id);
+    }
+    scheduleMapRefresh();
+
+    const card = document.querySelector(`.cctv-card[data-id="${id}"]`);
+    if (card) {
+        const container = card.querySelector('.cctv-video-container');
+        if (container) {
+            StreamManager._unload(container);
+            StreamManager.unobserve(container);
+        }
+        card.remove();
+    }
+    return true;
+}
+
+// Perbarui card grid yang sedang tampil; card halaman lain dibuat saat halamannya dibuka
+function updateCard(cctv) {
+    const card = document.querySelector(`.cctv-card[data-id="${cctv.id}"]`);
+    if (!card) return;
+
+    card.classList.toggle('inactive', !cctv.is_active);
+    card.dataset.kecamatan = cctv.kecamatan_id;
+    card.dataset.lat = cctv.latitude ?? '';
+    card.dataset.lng = cctv.longitude ?? '';
+    card.querySelector('.cctv-title').textContent = cctv.nama_lokasi;
+    card.querySelector('.cctv-location-name').textContent = cctv.kecamatan;
+
+    const status = card.querySelector('.cctv-status');
+    status.classList.toggle('active', cctv.is_active);
+    status.classList.toggle('inactive', !cctv.is_active);
+    status.querySelector('.status-label').textContent = cctv.is_active ? 'Aktif' : 'Tidak Aktif';
+
+    const container = card.querySelector('.cctv-video-container');
+    container.dataset.title = cctv.nama_lokasi;
+    card.querySelector('.fullscreen-btn').onclick = () =>
+        openFullscreen(cctv.id, cctv.nama_lokasi, cctv.youtube_video_id, cctv.kecamatan);
+
+    if (container.dataset.videoId !== cctv.youtube_video_id) {
+        // Video ID berganti (siaran baru): ganti thumbnail dan muat ulang stream jika sedang diputar
+        const wasPlaying = StreamManager.activeStreams.has(container);
+        StreamManager._unload(container);
+        container.dataset.videoId = cctv.youtube_video_id;
+        const thumbnail = container.querySelector('.video-thumbnail');
+        if (thumbnail) {
+            thumbnail.src = `https://img.youtube.com/vi/${cctv.youtube_video_id}/hqdefault.jpg`;
+        }
+        if (wasPlaying) StreamManager._tryLoad(container);
+    }
+}
+
+// Buat elemen card baru (struktur sama dengan template index.html)
+function createCard(cctv) {
+    const card = document.createElement('div');
+    card.className = `cctv-card ${cctv.is_active ? '' : 'inactive'}`;
+    card.dataset.id = cctv.id;
+    card.dataset.kecamatan = cctv.kecamatan_id;
+    card.dataset.lat = cctv.latitude ?? '';
+    card.dataset.lng = cctv.longitude ?? '';
+    card.innerHTML = `
+        <div class="cctv-video-container" data-video-id="${escapeHtml(cctv.youtube_video_id)}"
+            data-title="${escapeHtml(cctv.nama_lokasi)}">
+            <div class="video-placeholder" onclick="loadVideo(this.parentElement)">
+                <img src="https://img.youtube.com/vi/${escapeHtml(cctv.youtube_video_id)}/hqdefault.jpg"
+                    alt="${escapeHtml(cctv.nama_lokasi)}" class="video-thumbnail" loading="lazy">
+                <div class="play-button">
+                    <svg xmlns="http://www.w3.org/2000/svg" width="48" height="48" viewBox="0 0 24 24"
+                        fill="currentColor">
+                        <path d="M8 5v14l11-7z"></path>
+                    </svg>
+                </div>
+            </div>
+            <div class="cctv-overlay">
+                <button class="fullscreen-btn" title="Layar Penuh">
+                    <svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 24 24" fill="none"
+                        stroke="currentColor" stroke-width="2">
+                        <polyline points="15 3 21 3 21 9"></polyline>
+                        <polyline points="9 21 3 21 3 15"></polyline>
+                        <line x1="21" y1="3" x2="14" y2="10"></line>
+                        <line x1="3" y1="21" x2="10" y2="14"></line>
+                    </svg>
+                </button>
+            </div>
+        </div>
+        <div class="cctv-info">
+            <h3 class="cctv-title">${escapeHtml(cctv.nama_lokasi)}</h3>
+            <div class="cctv-meta">
+                <span class="cctv-location">
+                    <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none"
+                        stroke="currentColor" stroke-width="2">
+                        <path d="M21 10c0 7-9 13-9 13s-9-6-9-13a9 9 0 0 1 18 0z"></path>
+                        <circle cx="12" cy="10" r="3"></circle>
+                    </svg>
+                    <span class="cctv-location-name">${escapeHtml(cctv.kecamatan)}</span>
+                </span>
+                <span class="cctv-status ${cctv.is_active ? 'active' : 'inactive'}">
+                    <span class="status-dot"></span>
+                    <span class="status-label">${cctv.is_active ? 'Aktif' : 'Tidak Aktif'}</span>
+                </span>
+            </div>
+        </div>
+    `;
+    card.querySelector('.fullscreen-btn').onclick = () =>
+        openFullscreen(cctv.id, cctv.nama_lokasi, cctv.youtube_video_id, cctv.kecamatan);
+    return card;
+}
+
 // ================================
 // DateTime Display
 // ================================
@@ -339,13 +605,8 @@ function initViewToggle() {
                 if (map) {
                     setTimeout(() => {
                         map.invalidateSize();
-                        // Refit bounds once size is known
-                        if (markers.length > 0) {
-                            const group = new L.featureGroup(markers);
-                            if (group.getBounds().isValid()) {
-                                map.fitBounds(group.getBounds().pad(0.1), { maxZoom: 15 });
-                            }
-                        }
+                        // Refit ke seluruh CCTV setelah ukuran peta diketahui
+                        refreshMapLayer(true);
                     }, 200);
                 }
             }
@@ -364,41 +625,131 @@ function initFilters() {
     if (kecamatanFilter) {
         kecamatanFilter.addEventListener('change', function () {
             currentFilter = this.value;
+            gridPage = 1;
             filterCCTV(currentFilter);
         });
     }
 }
 
 function filterCCTV(kecamatanId) {
-    const cards = document.querySelectorAll('.cctv-card');
-    let visibleCount = 0;
-
-    cards.forEach(card => {
-        const cardKecamatan = card.dataset.kecamatan;
-        const container = card.querySelector('.cctv-video-container');
-
-        if (kecamatanId === 'all' || cardKecamatan === kecamatanId) {
-            card.style.display = 'block';
-            visibleCount++;
-            // Re-observe supaya Intersection Observer re-evaluate
-            if (container) StreamManager.observe(container);
-        } else {
-            card.style.display = 'none';
-            // Unload video yang disembunyikan
-            if (container) StreamManager._unload(container);
-        }
-    });
+    filteredCCTV = kecamatanId === 'all'
+        ? cctvData
+        : cctvData.filter(cctv => String(cctv.kecamatan_id) === kecamatanId);
 
     // Update total count
     const totalCCTVEl = document.getElementById('total-cctv');
     if (totalCCTVEl) {
-        totalCCTVEl.textContent = visibleCount;
+        totalCCTVEl.textContent = filteredCCTV.length;
     }
 
+    renderGridPage();
+
     // Update map markers
     updateMapMarkers(kecamatanId);
 }
 
+// ================================
+// Grid Pagination
+// ================================
+function initGridPagination() {
+    const grid = document.getElementById('cctv-grid');
+    if (grid && grid.dataset.pageSize) {
+        gridPageSize = parseInt(grid.dataset.pageSize, 10) || gridPageSize;
+    }
+
+    // Halaman pertama sudah dirender server, cukup siapkan state & navigasi
+    filteredCCTV = cctvData;
+    updatePagination();
+
+    const prevBtn = document.getElementById('page-prev');
+    const nextBtn = document.getElementById('page-next');
+    if (prevBtn) prevBtn.addEventListener('click', () => goToPage(gridPage - 1));
+    if (nextBtn) nextBtn.addEventListener('click', () => goToPage(gridPage + 1));
+}
+
+function goToPage(page) {
+    const pageCount = Math.max(1, Math.ceil(filteredCCTV.length / gridPageSize));
+    if (page < 1 || page > pageCount || page === gridPage) return;
+    gridPage = page;
+    renderGridPage();
+    document.getElementById('grid-view').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Tampilkan card halaman aktif saja; card yang tetap ada di halaman tidak dibuat ulang
+// (stream yang sedang diputar tidak terputus)
+function renderGridPage() {
+    const grid = document.getElementById('cctv-grid');
+    if (!grid) return;
+
+    const pageCount = Math.max(1, Math.ceil(filteredCCTV.length / gridPageSize));
+    gridPage = Math.min(Math.max(1, gridPage), pageCount);
+    const pageItems = filteredCCTV.slice((gridPage - 1) * gridPageSize, gridPage * gridPageSize);
+    const pageIds = new Set(pageItems.map(cctv => String(cctv.id)));
+
+    // Hapus card di luar halaman beserta stream & observer-nya
+    const existing = new Map();
+    grid.querySelectorAll('.cctv-card').forEach(card => {
+        if (pageIds.has(card.dataset.id)) {
+            existing.set(card.dataset.id, card);
+            return;
+        }
+        const container = card.querySelector('.cctv-video-container');
+        if (container) {
+            StreamManager._unload(container);
+            StreamManager.unobserve(container);
+        }
+        card.remove();
+    });
+
+    const noData = grid.querySelector('.no-data');
+    if (noData) noData.remove();
+    if (pageItems.length === 0) {
+        grid.appendChild(createNoDataElement());
+    }
+
+    // Sisipkan card sesuai urutan; card lama hanya dipindah jika urutannya berubah
+    let reference = grid.querySelector('.cctv-card');
+    pageItems.forEach(cctv => {
+        let card = existing.get(String(cctv.id));
+        if (card && card === reference) {
+            reference = card.nextElementSibling;
+            return;
+        }
+        if (!card) {
+            card = createCard(cctv);
+            StreamManager.observe(card.querySelector('.cctv-video-container'));
+        }
+        grid.insertBefore(card, reference);
+    });
+
+    updatePagination();
+}
+
+function updatePagination() {
+    const pageCount = Math.max(1, Math.ceil(filteredCCTV.length / gridPageSize));
+    const pagination = document.getElementById('grid-pagination');
+    if (!pagination) return;
+
+    pagination.hidden = pageCount <= 1;
+    document.getElementById('page-info').textContent = `Halaman ${gridPage} dari ${pageCount}`;
+    document.getElementById('page-prev').disabled = gridPage <= 1;
+    document.getElementById('page-next').disabled = gridPage >= pageCount;
+}
+
+function createNoDataElement() {
+    const element = document.createElement('div');
+    element.className = 'no-data';
+    element.innerHTML = `
+        <svg xmlns="http://www.w3.org/2000/svg" width="48" height="48" viewBox="0 0 24 24" fill="none"
+            stroke="currentColor" stroke-width="2">
+            <path d="M23 19a2 2 0 0 1-2 2H3a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h4l2-3h6l2 3h4a2 2 0 0 1 2 2z"></path>
+            <circle cx="12" cy="13" r="4"></circle>
+        </svg>
+        <p>Belum ada data CCTV</p>
+    `;
+    return element;
+}
+
 // ================================
 // Grid Layout
 // ================================
@@ -440,122 +791,214 @@ function initMap() {
         maxZoom: 19
     }).addTo(map);
 
-    // Add markers for all CCTV
-    addMapMarkers();
+    mapLayer = L.layerGroup().addTo(map);
+
+    // Cluster/marker diminta ulang dari server setiap viewport berubah
+    map.on('moveend', () => refreshMapLayer());
+    refreshMapLayer(true);
 }
 
-function addMapMarkers() {
-    if (!map || cctvData.length === 0) return;
+// Ambil cluster (atau marker individual di zoom tinggi) untuk viewport saat ini
+async function refreshMapLayer(fitToData = false) {
+    if (!map) return;
 
-    // Clear existing markers
-    markers.forEach(marker => map.removeLayer(marker));
-    markers = [];
+    const seq = ++mapRequestSeq;
+    const bounds = map.getBounds().pad(0.2);
+    const bbox = [
+        Math.max(-180, bounds.getWest()),
+        Math.max(-90, bounds.getSouth()),
+        Math.min(180, bounds.getEast()),
+        Math.min(90, bounds.getNorth())
+    ].map(value => value.toFixed(6)).join(',');
 
-    // Add markers
-    let addedCount = 0;
-    cctvData.forEach(cctv => {
-        // Skip if coordinates are truly missing (null)
-        if (cctv.latitude === null || cctv.longitude === null) {
-            console.warn(`Skipping CCTV ${cctv.id} due to missing coordinates`);
+    const params = new URLSearchParams({ zoom: map.getZoom(), bbox: bbox });
+    if (currentFilter !== 'all') params.set('kecamatan', currentFilter);
+
+    try {
+        const response = await fetch(`/api/cctv/clusters/?${params}`);
+        const result = await response.json();
+        if (seq !== mapRequestSeq) return; // Sudah ada permintaan yang lebih baru
+        if (!result.success) {
+            console.error("Failed to fetch map clusters:", result.error);
             return;
         }
 
-        // Convert to float just in case they are strings
-        const lat = parseFloat(cctv.latitude);
-        const lng = parseFloat(cctv.longitude);
+        mapLayer.clearLayers();
+        markerById = new Map();
+        mapMode = result.mode;
 
-        if (isNaN(lat) || isNaN(lng)) {
-            console.error(`Invalid coordinates for CCTV ${cctv.id}:`, cctv.latitude, cctv.longitude);
-            return;
+        if (result.mode === 'points') {
+            result.data.forEach(cctv => addMarker(cctv));
+        } else {
+            result.clusters.forEach(cluster => {
+                // Cluster berisi satu CCTV tampil sebagai marker biasa
+                const cctv = cluster.count === 1 ? cctvById.get(cluster.id) : null;
+                if (cctv) {
+                    addMarker(cctv);
+                } else {
+                    mapLayer.addLayer(createClusterMarker(cluster));
+                }
+            });
+
+            if (fitToData && result.extent) {
+                const [minLng, minLat, maxLng, maxLat] = result.extent;
+                map.fitBounds(L.latLngBounds([minLat, minLng], [maxLat, maxLng]).pad(0.1), { maxZoom: 15 });
+            }
         }
+    } catch (error) {
+        console.error("Error fetching map clusters:", error);
+    }
+}
 
-        // Custom marker icon based on status
-        const isActive = cctv.is_active;
-        const statusClass = isActive ? '' : 'inactive';
-
-        const cctvIcon = L.divIcon({
-            className: 'custom-marker-container',
-            html: `
-                <div class="custom-marker ${statusClass}">
-                    <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="white" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round">
-                        <path d="M23 19a2 2 0 0 1-2 2H3a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h4l2-3h6l2 3h4a2 2 0 0 1 2 2z"></path>
-                        <circle cx="12" cy="13" r="4"></circle>
-                    </svg>
-                </div>
-            `,
-            iconSize: [32, 32],
-            iconAnchor: [16, 16],
-            popupAnchor: [0, -16]
-        });
+// Minta ulang cluster sekali setelah beberapa perubahan data beruntun
+function scheduleMapRefresh() {
+    if (!map) return;
+    clearTimeout(mapRefreshTimer);
+    mapRefreshTimer = setTimeout(() => refreshMapLayer(), MAP_REFRESH_DELAY_MS);
+}
 
-        const marker = L.marker([lat, lng], {
-            icon: cctvIcon,
-            title: cctv.nama_lokasi
-        });
+function addMarker(cctv) {
+    const marker = createMarker(cctv);
+    if (!marker) return;
+    mapLayer.addLayer(marker);
+    markerById.set(cctv.id, marker);
+}
 
-        // Current status label
-        const statusLabel = isActive ? 'Aktif' : 'Tidak Aktif';
-        const statusBadgeClass = isActive ? 'active' : 'inactive';
-
-        // Create popup content
-        const popupContent = `
-            <div class="popup-content">
-                <div class="popup-header-row">
-                    <h4 class="popup-title">${escapeHtml(cctv.nama_lokasi)}</h4>
-                    <span class="cctv-status ${statusBadgeClass}">
-                        <span class="status-dot"></span>
-                        ${statusLabel}
-                    </span>
-                </div>
-                <p class="popup-kecamatan">${escapeHtml(cctv.kecamatan)}</p>
-                <div class="cctv-video-container popup-video-wrapper" data-video-id="${cctv.youtube_video_id}" data-title="${escapeHtml(cctv.nama_lokasi)}">
-                    <div class="video-placeholder" onclick="loadVideo(this.parentElement)">
-                        <img src="https://img.youtube.com/vi/${cctv.youtube_video_id}/hqdefault.jpg" alt="${escapeHtml(cctv.nama_lokasi)}" class="video-thumbnail" loading="lazy">
-                        <div class="play-button small">
-                            <svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="currentColor">
-                                <path d="M8 5v14l11-7z"></path>
-                            </svg>
-                        </div>
+// Marker cluster: jumlah CCTV, warna menurut proporsi yang tidak aktif
+function createClusterMarker(cluster) {
+    const sizeClass = cluster.count >= 1000 ? 'large' : cluster.count >= 100 ? 'medium' : 'small';
+    const statusClass = cluster.inactive === 0 ? '' : cluster.active === 0 ? 'inactive' : 'mixed';
+    const size = sizeClass === 'large' ? 52 : sizeClass === 'medium' ? 44 : 36;
+
+    const icon = L.divIcon({
+        className: 'cluster-marker-container',
+        html: `<div class="cluster-marker ${sizeClass} ${statusClass}"><span>${cluster.count}</span></div>`,
+        iconSize: [size, size],
+        iconAnchor: [size / 2, size / 2]
+    });
+
+    const marker = L.marker([cluster.latitude, cluster.longitude], { icon: icon });
+    marker.bindTooltip(`${cluster.count} CCTV: ${cluster.active} aktif, ${cluster.inactive} tidak aktif`);
+
+    // Klik cluster: zoom ke area CCTV di dalamnya
+    marker.on('click', () => {
+        const [minLng, minLat, maxLng, maxLat] = cluster.bounds;
+        const clusterBounds = L.latLngBounds([minLat, minLng], [maxLat, maxLng]);
+        const targetZoom = Math.min(map.getBoundsZoom(clusterBounds), map.getMaxZoom());
+        if (targetZoom > map.getZoom()) {
+            map.fitBounds(clusterBounds.pad(0.1));
+        } else {
+            map.setView([cluster.latitude, cluster.longitude], map.getZoom() + 2);
+        }
+    });
+
+    return marker;
+}
+
+// Buat marker Leaflet untuk satu CCTV (null jika koordinat tidak valid)
+function createMarker(cctv) {
+    // Skip if coordinates are truly missing (null)
+    if (cctv.latitude === null || cctv.longitude === null) {
+        console.warn(`Skipping CCTV ${cctv.id} due to missing coordinates`);
+        return null;
+    }
+
+    // Convert to float just in case they are strings
+    const lat = parseFloat(cctv.latitude);
+    const lng = parseFloat(cctv.longitude);
+
+    if (isNaN(lat) || isNaN(lng)) {
+        console.error(`Invalid coordinates for CCTV ${cctv.id}:`, cctv.latitude, cctv.longitude);
+        return null;
+    }
+
+    // Custom marker icon based on status
+    const isActive = cctv.is_active;
+    const statusClass = isActive ? '' : 'inactive';
+
+    const cctvIcon = L.divIcon({
+        className: 'custom-marker-container',
+        html: `
+            <div class="custom-marker ${statusClass}">
+                <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="white" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round">
+                    <path d="M23 19a2 2 0 0 1-2 2H3a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h4l2-3h6l2 3h4a2 2 0 0 1 2 2z"></path>
+                    <circle cx="12" cy="13" r="4"></circle>
+                </svg>
+            </div>
+        `,
+        iconSize: [32, 32],
+        iconAnchor: [16, 16],
+        popupAnchor: [0, -16]
+    });
+
+    const marker = L.marker([lat, lng], {
+        icon: cctvIcon,
+        title: cctv.nama_lokasi
+    });
+
+    // Current status label
+    const statusLabel = isActive ? 'Aktif' : 'Tidak Aktif';
+    const statusBadgeClass = isActive ? 'active' : 'inactive';
+
+    // Create popup content
+    const popupContent = `
+        <div class="popup-content">
+            <div class="popup-header-row">
+                <h4 class="popup-title">${escapeHtml(cctv.nama_lokasi)}</h4>
+                <span class="cctv-status ${statusBadgeClass}">
+                    <span class="status-dot"></span>
+                    ${statusLabel}
+                </span>
+            </div>
+            <p class="popup-kecamatan">${escapeHtml(cctv.kecamatan)}</p>
+            <div class="cctv-video-container popup-video-wrapper" data-video-id="${cctv.youtube_video_id}" data-title="${escapeHtml(cctv.nama_lokasi)}">
+                <div class="video-placeholder" onclick="loadVideo(this.parentElement)">
+                    <img src="https://img.youtube.com/vi/${cctv.youtube_video_id}/hqdefault.jpg" alt="${escapeHtml(cctv.nama_lokasi)}" class="video-thumbnail" loading="lazy">
+                    <div class="play-button small">
+                        <svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="currentColor">
+                            <path d="M8 5v14l11-7z"></path>
+                        </svg>
                     </div>
                 </div>
-                <button class="popup-btn" onclick="openFullscreen(${cctv.id}, '${escapeHtml(cctv.nama_lokasi)}', '${cctv.youtube_video_id}', '${escapeHtml(cctv.kecamatan)}')">
-                    Layar Penuh
-                </button>
             </div>
-        `;
+            <button class="popup-btn" onclick="openFullscreen(${cctv.id}, '${escapeHtml(cctv.nama_lokasi)}', '${cctv.youtube_video_id}', '${escapeHtml(cctv.kecamatan)}')">
+                Layar Penuh
+            </button>
+        </div>
+    `;
+
+    marker.bindPopup(popupContent, {
+        maxWidth: 320,
+        className: 'custom-popup'
+    });
 
-        marker.bindPopup(popupContent, {
-            maxWidth: 320,
-            className: 'custom-popup'
-        });
+    // Store kecamatan_id for filtering
+    marker.kecamatanId = cctv.kecamatan_id;
 
-        // Store kecamatan_id for filtering
-        marker.kecamatanId = cctv.kecamatan_id;
+    return marker;
+}
 
-        marker.addTo(map);
-        markers.push(marker);
-        addedCount++;
-    });
+// Ganti marker satu CCTV yang sedang tampil dengan data terbaru; CCTV di dalam
+// cluster cukup memicu permintaan ulang cluster (jumlah aktif/tidak aktif berubah)
+function updateMarker(cctv) {
+    if (!map) return;
 
-    console.log(`Added ${addedCount} markers to map`);
+    const oldMarker = markerById.get(cctv.id);
+    if (!oldMarker) {
+        scheduleMapRefresh();
+        return;
+    }
 
-    // Fit bounds only if markers exist and map is likely visible
-    if (markers.length > 0) {
-        const group = new L.featureGroup(markers);
-        if (group.getBounds().isValid()) {
-            map.fitBounds(group.getBounds().pad(0.1), { maxZoom: 15 });
-        }
+    mapLayer.removeLayer(oldMarker);
+    markerById.delete(cctv.id);
+    if (currentFilter === 'all' || String(cctv.kecamatan_id) === currentFilter) {
+        addMarker(cctv);
     }
 }
 
 function updateMapMarkers(kecamatanId) {
-    markers.forEach(marker => {
-        if (kecamatanId === 'all' || marker.kecamatanId.toString() === kecamatanId) {
-            marker.addTo(map);
-        } else {
-            map.removeLayer(marker);
-        }
-    });
+    // Filter kecamatan diterapkan di server (parameter ?kecamatan= pada cluster)
+    refreshMapLayer();
 }
 
 // ================================
@@ -617,6 +1060,16 @@ function initKeyboardShortcuts() {
             const mapBtn = document.querySelector('.view-btn[data-view="map"]');
             if (mapBtn) mapBtn.click();
         }
+
+        // PageUp / PageDown untuk pindah halaman grid
+        if (currentView === 'grid' && e.key === 'PageDown') {
+            e.preventDefault();
+            goToPage(gridPage + 1);
+        }
+        if (currentView === 'grid' && e.key === 'PageUp') {
+            e.preventDefault();
+            goToPage(gridPage - 1);
+        }
     });
 }
 
@@ -0,0 +1,76 @@
+"""
+Statistik agregat dashboard (per kecamatan dan total)
+
+Semua angka dihitung dengan satu query agregat ber-GROUP BY kecamatan,
+sehingga jumlah query tetap konstan berapapun banyaknya kecamatan/CCTV.
+Hasilnya di-cache per versi data (lihat data_version) dengan TTL pendek,
+karena jumlah CCTV "stale" juga bergantung pada waktu.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .data_version import get_data_version
+from .models import Kecamatan
+
+STATS_KEY_PREFIX = 'dashboard:stats:'
+
+# Lama hasil statistik di-cache (detik) selama versi data tidak berubah
+STATS_CACHE_TIMEOUT = 30
+
+# CCTV dianggap stale jika belum dicek selama ini (detik); default 3x interval checker
+DEFAULT_STALE_AFTER = 900
+
+
+def stale_after_seconds() -> int:
+    return getattr(settings, 'CCTV_STATUS_STALE_AFTER', DEFAULT_STALE_AFTER)
+
+
+def compute_dashboard_stats() -> dict:
+    """Hitung statistik langsung dari database (satu query)"""
+    stale_after = stale_after_seconds()
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+
+    rows = Kecamatan.objects.annotate(
+        total=Count('cctv_list'),
+        active=Count('cctv_list', filter=Q(cctv_list__is_active=True)),
+        stale=Count(
+            'cctv_list',
+            filter=Q(cctv_list__last_status_check__isnull=True) | Q(cctv_list__last_status_check__lt=cutoff),
+        ),
+        last_check=Max('cctv_list__last_status_check'),
+    ).values('id', 'nama', 'total', 'active', 'stale', 'last_check')
+
+    kecamatan = []
+    for row in rows:
+        row['inactive'] = row['total'] - row['active']
+        kecamatan.append(row)
+
+    last_checks = [row['last_check'] for row in kecamatan if row['last_check']]
+
+    return {
+        'total_cctv': sum(row['total'] for row in kecamatan),
+        'active': sum(row['active'] for row in kecamatan),
+        'inactive': sum(row['inactive'] for row in kecamatan),
+        'stale': sum(row['stale'] for row in kecamatan),
+        'total_kecamatan': len(kecamatan),
+        'last_check': max(last_checks) if last_checks else None,
+        'stale_after_seconds': stale_after,
+        'generated_at': now,
+        'kecamatan': kecamatan,
+    }
+
+
+def get_dashboard_stats() -> dict:
+    """Statistik dashboard dari cache (dihitung ulang jika versi data berubah atau TTL habis)"""
+    key = f'{STATS_KEY_PREFIX}{get_data_version()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, timeout=STATS_CACHE_TIMEOUT)
+    return stats
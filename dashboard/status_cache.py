@@ -0,0 +1,292 @@
+"""
+Cache status video YouTube per video ID
+
+Dua lapis cache:
+- Lokal (per proses): LRU dengan batas YOUTUBE_STATUS_CACHE_MAX_ENTRIES.
+- Bersama: Django cache framework (alias YOUTUBE_STATUS_CACHE_ALIAS), sehingga
+  semua worker gunicorn dan proses checker berbagi hasil yang sama.
+
+Lookup bersamaan untuk video ID yang sama digabung menjadi satu request keluar:
+dalam satu proses lewat single-flight (thread lain menunggu hasil leader),
+dan antar proses lewat lock singkat di cache bersama. View async memakai
+aget_or_fetch_status yang menggabungkan lookup dalam satu event loop.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 2048
+
+# Lama maksimum menunggu proses lain yang sedang mengecek video yang sama
+LOCK_TIMEOUT = 15
+LOCK_POLL_INTERVAL = 0.1
+
+KEY_PREFIX = 'yt-status:'
+LOCK_PREFIX = 'yt-status-lock:'
+
+# Status offline yang pasti dari YouTube. Hanya ini (dan status online) yang
+# di-cache; error sementara (koneksi, 5xx, 403/kuota) dicek ulang berikutnya
+NOT_FOUND_OR_PRIVATE_MESSAGE = "Video tidak ditemukan atau private"
+NOT_FOUND_MESSAGE = "Video tidak ditemukan"
+UPCOMING_MESSAGE = "Siaran belum dimulai (Upcoming)"
+OFFLINE_MESSAGE = "Siaran berakhir atau offline"
+OEMBED_NOT_FOUND_MESSAGE = "Video tidak ditemukan, private, atau telah dihapus"
+OEMBED_PRIVATE_MESSAGE = "Video private atau restricted"
+
+DEFINITIVE_OFFLINE_MESSAGES = frozenset({
+    NOT_FOUND_OR_PRIVATE_MESSAGE,
+    NOT_FOUND_MESSAGE,
+    UPCOMING_MESSAGE,
+    OFFLINE_MESSAGE,
+    OEMBED_NOT_FOUND_MESSAGE,
+    OEMBED_PRIVATE_MESSAGE,
+})
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Lookup async yang sedang berjalan: (event loop, video ID) -> Future
+_async_inflight = {}
+
+
+class _Flight:
+    """Lookup yang sedang berjalan untuk satu video ID"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+def _ttl() -> int:
+    return getattr(settings, 'YOUTUBE_STATUS_CACHE_TTL', DEFAULT_TTL)
+
+
+def _max_entries() -> int:
+    return getattr(settings, 'YOUTUBE_STATUS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'YOUTUBE_STATUS_CACHE_ALIAS', 'default')]
+
+
+def _local_get(video_id: str):
+    with _local_lock:
+        entry = _local.get(video_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _local[video_id]
+            return None
+        _local.move_to_end(video_id)
+        return value
+
+
+def _local_set(video_id: str, value: Tuple[bool, str]):
+    with _local_lock:
+        _local[video_id] = (time.monotonic() + _ttl(), value)
+        _local.move_to_end(video_id)
+        while len(_local) > _max_entries():
+            _local.popitem(last=False)
+
+
+def get_cached_status(video_id: str):
+    """Ambil status dari cache (lokal lalu bersama). None jika tidak ada."""
+    value = _local_get(video_id)
+    if value is not None:
+        return value
+
+    try:
+        cached = _shared_cache().get(KEY_PREFIX + video_id)
+    except Exception as e:
+        logger.warning(f"Status cache read error for {video_id}: {str(e)}")
+        return None
+
+    if cached is None:
+        return None
+    value = (bool(cached[0]), cached[1])
+    _local_set(video_id, value)
+    return value
+
+
+def get_many_cached_statuses(video_ids: list) -> dict:
+    """Ambil status beberapa video sekaligus; hanya video yang ada di cache yang dikembalikan"""
+    results = {}
+    missing = []
+    for video_id in video_ids:
+        value = _local_get(video_id)
+        if value is not None:
+            results[video_id] = value
+        else:
+            missing.append(video_id)
+
+    if missing:
+        try:
+            shared = _shared_cache().get_many([KEY_PREFIX + vid for vid in missing])
+        except Exception as e:
+            logger.warning(f"Status cache read error: {str(e)}")
+            shared = {}
+        for key, cached in shared.items():
+            video_id = key[len(KEY_PREFIX):]
+            value = (bool(cached[0]), cached[1])
+            _local_set(video_id, value)
+            results[video_id] = value
+
+    return results
+
+
+def is_definitive(value) -> bool:
+    """True jika (is_online, error_message) adalah status sebenarnya, bukan error sementara"""
+    return bool(value[0]) or value[1] in DEFINITIVE_OFFLINE_MESSAGES
+
+
+def set_cached_statuses(results: dict):
+    """
+    Simpan {video_id: (is_online, error_message)} ke cache lokal dan bersama.
+
+    Hanya hasil definitif (online / offline / tidak ditemukan) yang disimpan;
+    error koneksi, error API, kuota habis dan penundaan budget kuota tidak.
+    """
+    results = {vid: value for vid, value in results.items() if is_definitive(value)}
+    if not results:
+        return
+    for video_id, value in results.items():
+        _local_set(video_id, tuple(value))
+    try:
+        _shared_cache().set_many(
+            {KEY_PREFIX + vid: list(value) for vid, value in results.items()},
+            timeout=_ttl(),
+        )
+    except Exception as e:
+        logger.warning(f"Status cache write error: {str(e)}")
+
+
+def invalidate(video_id: str):
+    """Hapus status satu video dari cache"""
+    with _local_lock:
+        _local.pop(video_id, None)
+    try:
+        _shared_cache().delete(KEY_PREFIX + video_id)
+    except Exception as e:
+        logger.warning(f"Status cache delete error for {video_id}: {str(e)}")
+
+
+def get_or_fetch_status(video_id: str, fetch: Callable[[str], Tuple[bool, str]]) -> Tuple[bool, str]:
+    """
+    Ambil status dari cache, atau panggil fetch(video_id) jika belum ada.
+
+    Pemanggil bersamaan untuk video ID yang sama hanya menghasilkan satu
+    pemanggilan fetch; yang lain menunggu dan memakai hasil yang sama.
+    """
+    value = get_cached_status(video_id)
+    if value is not None:
+        return value
+
+    with _inflight_lock:
+        flight = _inflight.get(video_id)
+        leader = flight is None
+        if leader:
+            flight = _inflight[video_id] = _Flight()
+
+    if not leader:
+        flight.event.wait(LOCK_TIMEOUT + 5)
+        if flight.result is not None:
+            return flight.result
+        return fetch(video_id)
+
+    try:
+        flight.result = _fetch_with_shared_lock(video_id, fetch)
+        return flight.result
+    finally:
+        flight.event.set()
+        with _inflight_lock:
+            _inflight.pop(video_id, None)
+
+
+async def aget_or_fetch_status(video_id: str, fetch) -> Tuple[bool, str]:
+    """
+    Versi async get_or_fetch_status; fetch adalah coroutine function.
+
+    Pemanggil bersamaan di event loop yang sama menunggu satu Future milik
+    pemanggil pertama. Cache bersama dibaca dan ditulis lewat sync_to_async.
+    """
+    value = _local_get(video_id)
+    if value is None:
+        value = await sync_to_async(get_cached_status)(video_id)
+    if value is not None:
+        return value
+
+    loop = asyncio.get_running_loop()
+    key = (loop, video_id)
+    flight = _async_inflight.get(key)
+    if flight is not None:
+        try:
+            return await asyncio.shield(flight)
+        except asyncio.CancelledError:
+            # Hanya pemanggil pertama yang dibatalkan: cek sendiri
+            if not flight.cancelled():
+                raise
+        return await fetch(video_id)
+
+    flight = _async_inflight[key] = loop.create_future()
+    try:
+        value = await fetch(video_id)
+        await sync_to_async(set_cached_statuses)({video_id: value})
+        flight.set_result(value)
+        return value
+    except BaseException:
+        flight.cancel()
+        raise
+    finally:
+        _async_inflight.pop(key, None)
+
+
+def _fetch_with_shared_lock(video_id: str, fetch: Callable[[str], Tuple[bool, str]]) -> Tuple[bool, str]:
+    """Fetch dengan lock di cache bersama agar proses lain tidak mengecek video yang sama"""
+    cache = _shared_cache()
+    lock_key = LOCK_PREFIX + video_id
+
+    try:
+        acquired = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    except Exception:
+        acquired = True  # Cache bersama bermasalah, langsung fetch saja
+
+    if not acquired:
+        # Proses lain sedang mengecek video ini, tunggu hasilnya masuk cache
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = get_cached_status(video_id)
+            if value is not None:
+                return value
+            # Lock dilepas tanpa hasil di cache (error sementara): cek sendiri
+            try:
+                if cache.get(lock_key) is None:
+                    break
+            except Exception:
+                break
+
+    try:
+        value = fetch(video_id)
+        set_cached_statuses({video_id: value})
+        return value
+    finally:
+        if acquired:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                pass
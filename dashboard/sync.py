@@ -0,0 +1,136 @@
+"""
+Sinkronisasi delta data CCTV untuk dashboard (parameter ?since= di API CCTV)
+
+Cursor adalah waktu server (ISO 8601) saat respons sebelumnya dibuat. Delta
+berisi CCTV yang dibuat, diubah (updated_at) atau dicek ulang
+(last_status_check) setelah cursor, ditambah ID CCTV yang dihapus (dari
+CCTVTombstone). Cursor dimundurkan sedikit (SYNC_CURSOR_OVERLAP) agar baris
+yang di-commit terlambat tidak terlewat; item ganda aman karena klien
+menerapkan delta secara idempoten.
+"""
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CCTV, CCTVTombstone
+
+# Cursor dimundurkan sekian detik untuk menutup celah transaksi yang commit terlambat
+SYNC_CURSOR_OVERLAP = 5
+
+# Tombstone disimpan selama ini; cursor yang lebih tua harus sinkron penuh
+DEFAULT_TOMBSTONE_RETENTION = 7 * 24 * 60 * 60
+
+
+def tombstone_retention() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'CCTV_TOMBSTONE_RETENTION', DEFAULT_TOMBSTONE_RETENTION))
+
+
+def format_cursor(moment) -> str:
+    return moment.isoformat()
+
+
+def parse_cursor(value: str):
+    """
+    Ubah string cursor menjadi datetime aware.
+
+    Raises:
+        ValueError: Jika format cursor tidak valid
+    """
+    moment = parse_datetime(value or '')
+    if moment is None:
+        raise ValueError(f'Cursor tidak valid: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def requires_full_sync(since) -> bool:
+    """True jika cursor lebih tua dari masa simpan tombstone"""
+    return since < timezone.now() - tombstone_retention()
+
+
+def serialize_cctv(cctv: CCTV) -> dict:
+    """Representasi JSON satu CCTV (sama untuk respons penuh maupun delta)"""
+    return {
+        'id': cctv.id,
+        'nama_lokasi': cctv.nama_lokasi,
+        'kecamatan': cctv.kecamatan.nama,
+        'kecamatan_id': cctv.kecamatan.id,
+        'youtube_video_id': cctv.youtube_video_id,
+        'youtube_embed_url': cctv.youtube_embed_url,
+        'latitude': float(cctv.latitude) if cctv.latitude else None,
+        'longitude': float(cctv.longitude) if cctv.longitude else None,
+        'is_active': cctv.is_active,
+        'deskripsi': cctv.deskripsi or '',
+        'last_status_check': cctv.last_status_check,
+    }
+
+
+def build_cctv_payload(kecamatan_id=None) -> dict:
+    """Payload lengkap daftar CCTV (API /api/cctv/ dan data awal halaman dashboard)"""
+    # Cursor diambil sebelum query agar perubahan selama query tidak terlewat
+    cursor = timezone.now()
+    cctv_queryset = CCTV.objects.all().select_related('kecamatan')
+
+    if kecamatan_id:
+        cctv_queryset = cctv_queryset.filter(kecamatan_id=kecamatan_id)
+
+    cctv_data = [serialize_cctv(cctv) for cctv in cctv_queryset]
+
+    return {
+        'success': True,
+        'full': True,
+        'cursor': format_cursor(cursor),
+        'count': len(cctv_data),
+        'data': cctv_data,
+        'deleted': [],
+    }
+
+
+def get_changes(since, kecamatan_id=None) -> dict:
+    """
+    Ambil perubahan CCTV setelah cursor.
+
+    Args:
+        since: datetime cursor dari respons sebelumnya
+        kecamatan_id: Filter kecamatan (opsional, tidak berlaku untuk ID terhapus)
+
+    Returns:
+        dict payload delta beserta cursor berikutnya
+    """
+    # Cursor berikutnya diambil sebelum query agar perubahan selama query tidak terlewat
+    cursor = timezone.now()
+    window_start = since - timedelta(seconds=SYNC_CURSOR_OVERLAP)
+
+    queryset = CCTV.objects.select_related('kecamatan').filter(
+        Q(updated_at__gt=window_start) | Q(last_status_check__gt=window_start)
+    )
+    if kecamatan_id:
+        queryset = queryset.filter(kecamatan_id=kecamatan_id)
+
+    data = [serialize_cctv(cctv) for cctv in queryset]
+    deleted = list(
+        CCTVTombstone.objects.filter(deleted_at__gt=window_start)
+        .order_by()
+        .values_list('cctv_id', flat=True)
+        .distinct()
+    )
+
+    return {
+        'success': True,
+        'full': False,
+        'cursor': format_cursor(cursor),
+        'count': len(data),
+        'data': data,
+        'deleted': deleted,
+    }
+
+
+def record_deletion(cctv_id: int):
+    """Catat tombstone CCTV terhapus dan buang tombstone yang sudah lewat masa simpan"""
+    CCTVTombstone.objects.create(cctv_id=cctv_id)
+    CCTVTombstone.objects.filter(deleted_at__lt=timezone.now() - tombstone_retention()).delete()
@@ -0,0 +1,116 @@
+"""
+Generator data CCTV sintetis untuk load testing dan benchmark
+"""
+
+import base64
+import random
+
+from django.db import transaction
+
+from .data_version import bump_data_version_on_commit
+from .models import CCTV, Kecamatan
+
+# Perkiraan bounding box tiap kecamatan: (lat_min, lat_max, lng_min, lng_max)
+KECAMATAN_BOUNDS = {
+    'Pontianak Utara': (-0.0150, 0.0100, 109.3100, 109.3450),
+    'Pontianak Timur': (-0.0400, -0.0200, 109.3450, 109.3750),
+    'Pontianak Selatan': (-0.0650, -0.0400, 109.3300, 109.3550),
+    'Pontianak Barat': (-0.0300, -0.0100, 109.3100, 109.3350),
+    'Pontianak Kota': (-0.0500, -0.0200, 109.3300, 109.3550),
+    'Pontianak Tenggara': (-0.0750, -0.0500, 109.3500, 109.3750),
+}
+
+STREET_NAMES = [
+    'Ahmad Yani', 'Gajah Mada', 'Tanjungpura', 'Diponegoro', 'Sultan Abdurrahman',
+    'Veteran', 'Khatulistiwa', 'Gusti Situt Mahmud', 'Sutan Syahrir', 'Kom Yos Sudarso',
+    'Pak Kasih', 'Husein Hamzah', 'Ampera', 'Imam Bonjol', 'Sungai Raya Dalam',
+    'Purnama', 'Parit Haji Husin', 'Adisucipto', 'Hasanuddin', 'Merdeka',
+]
+
+# (format nama lokasi, format kata kunci pencarian)
+LOCATION_FORMATS = [
+    ('Simpang Jl. {a} - Jl. {b}', '{a} {b}'),
+    ('Jl. {a}', '{a}'),
+    ('Jl. {a} (Depan Pasar)', '{a} Pasar'),
+    ('Bundaran Jl. {a}', 'Bundaran {a}'),
+]
+
+BATCH_SIZE = 1000
+
+DEFAULT_CHANNELS = 20
+
+
+def _random_id(rng: random.Random, length: int) -> str:
+    """ID acak bergaya YouTube (karakter base64 URL-safe)"""
+    raw = rng.getrandbits(length * 6).to_bytes((length * 6 + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(raw).decode('ascii')[:length]
+
+
+def ensure_kecamatan() -> list:
+    """Pastikan semua kecamatan di KECAMATAN_BOUNDS ada, kembalikan objeknya"""
+    existing = {kec.nama: kec for kec in Kecamatan.objects.filter(nama__in=KECAMATAN_BOUNDS)}
+    missing = [Kecamatan(nama=nama) for nama in KECAMATAN_BOUNDS if nama not in existing]
+    Kecamatan.objects.bulk_create(missing)
+    return list(Kecamatan.objects.filter(nama__in=KECAMATAN_BOUNDS).order_by('nama'))
+
+
+def build_synthetic_cctv(count: int, kecamatan_list: list, seed: int = 0,
+                         channels: int = DEFAULT_CHANNELS, video_pool: int = 0):
+    """
+    Generator objek CCTV sintetis (belum disimpan) yang tersebar di bounding box kecamatan.
+
+    Args:
+        count: Jumlah CCTV
+        kecamatan_list: Objek Kecamatan (nama harus ada di KECAMATAN_BOUNDS)
+        seed: Seed generator acak (hasil sama untuk seed yang sama)
+        channels: Jumlah channel YouTube sintetis (0 = tanpa channel/auto-discovery)
+        video_pool: Jumlah video ID yang dipakai bersama; 0 = video ID unik per CCTV
+    """
+    rng = random.Random(seed)
+    channel_ids = ['UC' + _random_id(rng, 22) for _ in range(channels)]
+    shared_video_ids = [_random_id(rng, 11) for _ in range(video_pool)]
+
+    for i in range(count):
+        kecamatan = kecamatan_list[i % len(kecamatan_list)]
+        lat_min, lat_max, lng_min, lng_max = KECAMATAN_BOUNDS[kecamatan.nama]
+        street_a, street_b = rng.sample(STREET_NAMES, 2)
+        name_format, keyword_format = rng.choice(LOCATION_FORMATS)
+        nama = name_format.format(a=street_a, b=street_b)
+
+        yield CCTV(
+            nama_lokasi=f'{nama} #{i + 1}',
+            kecamatan=kecamatan,
+            youtube_video_id=rng.choice(shared_video_ids) if shared_video_ids else _random_id(rng, 11),
+            youtube_channel_id=rng.choice(channel_ids) if channel_ids else None,
+            search_keyword=f'{keyword_format.format(a=street_a, b=street_b)} {i + 1}',
+            latitude=round(rng.uniform(lat_min, lat_max), 7),
+            longitude=round(rng.uniform(lng_min, lng_max), 7),
+            is_active=rng.random() < 0.9,
+            deskripsi=f'CCTV sintetis di {nama}',
+        )
+
+
+def seed_synthetic_cctv(count: int, seed: int = 0, channels: int = DEFAULT_CHANNELS,
+                        video_pool: int = 0, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Buat sejumlah CCTV sintetis dengan bulk_create per chunk dalam satu transaksi.
+
+    Returns:
+        int: Jumlah CCTV yang dibuat
+    """
+    created = 0
+    with transaction.atomic():
+        kecamatan_list = ensure_kecamatan()
+        batch = []
+        for cctv in build_synthetic_cctv(count, kecamatan_list, seed, channels, video_pool):
+            batch.append(cctv)
+            if len(batch) >= batch_size:
+                CCTV.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            CCTV.objects.bulk_create(batch)
+            created += len(batch)
+        # bulk_create tidak memicu signal, jadi versi data dinaikkan manual
+        bump_data_version_on_commit()
+    return created
@@ -0,0 +1,455 @@
+import asyncio
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import admin, checker, events, metrics, quota, scheduler, utils
+from .models import (
+    CCTV, CheckSchedule, MetricSeries, QuotaUsage, StatusChangeEvent, StatusCheckJob, StatusCheckJobChunk,
+    UptimeRollup,
+)
+from .synthetic import seed_synthetic_cctv
+
+
+@override_settings(SCHEDULER_MIN_INTERVAL=60, SCHEDULER_MAX_INTERVAL=3600, SCHEDULER_BASE_INTERVAL=300)
+class SchedulerTests(TestCase):
+    """Interval adaptif dan lease penjadwal (check_cctv_status --schedule)"""
+
+    def setUp(self):
+        cache.clear()
+        seed_synthetic_cctv(20)
+        scheduler.ensure_schedules()
+
+    def test_stable_camera_backs_off_up_to_max_interval(self):
+        interval, score = scheduler.next_interval(300, 0.0, changed=False)
+        self.assertEqual(interval, int(300 * scheduler.BACKOFF_FACTOR))
+        self.assertEqual(score, 0.0)
+        self.assertEqual(scheduler.next_interval(3000, 0.0, changed=False)[0], 3600)
+
+    def test_changed_camera_drops_to_min_interval(self):
+        self.assertEqual(scheduler.next_interval(3600, 0.0, changed=True), (60, 1.0))
+        # Skor flapping meluruh: setelah beberapa cek stabil interval kembali naik
+        interval, score = scheduler.next_interval(60, 1.0, changed=False)
+        self.assertLess(score, scheduler.FLAP_THRESHOLD)
+        self.assertGreater(interval, 60)
+
+    def test_claim_is_exclusive_until_lease_expires(self):
+        now = timezone.now()
+        first = scheduler.claim_due('A', 10, now=now)
+        self.assertEqual(len(first), 10)
+        second = scheduler.claim_due('B', 20, now=now)
+        self.assertEqual(len(second), 10)
+        self.assertFalse({c.pk for c in first} & {c.pk for c in second})
+
+    def test_expired_lease_owner_cannot_overwrite_new_owner(self):
+        now = timezone.now()
+        stale = scheduler.claim_due('A', 5, now=now)
+        later = now + timedelta(seconds=scheduler.lease_seconds() + 1)
+        taken = scheduler.claim_due('B', 5, now=later)
+        self.assertEqual({c.pk for c in stale}, {c.pk for c in taken})
+
+        self.assertEqual(scheduler.filter_leased(stale), [])
+        self.assertEqual(scheduler.reschedule(stale, set(), set()), 0)
+        self.assertEqual(scheduler.release(stale), 0)
+        self.assertEqual(CheckSchedule.objects.filter(leased_by='B').count(), 5)
+
+        self.assertEqual(len(scheduler.filter_leased(taken)), 5)
+        self.assertEqual(scheduler.reschedule(taken, set(), set()), 5)
+        self.assertFalse(CheckSchedule.objects.exclude(leased_by='').exists())
+
+    def test_reschedule_moves_next_check_into_the_future(self):
+        batch = scheduler.claim_due('A', 5)
+        changed = {batch[0].pk}
+        scheduler.reschedule(batch, changed, set())
+        schedules = CheckSchedule.objects.in_bulk([c.pk for c in batch])
+        self.assertEqual(schedules[batch[0].pk].interval, 60)
+        self.assertEqual(schedules[batch[1].pk].interval, int(300 * scheduler.BACKOFF_FACTOR))
+        self.assertTrue(all(s.next_check_at > timezone.now() for s in schedules.values()))
+
+    def test_cycle_stops_when_full_run_holds_the_lock(self):
+        checked = []
+
+        def check_batch(batch):
+            checked.append(batch)
+            cache.add(scheduler.CHECK_LOCK_KEY, 'full-run', timeout=60)
+            return {'snapshots': {}, 'deferred': []}
+
+        totals = scheduler.run_cycle(check_batch, deadline=float('inf'), worker_id='A', batch_size=5)
+        self.assertTrue(totals['stopped_by_full_run'])
+        self.assertEqual(len(checked), 1)
+        self.assertEqual(CCTV.objects.count(), 20)
+
+
+class StatusJobTests(TestCase):
+    """Antrian job run_status_jobs: klaim, pemulihan worker mati, hasil per chunk"""
+
+    def setUp(self):
+        cache.clear()
+        seed_synthetic_cctv(5)
+
+    def test_job_is_claimed_once(self):
+        job = StatusCheckJob.enqueue()
+        claimed = checker.claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, StatusCheckJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(checker.claim_next_job())
+
+    def test_stale_job_is_requeued_then_failed(self):
+        job = StatusCheckJob.enqueue()
+        for _ in range(checker.JOB_MAX_ATTEMPTS):
+            self.assertEqual(checker.claim_next_job().pk, job.pk)
+            StatusCheckJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            checker.recover_stale_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusCheckJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, checker.JOB_MAX_ATTEMPTS)
+
+    def test_results_are_readable_while_job_runs(self):
+        job = StatusCheckJob.enqueue()
+        job = checker.claim_next_job()
+        seen = []
+
+        def fake_check(video_ids, max_workers=1):
+            response = self.client.get(f'/api/jobs/{job.pk}/')
+            seen.append(len(response.json()['results']))
+            return {vid: (True, '') for vid in video_ids}
+
+        with mock.patch.object(checker, 'JOB_CHUNK_SIZE', 2), \
+                mock.patch('dashboard.utils.check_multiple_videos', fake_check):
+            checker.run_status_job(job)
+
+        self.assertEqual(seen, [0, 2, 4])
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusCheckJob.STATUS_DONE)
+        self.assertEqual((job.done, job.online), (5, 5))
+        self.assertEqual([r['id'] for r in job.collected_results()], sorted(CCTV.objects.values_list('pk', flat=True)))
+
+    def test_taken_over_job_stops_without_writing(self):
+        job = StatusCheckJob.enqueue()
+        job = checker.claim_next_job()
+        # Worker lain sudah mengambil alih percobaan berikutnya
+        StatusCheckJob.objects.filter(pk=job.pk).update(attempts=job.attempts + 1)
+
+        with mock.patch('dashboard.utils.check_multiple_videos',
+                        lambda ids, max_workers=1: {vid: (True, '') for vid in ids}):
+            checker.run_status_job(job)
+
+        self.assertFalse(StatusCheckJobChunk.objects.filter(job=job).exists())
+        self.assertEqual(StatusCheckJob.objects.get(pk=job.pk).status, StatusCheckJob.STATUS_RUNNING)
+
+
+@mock.patch.object(events, 'POLL_INTERVAL', 0.01)
+class StatusStreamTests(TestCase):
+    """SSE melanjutkan dari Last-Event-ID lewat poller bersama"""
+
+    def _event(self, cctv_id):
+        return StatusChangeEvent.objects.create(
+            cctv_id=cctv_id, is_active=True, youtube_video_id=f'vid{cctv_id}', checked_at=timezone.now(),
+        )
+
+    async def test_resume_from_last_event_id(self):
+        create = sync_to_async(self._event)
+        first = await create(1)
+        second = await create(2)
+
+        resumed = events.astream_events(first.id)
+        live = events.astream_events()
+        self.assertTrue((await anext(resumed)).startswith('retry:'))
+        self.assertTrue((await anext(live)).startswith('retry:'))
+        # Event sebelum terhubung dikirim ulang hanya ke stream yang resume
+        self.assertTrue((await anext(resumed)).startswith(f'id: {second.id}\n'))
+
+        third = await create(3)
+        self.assertTrue((await anext(resumed)).startswith(f'id: {third.id}\n'))
+        self.assertTrue((await anext(live)).startswith(f'id: {third.id}\n'))
+
+        poller = events.get_poller()
+        self.assertEqual(poller._subscribers, 2)
+        await resumed.aclose()
+        await live.aclose()
+        await asyncio.sleep(0.05)
+        self.assertIsNone(poller._task)
+
+
+class BenchmarkViewsTests(TestCase):
+    """benchmark_views memakai cache privat, cache bersama tidak ikut dikosongkan"""
+
+    def test_cold_iterations_do_not_clear_shared_cache(self):
+        from django.test import Client
+        from .management.commands import benchmark_views
+
+        cache.set('benchmark-sentinel', 'keep', timeout=None)
+        measured = []
+
+        def run(command, sizes, views, iterations, seed):
+            measured.append(command._measure(Client(), '/api/stats/', 2))
+            return []
+
+        creation = benchmark_views.connection.creation
+        with mock.patch.object(benchmark_views, 'setup_test_environment'), \
+                mock.patch.object(benchmark_views, 'teardown_test_environment'), \
+                mock.patch.object(creation, 'create_test_db', return_value='unused'), \
+                mock.patch.object(creation, 'destroy_test_db'), \
+                mock.patch.object(benchmark_views.Command, '_run', run):
+            call_command('benchmark_views', sizes='10', iterations=1, stdout=StringIO())
+
+        self.assertEqual(cache.get('benchmark-sentinel'), 'keep')
+        self.assertLessEqual(measured[0]['queries'], 2)
+
+
+class AdminChangelistTests(TestCase):
+    """Paginator changelist (estimasi jumlah baris) dan pengurutan kolom uptime"""
+
+    def setUp(self):
+        cache.clear()
+        seed_synthetic_cctv(3)
+
+    def _fake_connection(self, vendor, rows):
+        connection = mock.MagicMock(vendor=vendor)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (rows,)
+        return connection, cursor
+
+    def test_estimate_is_read_from_table_statistics(self):
+        for vendor, table in (('postgresql', 'pg_class'), ('mysql', 'information_schema.TABLES')):
+            connection, cursor = self._fake_connection(vendor, 123456)
+            with mock.patch.object(admin, 'connections', {'default': connection}):
+                self.assertEqual(admin.EstimatedCountPaginator._estimated_rows(CCTV.objects.all()), 123456)
+            self.assertIn(table, cursor.execute.call_args[0][0])
+            self.assertEqual(cursor.execute.call_args[0][1], [CCTV._meta.db_table])
+
+        connection, cursor = self._fake_connection('sqlite', 123456)
+        with mock.patch.object(admin, 'connections', {'default': connection}):
+            self.assertIsNone(admin.EstimatedCountPaginator._estimated_rows(CCTV.objects.all()))
+        cursor.execute.assert_not_called()
+
+    def test_large_unfiltered_table_uses_estimate(self):
+        with mock.patch.object(admin.EstimatedCountPaginator, '_estimated_rows', return_value=50000):
+            self.assertEqual(admin.EstimatedCountPaginator(CCTV.objects.all(), 100).count, 50000)
+            # Dengan filter estimasi tabel tidak berlaku
+            filtered = CCTV.objects.filter(is_active=True)
+            self.assertEqual(admin.EstimatedCountPaginator(filtered, 100).count, filtered.count())
+
+    def test_small_table_uses_cached_count(self):
+        with mock.patch.object(admin.EstimatedCountPaginator, '_estimated_rows', return_value=5):
+            self.assertEqual(admin.EstimatedCountPaginator(CCTV.objects.all(), 100).count, 3)
+        # COUNT(*) kedua dibaca dari cache (versi data sama)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(admin.EstimatedCountPaginator(CCTV.objects.all(), 100).count, 3)
+        self.assertFalse([q for q in captured.captured_queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_uptime_column_sorts_by_availability(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+        from .uptime import day_start
+
+        mostly_up, half_up, _ = CCTV.objects.order_by('pk')
+        today = day_start(timezone.now())
+        UptimeRollup.objects.create(cctv=mostly_up, period=UptimeRollup.PERIOD_DAY, period_start=today,
+                                    observed_seconds=100, online_seconds=90, checks=1)
+        UptimeRollup.objects.create(cctv=half_up, period=UptimeRollup.PERIOD_DAY, period_start=today,
+                                    observed_seconds=10000, online_seconds=5000, checks=1)
+
+        model_admin = site._registry[CCTV]
+        order_field = model_admin.uptime_7d.admin_order_field
+        queryset = model_admin.get_queryset(RequestFactory().get('/'))
+        ranked = list(queryset.filter(uptime_observed__gt=0).order_by(f'-{order_field}'))
+        self.assertEqual(ranked, [mostly_up, half_up])
+
+
+class MetricsTests(TestCase):
+    """Agregasi metrik lintas proses dan pensiun proses lama tanpa menurunkan counter"""
+
+    def setUp(self):
+        cache.clear()
+        self.state = mock.patch.multiple(
+            metrics, _series={}, _dirty=set(), _written={}, _baseline={}, _last_written_at=None,
+        )
+        self.state.start()
+        self.addCleanup(self.state.stop)
+
+    def _total(self, name, labels=''):
+        return metrics._collect_shared().get((name, labels), [0, 0, []])
+
+    def test_series_from_all_processes_are_summed(self):
+        metrics.inc('cctv_checker_checked_total', 3, mode='schedule')
+        metrics.observe('cctv_youtube_request_duration_seconds', 0.2, endpoint='videos')
+        metrics.flush()
+        MetricSeries.objects.create(process='other:1', name='cctv_checker_checked_total',
+                                    labels='mode="schedule"', value=4, updated_at=timezone.now())
+
+        self.assertEqual(self._total('cctv_checker_checked_total', 'mode="schedule"')[0], 7)
+        histogram = self._total('cctv_youtube_request_duration_seconds', 'endpoint="videos"')
+        self.assertEqual(histogram[1], 1)
+        self.assertEqual(sum(histogram[2]), 1)
+        self.assertIn('cctv_checker_checked_total{mode="schedule"} 7', metrics.render())
+
+    def test_retiring_stale_process_keeps_totals(self):
+        old = timezone.now() - timedelta(days=metrics.DEFAULT_STALE_DAYS + 1)
+        for process, value in (('gone:1', 5), ('gone:2', 6)):
+            MetricSeries.objects.create(process=process, name='cctv_checker_checked_total',
+                                        labels='', value=value, updated_at=old)
+        MetricSeries.objects.create(process='alive:1', name='cctv_checker_checked_total',
+                                    labels='', value=1, updated_at=timezone.now())
+
+        self.assertEqual(metrics.retire_stale_processes(), 2)
+        self.assertEqual(self._total('cctv_checker_checked_total')[0], 12)
+        self.assertEqual(
+            set(MetricSeries.objects.values_list('process', flat=True)), {'alive:1', metrics.RETIRED_PROCESS}
+        )
+        # Pensiun berikutnya tidak menghitung ulang baris 'retired'
+        self.assertEqual(metrics.retire_stale_processes(), 0)
+        self.assertEqual(self._total('cctv_checker_checked_total')[0], 12)
+
+    def test_scrape_retires_at_most_once_per_interval(self):
+        with mock.patch.object(metrics, 'retire_stale_processes') as retire:
+            metrics._collect_shared()
+            metrics._collect_shared()
+        self.assertEqual(retire.call_count, 1)
+
+    def test_process_retired_while_alive_only_writes_the_difference(self):
+        metrics.inc('cctv_checker_checked_total', 5)
+        metrics.flush()
+        later = timezone.now() + timedelta(days=metrics.DEFAULT_STALE_DAYS + 1)
+        metrics.retire_stale_processes(now=later)
+        self.assertEqual(self._total('cctv_checker_checked_total')[0], 5)
+
+        metrics.inc('cctv_checker_checked_total', 2)
+        with mock.patch.object(metrics.timezone, 'now', return_value=later):
+            metrics.flush()
+        self.assertEqual(self._total('cctv_checker_checked_total')[0], 7)
+
+
+@override_settings(YOUTUBE_DAILY_QUOTA=8640, YOUTUBE_QUOTA_BURST=200, YOUTUBE_QUOTA_DISCOVERY_RESERVE=50)
+class QuotaTests(TestCase):
+    """Token bucket kuota YouTube: batas lintas proses, prioritas discovery, reset harian Pacific"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _at(self, moment):
+        """Jalankan governor seolah-olah sekarang adalah moment (zona Pacific)"""
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return moment.astimezone(tz) if tz else moment
+
+        return mock.patch.object(quota, 'datetime', FrozenDatetime)
+
+    def test_burst_then_refill(self):
+        # Tepat setelah reset: hanya burst (200 unit) yang tersedia
+        midnight = datetime(2026, 10, 17, tzinfo=quota.PACIFIC_TZ)
+        with self._at(midnight):
+            self.assertEqual(sum(quota.try_consume('videos') for _ in range(210)), 200)
+            self.assertFalse(quota.try_consume('videos'))
+        # 8640 unit/hari = 1 unit per 10 detik
+        with self._at(midnight + timedelta(seconds=100)):
+            self.assertEqual(sum(quota.try_consume('videos') for _ in range(20)), 10)
+        self.assertEqual(QuotaUsage.objects.get(endpoint='videos').denied, 21)
+
+    def test_usage_of_other_processes_counts_against_the_bucket(self):
+        midnight = datetime(2026, 10, 17, tzinfo=quota.PACIFIC_TZ)
+        with self._at(midnight):
+            self.assertTrue(quota.try_consume('videos'))
+            # Proses lain memakai sisa burst lewat baris total yang sama
+            QuotaUsage.objects.filter(endpoint=quota.TOTAL_ENDPOINT).update(units=200)
+            self.assertFalse(quota.try_consume('videos'))
+            self.assertEqual(quota.available_tokens(), 0)
+
+    def test_discovery_is_deferred_before_status_checks(self):
+        midnight = datetime(2026, 10, 17, tzinfo=quota.PACIFIC_TZ)
+        with self._at(midnight):
+            self.assertTrue(quota.try_consume('search', quota.PRIORITY_LOW))
+            # Sisa 100 token: search (100 + cadangan 50) ditunda, videos.list tetap jalan
+            self.assertFalse(quota.try_consume('search', quota.PRIORITY_LOW))
+            self.assertTrue(quota.try_consume('videos'))
+            status = quota.get_quota_status()
+        self.assertEqual(status['spent'], 101)
+        self.assertEqual(set(status['endpoints']), {'search', 'videos'})
+
+    def test_bucket_resets_at_pacific_midnight(self):
+        before = datetime(2026, 10, 17, 23, 59, tzinfo=quota.PACIFIC_TZ)
+        with self._at(before):
+            quota.mark_exhausted()
+            self.assertFalse(quota.try_consume('videos'))
+        with self._at(before + timedelta(minutes=2)):
+            self.assertEqual(quota.quota_day().isoformat(), '2026-10-18')
+            self.assertTrue(quota.try_consume('videos'))
+            self.assertEqual(quota.spent_today(), 1)
+
+    def test_total_row_starts_from_existing_ledger(self):
+        midnight = datetime(2026, 10, 17, tzinfo=quota.PACIFIC_TZ)
+        QuotaUsage.objects.create(date=midnight.date(), endpoint='videos', units=150, calls=150)
+        with self._at(midnight):
+            self.assertEqual(sum(quota.try_consume('videos') for _ in range(60)), 50)
+
+
+@override_settings(YOUTUBE_HTTP_MAX_RETRIES=2, YOUTUBE_HTTP_BACKOFF_BASE=0)
+class YouTubeClientRetryTests(TestCase):
+    """Retry yang sampai ke API ikut dicatat di ledger kuota"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _response(self, status):
+        return mock.Mock(status_code=status, content=b'{}')
+
+    def test_retried_responses_are_charged(self):
+        import requests
+        from . import youtube_client
+
+        session = mock.Mock()
+        session.get.side_effect = [
+            self._response(503), requests.ConnectionError('refused'), self._response(200),
+        ]
+        self.assertTrue(quota.try_consume('videos'))
+        with mock.patch.object(youtube_client, 'get_session', return_value=session):
+            response = youtube_client.youtube_get('https://www.googleapis.com/youtube/v3/videos')
+
+        self.assertEqual(response.status_code, 200)
+        # Percobaan 1 (izin try_consume) + percobaan 3; percobaan 2 tidak sampai ke API
+        self.assertEqual(QuotaUsage.objects.get(endpoint='videos').units, 2)
+        self.assertEqual(quota.spent_today(), 2)
+
+
+class VideoChunkTests(TestCase):
+    """Pembagian chunk videos.list dan ETag per chunk"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stable_chunks_only_change_one_chunk(self):
+        ids = [f'vid{i:05d}' for i in range(1000)]
+        before = utils._stable_chunks(ids, utils.API_BATCH_SIZE)
+        after = utils._stable_chunks(ids + ['vid99999'], utils.API_BATCH_SIZE)
+
+        self.assertTrue(all(len(chunk) <= utils.API_BATCH_SIZE for chunk in after))
+        self.assertEqual(sorted(vid for chunk in after for vid in chunk), sorted(ids + ['vid99999']))
+        changed = {tuple(chunk) for chunk in after} - {tuple(chunk) for chunk in before}
+        self.assertEqual(len(changed), 1)
+
+    def _check_twice(self, use_etag):
+        response = mock.Mock(status_code=200, headers={'ETag': '"v1"'})
+        response.json.return_value = {'items': [{'id': 'abc', 'snippet': {'liveBroadcastContent': 'live'}}]}
+        with mock.patch.object(utils, 'youtube_get', return_value=response) as youtube_get:
+            for _ in range(2):
+                self.assertEqual(utils._check_video_chunk(['abc'], 'key', 5, use_etag), {'abc': (True, '')})
+        return [call.kwargs['headers'] for call in youtube_get.call_args_list]
+
+    def test_default_mode_sends_stored_etag(self):
+        self.assertEqual(self._check_twice(use_etag=True), [None, {'If-None-Match': '"v1"'}])
+        self.assertIsNotNone(cache.get(utils._chunk_etag_key(['abc'])))
+
+    def test_schedule_mode_skips_etag(self):
+        self.assertEqual(self._check_twice(use_etag=False), [None, None])
+        self.assertIsNone(cache.get(utils._chunk_etag_key(['abc'])))
@@ -0,0 +1,267 @@
+"""
+Rekap uptime/ketersediaan CCTV (rollup per jam dan per hari)
+
+Setiap kali hasil pengecekan disimpan (save_check_results), selang waktu sejak
+pengecekan sebelumnya ditambahkan ke rollup CCTV tersebut dengan status
+sebelumnya (status dianggap tetap di antara dua pengecekan), dipecah per jam
+dan per hari (zona waktu TIME_ZONE). Jumlah pengecekan dan kategori errornya
+dicatat di bucket waktu pengecekan.
+
+Laporan (/api/uptime/, kolom admin) hanya membaca rollup, sehingga biayanya
+bergantung pada panjang jendela laporan, bukan panjang riwayat.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import CCTV, UptimeRollup
+
+# Selang antar pengecekan lebih dari ini dianggap tidak terpantau (detik)
+DEFAULT_MAX_GAP = 900
+
+REPORT_CACHE_PREFIX = 'dashboard:uptime:'
+REPORT_CACHE_TIMEOUT = 60
+
+BATCH_SIZE = 500
+
+# Kategori error dicocokkan dari pesan status_check_error (huruf kecil)
+ERROR_CATEGORIES = (
+    ('offline', ('offline', 'belum dimulai')),
+    ('not_found', ('tidak ditemukan', 'private', 'restricted')),
+    ('api', ('api error', 'http error', 'kuota')),
+    ('network', ('koneksi', 'error:')),
+)
+
+# Periode rollup yang dibaca untuk tiap jendela laporan
+REPORT_WINDOWS = {
+    'day': UptimeRollup.PERIOD_HOUR,
+    'week': UptimeRollup.PERIOD_DAY,
+    'month': UptimeRollup.PERIOD_DAY,
+}
+
+
+def error_category(message: str) -> str:
+    """Kategori singkat untuk pesan error pengecekan"""
+    text = (message or '').lower()
+    for category, needles in ERROR_CATEGORIES:
+        if any(needle in text for needle in needles):
+            return category
+    return 'other'
+
+
+def hour_start(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment):
+    return timezone.localtime(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def window_start(window: str, now=None):
+    """Awal jendela laporan 'day' (24 jam), 'week' (7 hari) atau 'month' (30 hari)"""
+    now = now or timezone.now()
+    if window == 'day':
+        return hour_start(now) - timedelta(hours=23)
+    days = 7 if window == 'week' else 30
+    return day_start(now) - timedelta(days=days - 1)
+
+
+def _period_start(period: str, moment):
+    return hour_start(moment) if period == UptimeRollup.PERIOD_HOUR else day_start(moment)
+
+
+def _next_period(period: str, start):
+    if period == UptimeRollup.PERIOD_HOUR:
+        return start + timedelta(hours=1)
+    # Tambah satu hari kalender di zona lokal
+    return day_start(start + timedelta(hours=36))
+
+
+def _new_delta():
+    return {'observed_seconds': 0.0, 'online_seconds': 0.0, 'checks': 0, 'errors': Counter()}
+
+
+def _collect_deltas(cctv_list: list, snapshots: dict, previous_checks: dict, checked_at) -> dict:
+    max_gap = timedelta(seconds=getattr(settings, 'UPTIME_MAX_GAP', DEFAULT_MAX_GAP))
+    deltas = defaultdict(_new_delta)
+
+    for cctv in cctv_list:
+        for period in (UptimeRollup.PERIOD_HOUR, UptimeRollup.PERIOD_DAY):
+            bucket = deltas[(cctv.pk, period, _period_start(period, checked_at))]
+            bucket['checks'] += 1
+            if cctv.status_check_error:
+                bucket['errors'][error_category(cctv.status_check_error)] += 1
+
+            previous = previous_checks.get(cctv.pk)
+            snapshot = snapshots.get(cctv.pk)
+            if previous is None or snapshot is None or previous >= checked_at:
+                continue
+
+            # Selang sejak pengecekan sebelumnya, dengan status sebelumnya
+            was_active = snapshot[0]
+            start = max(previous, checked_at - max_gap)
+            while start < checked_at:
+                period_start = _period_start(period, start)
+                end = min(checked_at, _next_period(period, period_start))
+                seconds = (end - start).total_seconds()
+                interval = deltas[(cctv.pk, period, period_start)]
+                interval['observed_seconds'] += seconds
+                if was_active:
+                    interval['online_seconds'] += seconds
+                start = end
+
+    return deltas
+
+
+def _apply_deltas(deltas: dict):
+    cctv_ids = {key[0] for key in deltas}
+    starts = {key[2] for key in deltas}
+    existing = {
+        (rollup.cctv_id, rollup.period, rollup.period_start): rollup
+        for rollup in UptimeRollup.objects.filter(cctv_id__in=cctv_ids, period_start__in=starts)
+    }
+
+    to_update = []
+    to_create = []
+    for key, delta in deltas.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            rollup = UptimeRollup(cctv_id=key[0], period=key[1], period_start=key[2], errors={})
+            to_create.append(rollup)
+        else:
+            to_update.append(rollup)
+        rollup.observed_seconds += round(delta['observed_seconds'])
+        rollup.online_seconds += round(delta['online_seconds'])
+        rollup.checks += delta['checks']
+        errors = Counter(rollup.errors)
+        errors.update(delta['errors'])
+        rollup.errors = dict(errors)
+
+    UptimeRollup.objects.bulk_update(
+        to_update, ['observed_seconds', 'online_seconds', 'checks', 'errors'], batch_size=BATCH_SIZE
+    )
+    UptimeRollup.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+
+
+def update_rollups(cctv_list: list, snapshots: dict, previous_checks: dict, checked_at):
+    """
+    Tambahkan hasil satu siklus pengecekan ke rollup per jam dan per hari.
+
+    Args:
+        cctv_list: Objek CCTV yang sudah berisi hasil pengecekan
+        snapshots: Dict {pk: snapshot_status(cctv)} sebelum pengecekan
+        previous_checks: Dict {pk: last_status_check sebelum pengecekan}
+        checked_at: Waktu pengecekan
+    """
+    deltas = _collect_deltas(cctv_list, snapshots, previous_checks, checked_at)
+    if not deltas:
+        return
+
+    try:
+        with transaction.atomic():
+            _apply_deltas(deltas)
+    except IntegrityError:
+        # Rollup yang sama baru dibuat proses lain (checker & worker job bersamaan), ulangi sekali
+        with transaction.atomic():
+            _apply_deltas(deltas)
+
+
+def _availability(online: int, observed: int):
+    if not observed:
+        return None
+    return round(online * 100 / observed, 2)
+
+
+def build_uptime_report(window: str, kecamatan_id=None) -> dict:
+    """Laporan ketersediaan per CCTV, per kecamatan dan keseluruhan dari rollup"""
+    since = window_start(window)
+    period = REPORT_WINDOWS[window]
+
+    cctv_queryset = CCTV.objects.order_by('kecamatan__nama', 'nama_lokasi')
+    rollups = UptimeRollup.objects.filter(period=period, period_start__gte=since)
+    if kecamatan_id:
+        cctv_queryset = cctv_queryset.filter(kecamatan_id=kecamatan_id)
+        rollups = rollups.filter(cctv__kecamatan_id=kecamatan_id)
+
+    totals = defaultdict(lambda: {'observed_seconds': 0, 'online_seconds': 0, 'checks': 0, 'errors': Counter()})
+    for row in rollups.order_by().values('cctv_id', 'observed_seconds', 'online_seconds', 'checks', 'errors'):
+        total = totals[row['cctv_id']]
+        total['observed_seconds'] += row['observed_seconds']
+        total['online_seconds'] += row['online_seconds']
+        total['checks'] += row['checks']
+        total['errors'].update(row['errors'] or {})
+
+    cameras = []
+    kecamatan = {}
+    overall = {'observed_seconds': 0, 'online_seconds': 0}
+    for cctv in cctv_queryset.values('id', 'nama_lokasi', 'kecamatan_id', 'kecamatan__nama'):
+        total = totals.get(cctv['id'], {'observed_seconds': 0, 'online_seconds': 0, 'checks': 0, 'errors': {}})
+        cameras.append({
+            'id': cctv['id'],
+            'nama_lokasi': cctv['nama_lokasi'],
+            'kecamatan_id': cctv['kecamatan_id'],
+            'observed_seconds': total['observed_seconds'],
+            'online_seconds': total['online_seconds'],
+            'availability': _availability(total['online_seconds'], total['observed_seconds']),
+            'checks': total['checks'],
+            'errors': dict(total['errors']),
+        })
+
+        kec = kecamatan.setdefault(cctv['kecamatan_id'], {
+            'id': cctv['kecamatan_id'],
+            'nama': cctv['kecamatan__nama'],
+            'observed_seconds': 0,
+            'online_seconds': 0,
+        })
+        for bucket in (kec, overall):
+            bucket['observed_seconds'] += total['observed_seconds']
+            bucket['online_seconds'] += total['online_seconds']
+
+    for bucket in list(kecamatan.values()) + [overall]:
+        bucket['availability'] = _availability(bucket['online_seconds'], bucket['observed_seconds'])
+
+    return {
+        'window': window,
+        'since': since,
+        'overall': overall,
+        'kecamatan': list(kecamatan.values()),
+        'cctv': cameras,
+    }
+
+
+def prune_rollups(now=None, daily_before=None) -> dict:
+    """
+    Hapus rollup yang tidak lagi terbaca laporan.
+
+    - Rollup per jam sebelum awal jendela laporan terpanjang.
+    - Rollup harian sebelum daily_before (None = disimpan selamanya).
+
+    Returns:
+        dict: {'hourly_deleted', 'daily_deleted'}
+    """
+    oldest = min(window_start(window, now) for window in REPORT_WINDOWS)
+    hourly_deleted, _ = UptimeRollup.objects.filter(
+        period=UptimeRollup.PERIOD_HOUR, period_start__lt=oldest
+    ).delete()
+
+    daily_deleted = 0
+    if daily_before is not None:
+        daily_deleted, _ = UptimeRollup.objects.filter(
+            period=UptimeRollup.PERIOD_DAY, period_start__lt=day_start(daily_before)
+        ).delete()
+    return {'hourly_deleted': hourly_deleted, 'daily_deleted': daily_deleted}
+
+
+def get_uptime_report(window: str, kecamatan_id=None) -> dict:
+    """Laporan ketersediaan dari cache (TTL pendek karena rollup berubah tiap siklus)"""
+    key = f'{REPORT_CACHE_PREFIX}{window}:{kecamatan_id or "all"}'
+    report = cache.get(key)
+    if report is None:
+        report = build_uptime_report(window, kecamatan_id)
+        cache.set(key, report, timeout=REPORT_CACHE_TIMEOUT)
+    return report
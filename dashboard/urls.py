@@ -14,6 +14,15 @@ urlpatterns = [
     # API endpoints
     path('api/cctv/', views.api_cctv_list, name='api_cctv_list'),
     path('api/kecamatan/', views.api_kecamatan_list, name='api_kecamatan_list'),
+    path('api/stats/', views.api_stats, name='api_stats'),
+    path('api/uptime/', views.api_uptime, name='api_uptime'),
+    path('api/cctv/clusters/', views.api_cctv_clusters, name='api_cctv_clusters'),
+    path('api/cctv/nearest/', views.api_cctv_nearest, name='api_cctv_nearest'),
+    path('api/cctv/stream/', views.api_status_stream, name='api_status_stream'),
     path('api/cctv/<int:cctv_id>/refresh-status/', views.api_refresh_cctv_status, name='api_refresh_cctv_status'),
     path('api/cctv/refresh-all-status/', views.api_refresh_all_status, name='api_refresh_all_status'),
+    path('api/jobs/<int:job_id>/', views.api_job_status, name='api_job_status'),
+    
+    # Monitoring (Prometheus)
+    path('metrics', views.prometheus_metrics, name='metrics'),
 ]
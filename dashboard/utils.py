@@ -3,24 +3,44 @@ Utility functions untuk Dashboard CCTV
 """
 
 
-import requests
+import hashlib
 import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from . import metrics, quota, status_cache, youtube_client
+from .discovery import BroadcastIndex
+from .youtube_client import youtube_get, youtube_get_async
 
 logger = logging.getLogger(__name__)
 
+# Lama penyimpanan ETag + hasil parse per chunk videos.list (detik)
+ETAG_CACHE_TIMEOUT = 24 * 60 * 60
 
-def check_youtube_video_status(video_id: str, timeout: int = 10) -> Tuple[bool, str]:
+# Maksimal ID per request videos.list
+API_BATCH_SIZE = 50
+
+DEFAULT_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+
+def check_youtube_video_status(video_id: str, timeout: int = 10, use_cache: bool = True) -> Tuple[bool, str]:
     """
     Cek status video YouTube (terutama live stream).
     
     Menggunakan YouTube Data API v3 jika API Key tersedia di settings.YOUTUBE_API_KEY.
     Jika tidak, fallback ke metode oEmbed (kurang akurat untuk status live).
+    Hasil disimpan di cache status bersama (lihat status_cache), dan lookup
+    bersamaan untuk video yang sama digabung menjadi satu request.
     
     Args:
         video_id: YouTube video ID
         timeout: Timeout untuk request dalam detik (default: 10)
+        use_cache: Gunakan cache status (default: True)
     
     Returns:
         Tuple[bool, str]: (is_online, error_message)
@@ -30,6 +50,13 @@ def check_youtube_video_status(video_id: str, timeout: int = 10) -> Tuple[bool,
     if not video_id or not video_id.strip():
         return False, "Video ID kosong"
     
+    if use_cache:
+        return status_cache.get_or_fetch_status(video_id, lambda vid: _fetch_video_status(vid, timeout))
+    return _fetch_video_status(video_id, timeout)
+
+
+def _fetch_video_status(video_id: str, timeout: int) -> Tuple[bool, str]:
+    """Internal helper: Cek status langsung ke YouTube tanpa cache"""
     # Prioritaskan menggunakan YouTube Data API jika Key tersedia
     api_key = getattr(settings, 'YOUTUBE_API_KEY', None)
     
@@ -40,49 +67,32 @@ def check_youtube_video_status(video_id: str, timeout: int = 10) -> Tuple[bool,
         return _check_with_oembed(video_id, timeout)
 
 
+def _api_url(endpoint: str) -> str:
+    """URL endpoint YouTube Data API v3 (base URL bisa diganti, misal untuk stand-in lokal)"""
+    base_url = getattr(settings, 'YOUTUBE_API_BASE_URL', DEFAULT_API_BASE_URL)
+    return f"{base_url.rstrip('/')}/{endpoint}"
+
+
+def _oembed_url(video_id: str) -> str:
+    return f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+
+
 def _check_with_data_api(video_id: str, api_key: str, timeout: int) -> Tuple[bool, str]:
     """Internal helper: Cek status menggunakan YouTube Data API v3"""
-    api_url = "https://www.googleapis.com/youtube/v3/videos"
     params = {
         'id': video_id,
         'key': api_key,
         'part': 'snippet',
     }
     
+    if not quota.try_consume('videos'):
+        return False, quota.QUOTA_DEFERRED_MESSAGE
+    
     try:
-        response = requests.get(api_url, params=params, timeout=timeout)
-        
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get('items', [])
-            
-            if not items:
-                return False, "Video tidak ditemukan atau private"
-            
-            snippet = items[0].get('snippet', {})
-            live_broadcast_content = snippet.get('liveBroadcastContent', 'none')
-            title = snippet.get('title', 'Unknown')
-            
-            # liveBroadcastContent values: 'live', 'upcoming', 'none'
-            if live_broadcast_content == 'live':
-                logger.info(f"API: Video {video_id} is LIVE: {title}")
-                return True, ""
-            elif live_broadcast_content == 'upcoming':
-                logger.info(f"API: Video {video_id} is UPCOMING: {title}")
-                return False, "Siaran belum dimulai (Upcoming)"
-            else:
-                logger.info(f"API: Video {video_id} is NOT LIVE (VOD/Offline): {title}")
-                return False, "Siaran berakhir atau offline"
-                
-        elif response.status_code == 403:
-            logger.error(f"API Key Error/Quota Exceeded for video {video_id}")
-            return False, "API Key Error atau Kuota Habis"
-        elif response.status_code == 404:
-            return False, "Video tidak ditemukan"
-        else:
-            logger.error(f"API Error {response.status_code} for video {video_id}")
-            return False, f"API Error: {response.status_code}"
-            
+        response = youtube_get(_api_url('videos'), params=params, timeout=timeout)
+        if response.status_code == 403:
+            _handle_forbidden(response)
+        return _parse_video_response(video_id, response)
     except Exception as e:
         logger.error(f"Exception checks video {video_id} with API: {str(e)}")
         # Jika API gagal total (koneksi putus dll), jangan fallback ke oEmbed karena hasilnya bisa misleading
@@ -90,109 +100,327 @@ def _check_with_data_api(video_id: str, api_key: str, timeout: int) -> Tuple[boo
         return False, f"Error koneksi API: {str(e)}"
 
 
-def _check_with_oembed(video_id: str, timeout: int) -> Tuple[bool, str]:
-    """Internal helper: Fallback cek status menggunakan oEmbed (hanya cek ketersediaan umum)"""
-    oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-    
-    try:
-        response = requests.get(oembed_url, timeout=timeout)
+def _parse_video_response(video_id: str, response) -> Tuple[bool, str]:
+    """Internal helper: Status video dari respons videos.list (requests maupun httpx)"""
+    if response.status_code == 200:
+        data = response.json()
+        items = data.get('items', [])
         
-        if response.status_code == 200:
-            # PENTING: oEmbed tidak bisa membedakan Live vs Offline (VOD)
-            # Selama videonya publik, dia akan return 200 OK.
-            # Ini sumber ketidakuratan yang lama.
-            data = response.json()
-            logger.info(f"oEmbed: Video {video_id} available: {data.get('title', 'Unknown')}")
-            return True, ""  # Diasumsikan aktif, walau mungkin VOD
+        if not items:
+            return False, status_cache.NOT_FOUND_OR_PRIVATE_MESSAGE
+        
+        snippet = items[0].get('snippet', {})
+        live_broadcast_content = snippet.get('liveBroadcastContent', 'none')
+        title = snippet.get('title', 'Unknown')
         
-        elif response.status_code == 404:
-            return False, "Video tidak ditemukan, private, atau telah dihapus"
-        elif response.status_code == 401:
-            return False, "Video private atau restricted"
+        # liveBroadcastContent values: 'live', 'upcoming', 'none'
+        if live_broadcast_content == 'live':
+            logger.info(f"API: Video {video_id} is LIVE: {title}")
+            return True, ""
+        elif live_broadcast_content == 'upcoming':
+            logger.info(f"API: Video {video_id} is UPCOMING: {title}")
+            return False, status_cache.UPCOMING_MESSAGE
         else:
-            return False, f"HTTP Error {response.status_code}"
+            logger.info(f"API: Video {video_id} is NOT LIVE (VOD/Offline): {title}")
+            return False, status_cache.OFFLINE_MESSAGE
             
+    elif response.status_code == 403:
+        logger.error(f"API Key Error/Quota Exceeded for video {video_id}")
+        return False, "API Key Error atau Kuota Habis"
+    elif response.status_code == 404:
+        return False, status_cache.NOT_FOUND_MESSAGE
+    else:
+        logger.error(f"API Error {response.status_code} for video {video_id}")
+        return False, f"API Error: {response.status_code}"
+
+
+def _check_with_oembed(video_id: str, timeout: int) -> Tuple[bool, str]:
+    """Internal helper: Fallback cek status menggunakan oEmbed (hanya cek ketersediaan umum)"""
+    try:
+        response = youtube_get(_oembed_url(video_id), timeout=timeout)
+        return _parse_oembed_response(video_id, response)
     except Exception as e:
         logger.error(f"oEmbed error for video {video_id}: {str(e)}")
         return False, f"Error: {str(e)}"
 
 
-def check_multiple_videos(video_ids: list, timeout: int = 10) -> dict:
+def _parse_oembed_response(video_id: str, response) -> Tuple[bool, str]:
+    """Internal helper: Status video dari respons oEmbed"""
+    if response.status_code == 200:
+        # PENTING: oEmbed tidak bisa membedakan Live vs Offline (VOD)
+        # Selama videonya publik, dia akan return 200 OK.
+        # Ini sumber ketidakuratan yang lama.
+        data = response.json()
+        logger.info(f"oEmbed: Video {video_id} available: {data.get('title', 'Unknown')}")
+        return True, ""  # Diasumsikan aktif, walau mungkin VOD
+    
+    elif response.status_code == 404:
+        return False, status_cache.OEMBED_NOT_FOUND_MESSAGE
+    elif response.status_code == 401:
+        return False, status_cache.OEMBED_PRIVATE_MESSAGE
+    else:
+        return False, f"HTTP Error {response.status_code}"
+
+
+async def check_youtube_video_status_async(video_id: str, timeout: int = 10, use_cache: bool = True) -> Tuple[bool, str]:
+    """
+    Versi async check_youtube_video_status untuk view async (deployment ASGI).
+    
+    Request ke YouTube memakai youtube_get_async sehingga event loop tetap
+    melayani request lain selama menunggu; akses ledger kuota dan cache
+    bersama (database) dijalankan lewat sync_to_async. Hasil dan pesan
+    error sama persis dengan versi sync.
+    """
+    if not video_id or not video_id.strip():
+        return False, "Video ID kosong"
+    
+    if use_cache:
+        return await status_cache.aget_or_fetch_status(video_id, lambda vid: _fetch_video_status_async(vid, timeout))
+    return await _fetch_video_status_async(video_id, timeout)
+
+
+async def _fetch_video_status_async(video_id: str, timeout: int) -> Tuple[bool, str]:
+    """Internal helper: Versi async _fetch_video_status"""
+    api_key = getattr(settings, 'YOUTUBE_API_KEY', None)
+    
+    if not api_key:
+        logger.warning("YOUTUBE_API_KEY tidak ditemukan. Menggunakan fallback oEmbed (kurang akurat).")
+        try:
+            response = await youtube_get_async(_oembed_url(video_id), timeout=timeout)
+            return _parse_oembed_response(video_id, response)
+        except Exception as e:
+            logger.error(f"oEmbed error for video {video_id}: {str(e)}")
+            return False, f"Error: {str(e)}"
+    
+    if not await sync_to_async(quota.try_consume)('videos'):
+        return False, quota.QUOTA_DEFERRED_MESSAGE
+    
+    params = {
+        'id': video_id,
+        'key': api_key,
+        'part': 'snippet',
+    }
+    try:
+        response = await youtube_get_async(_api_url('videos'), params=params, timeout=timeout)
+        if response.status_code == 403:
+            await sync_to_async(_handle_forbidden)(response)
+        return _parse_video_response(video_id, response)
+    except Exception as e:
+        logger.error(f"Exception checks video {video_id} with API: {str(e)}")
+        return False, f"Error koneksi API: {str(e)}"
+
+
+def check_multiple_videos(video_ids: list, timeout: int = 10, max_workers: int = 1, use_cache: bool = True,
+                          use_etag: bool = True) -> dict:
     """
     Cek status beberapa video sekaligus.
     Optimasi: Jika menggunakan API Key, bisa request batch hingga 50 ID sekaligus.
+
+    Dengan use_etag, ID dibagi ke bucket tetap berdasarkan hash ID (lihat
+    _stable_chunks) agar susunan chunk stabil antar siklus, sehingga ETag tiap
+    chunk bisa dipakai untuk conditional request (respons 304 memakai ulang
+    hasil parse sebelumnya). CCTV yang ditambah/dihapus hanya mengubah satu chunk.
+
+    Args:
+        video_ids: Daftar YouTube video ID (duplikat otomatis digabung)
+        timeout: Timeout untuk tiap request dalam detik (default: 10)
+        max_workers: Jumlah chunk/request yang dijalankan paralel (default: 1 = serial)
+        use_cache: Ambil dari cache status dulu, hanya video yang belum ada yang dicek (default: True).
+            Checker periodik memakai False agar chunk selalu berisi semua ID (ETag tetap cocok).
+        use_etag: Kirim If-None-Match dan simpan ETag per chunk (default: True). Penjadwal
+            adaptif memakai False karena isi batch-nya tidak pernah berulang.
     """
     if not video_ids:
         return {}
-        
+
+    # ID yang sama cukup dicek sekali (banyak CCTV berbagi satu video)
+    video_ids = sorted(set(vid for vid in video_ids if vid))
+
+    cached = status_cache.get_many_cached_statuses(video_ids) if use_cache else {}
+    missing = [vid for vid in video_ids if vid not in cached]
+    fetched = _fetch_multiple_videos(missing, timeout, max_workers, use_etag)
+    status_cache.set_cached_statuses(fetched)
+    return {**cached, **fetched}
+
+
+def _fetch_multiple_videos(video_ids: list, timeout: int, max_workers: int, use_etag: bool = True) -> dict:
+    """Internal helper: Cek status beberapa video langsung ke YouTube tanpa cache"""
+    if not video_ids:
+        return {}
+
     api_key = getattr(settings, 'YOUTUBE_API_KEY', None)
     results = {}
-    
+
     # Jika pakai API Key, gunakan fitur batch request v3/videos
     if api_key:
         # Chunk video_ids into batches of 50 (max limit youtube api)
-        chunk_size = 50
-        for i in range(0, len(video_ids), chunk_size):
-            chunk = video_ids[i:i + chunk_size]
-            ids_string = ','.join(chunk)
-            
-            api_url = "https://www.googleapis.com/youtube/v3/videos"
-            params = {
-                'id': ids_string,
-                'key': api_key,
-                'part': 'snippet',
-            }
-            
-            try:
-                response = requests.get(api_url, params=params, timeout=timeout)
-                if response.status_code == 200:
-                    data = response.json()
-                    items = {item['id']: item for item in data.get('items', [])}
-                    
-                    # Process each ID in this chunk
-                    for vid in chunk:
-                        item = items.get(vid)
-                        if item:
-                            snippet = item.get('snippet', {})
-                            live_status = snippet.get('liveBroadcastContent', 'none')
-                            
-                            if live_status == 'live':
-                                results[vid] = (True, "")
-                            elif live_status == 'upcoming':
-                                results[vid] = (False, "Siaran belum dimulai (Upcoming)")
-                            else:
-                                results[vid] = (False, "Siaran berakhir atau offline")
-                        else:
-                            results[vid] = (False, "Video tidak ditemukan atau private")
-                else:
-                    # Jika batch request gagal, fallback check satu-satu pake error message
-                    logger.error(f"Batch API Error {response.status_code}")
-                    for vid in chunk:
-                        results[vid] = (False, f"Batch API Error {response.status_code}")
-                        
-            except Exception as e:
-                logger.error(f"Batch API Exception: {str(e)}")
-                for vid in chunk:
-                    results[vid] = (False, f"Error: {str(e)}")
-                    
+        if use_etag:
+            chunks = _stable_chunks(video_ids, API_BATCH_SIZE)
+        else:
+            chunks = [video_ids[i:i + API_BATCH_SIZE] for i in range(0, len(video_ids), API_BATCH_SIZE)]
+        for chunk_results in _run_parallel(
+            lambda chunk: _check_video_chunk(chunk, api_key, timeout, use_etag), chunks, max_workers
+        ):
+            results.update(chunk_results)
         return results
 
     else:
-        # Fallback loop satu-satu pake oEmbed
-        for video_id in video_ids:
-            is_online, error_msg = check_youtube_video_status(video_id, timeout)
+        # Fallback satu-satu pake oEmbed
+        statuses = _run_parallel(
+            lambda video_id: check_youtube_video_status(video_id, timeout, use_cache=False), video_ids, max_workers
+        )
+        for video_id, (is_online, error_msg) in zip(video_ids, statuses):
             results[video_id] = (is_online, error_msg)
-        
+
         return results
 
 
+def _stable_chunks(video_ids: list, chunk_size: int) -> list:
+    """
+    Internal helper: Bagi ID ke bucket crc32(ID) mod jumlah bucket.
+
+    Jumlah bucket adalah pangkat dua terkecil dengan rata-rata isi <= chunk_size,
+    sehingga hanya berubah saat jumlah ID kira-kira berlipat dua. Bucket yang
+    kelebihan isi dipecah per chunk_size. Jumlah request sedikit lebih banyak
+    daripada chunk berurutan (bucket tidak selalu penuh), sebagai ganti ETag
+    chunk lain tetap cocok saat satu ID berubah.
+    """
+    count = 1
+    while len(video_ids) > count * chunk_size:
+        count *= 2
+    buckets = [[] for _ in range(count)]
+    for vid in sorted(video_ids):
+        buckets[zlib.crc32(vid.encode('utf-8')) % count].append(vid)
+    return [
+        bucket[i:i + chunk_size]
+        for bucket in buckets
+        for i in range(0, len(bucket), chunk_size)
+    ]
+
+
+def _check_video_chunk(chunk: list, api_key: str, timeout: int, use_etag: bool = True) -> dict:
+    """
+    Internal helper: Cek satu chunk (maks 50 ID) via endpoint batch v3/videos
+
+    ETag respons terakhir dan hasil parse-nya disimpan per chunk di cache.
+    Request berikutnya mengirim If-None-Match; jika YouTube membalas 304,
+    hasil sebelumnya dipakai ulang tanpa download dan parse ulang. Dengan
+    use_etag=False chunk selalu diambil penuh dan ETag tidak disimpan.
+    """
+    results = {}
+    api_url = _api_url('videos')
+    params = {
+        'id': ','.join(chunk),
+        'key': api_key,
+        'part': 'snippet',
+    }
+
+    if not quota.try_consume('videos'):
+        return {vid: (False, quota.QUOTA_DEFERRED_MESSAGE) for vid in chunk}
+
+    etag_key = _chunk_etag_key(chunk)
+    previous = cache.get(etag_key) if use_etag else None
+    headers = {'If-None-Match': previous['etag']} if previous else None
+
+    try:
+        response = youtube_get(api_url, params=params, timeout=timeout, headers=headers)
+        if response.status_code == 304 and previous:
+            youtube_client.record_not_modified()
+            return {vid: tuple(value) for vid, value in previous['results'].items()}
+
+        if response.status_code == 200:
+            parse_started = time.perf_counter()
+            data = response.json()
+            items = {item['id']: item for item in data.get('items', [])}
+
+            # Process each ID in this chunk
+            for vid in chunk:
+                item = items.get(vid)
+                if item:
+                    snippet = item.get('snippet', {})
+                    live_status = snippet.get('liveBroadcastContent', 'none')
+
+                    if live_status == 'live':
+                        results[vid] = (True, "")
+                    elif live_status == 'upcoming':
+                        results[vid] = (False, status_cache.UPCOMING_MESSAGE)
+                    else:
+                        results[vid] = (False, status_cache.OFFLINE_MESSAGE)
+                else:
+                    results[vid] = (False, status_cache.NOT_FOUND_OR_PRIVATE_MESSAGE)
+            youtube_client.record_parse_time(time.perf_counter() - parse_started)
+
+            etag = response.headers.get('ETag') or data.get('etag')
+            if etag and use_etag:
+                cache.set(etag_key, {
+                    'etag': etag,
+                    'results': {vid: list(value) for vid, value in results.items()},
+                }, timeout=ETAG_CACHE_TIMEOUT)
+        else:
+            # Jika batch request gagal, tandai semua ID di chunk dengan pesan error
+            logger.error(f"Batch API Error {response.status_code}")
+            if response.status_code == 403:
+                _handle_forbidden(response)
+            for vid in chunk:
+                results[vid] = (False, f"Batch API Error {response.status_code}")
+
+    except Exception as e:
+        logger.error(f"Batch API Exception: {str(e)}")
+        for vid in chunk:
+            results[vid] = (False, f"Error: {str(e)}")
+
+    return results
+
+
+def _chunk_etag_key(chunk: list) -> str:
+    """Internal helper: Key cache ETag untuk satu chunk (berdasarkan isi chunk)"""
+    digest = hashlib.sha1(','.join(chunk).encode('utf-8')).hexdigest()
+    return f'yt-etag:{digest}'
+
+
+def _run_parallel(func, items: list, max_workers: int = 1) -> list:
+    """
+    Internal helper: Jalankan func untuk setiap item, hasil dikembalikan sesuai urutan input.
+
+    Dengan max_workers > 1 request I/O dijalankan di thread pool terbatas,
+    sehingga total waktu mengikuti request paling lambat, bukan jumlah semuanya.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    def call_in_thread(item):
+        try:
+            return func(item)
+        finally:
+            # Koneksi database (ledger kuota, cache) milik thread ini ditutup
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(call_in_thread, items))
+
+
+def _handle_forbidden(response):
+    """Internal helper: Tandai kuota habis jika respons 403 disebabkan quotaExceeded"""
+    try:
+        errors = response.json().get('error', {}).get('errors', [])
+    except Exception:
+        return
+    if any(err.get('reason') in ('quotaExceeded', 'dailyLimitExceeded') for err in errors):
+        quota.mark_exhausted()
+
+
 def discover_live_video_by_keyword(channel_id: str, keyword: str, timeout: int = 15) -> Tuple[str, str]:
     """
     Cari video yang sedang LIVE di channel tertentu berdasarkan kata kunci di judul.
     
+    Daftar siaran live channel diambil lewat list_channel_live_broadcasts,
+    lalu judulnya dicocokkan secara lokal (lihat discovery.BroadcastIndex).
+    Untuk banyak CCTV sekaligus, gunakan list_multiple_channel_live_broadcasts
+    dan satu BroadcastIndex per channel agar tiap channel cukup dicari sekali.
+    
     Args:
         channel_id: ID Channel YouTube
-        keyword: Kata kunci (case-insensitive)
+        keyword: Kata kunci (case-insensitive, singkatan seperti "Jl." dikenali)
     
     Returns:
         Tuple[str, str]: (new_video_id, error_message)
@@ -201,46 +429,118 @@ def discover_live_video_by_keyword(channel_id: str, keyword: str, timeout: int =
     """
     if not channel_id or not keyword:
         return "", "Channel ID atau Keyword kosong"
+    
+    broadcasts, error_msg = list_channel_live_broadcasts(channel_id, timeout)
+    if error_msg:
+        metrics.inc('cctv_discovery_total', result='error')
+        return "", error_msg
+    
+    return match_live_video(BroadcastIndex(broadcasts), keyword)
+
+
+def match_live_video(index: BroadcastIndex, keyword: str, current_video_id: str = None) -> Tuple[str, str]:
+    """
+    Cocokkan keyword dengan indeks siaran live satu channel.
+    
+    current_video_id (video CCTV yang baru terdeteksi offline) hanya dipilih
+    jika tidak ada siaran lain yang cocok.
+    
+    Returns:
+        Tuple[str, str]: (video_id, "") jika cocok, ("", "Pesan error") jika tidak
+    """
+    if not len(index):
+        metrics.inc('cctv_discovery_total', result='miss')
+        return "", "Tidak ada siaran live di channel"
+    
+    found = index.match(keyword, offline_video_id=current_video_id)
+    if not found:
+        metrics.inc('cctv_discovery_total', result='miss')
+        return "", f"Siaran live ditemukan di channel, tapi judul tidak cocok dengan '{keyword}'"
+    
+    metrics.inc('cctv_discovery_total', result='hit')
+    video_id, title = found
+    logger.info(f"Auto-Discover: Found live video for '{keyword}': {video_id} ({title})")
+    return video_id, ""
+
+
+def list_channel_live_broadcasts(channel_id: str, timeout: int = 15) -> Tuple[list, str]:
+    """
+    Ambil semua siaran yang sedang LIVE di sebuah channel (dengan paging).
+    
+    Setiap halaman search.list berisi hingga 50 siaran dan berbiaya 100 unit
+    kuota; jumlah halaman dibatasi settings.YOUTUBE_DISCOVERY_MAX_PAGES.
+    
+    Returns:
+        Tuple[list, str]: ([(video_id, title), ...], error_message)
+    """
+    if not channel_id:
+        return [], "Channel ID kosong"
         
     api_key = getattr(settings, 'YOUTUBE_API_KEY', None)
     if not api_key:
-        return "", "YOUTUBE_API_KEY tidak dikonfigurasi"
+        return [], "YOUTUBE_API_KEY tidak dikonfigurasi"
 
-    api_url = "https://www.googleapis.com/youtube/v3/search"
+    api_url = _api_url('search')
     params = {
         'part': 'snippet',
         'channelId': channel_id,
         'type': 'video',
         'eventType': 'live',
-        'q': keyword,
         'key': api_key,
-        'maxResults': 5,
+        'maxResults': 50,
     }
+    max_pages = getattr(settings, 'YOUTUBE_DISCOVERY_MAX_PAGES', 4)
+    broadcasts = []
 
-    try:
-        response = requests.get(api_url, params=params, timeout=timeout)
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get('items', [])
-            
-            if not items:
-                return "", f"Tidak ada siaran live ditemukan dengan keyword '{keyword}'"
-            
-            # Cari yang paling cocok (case insensitive match di judul)
-            for item in items:
-                title = item['snippet']['title']
-                if keyword.lower() in title.lower():
-                    video_id = item['id']['videoId']
-                    logger.info(f"Auto-Discover: Found live video for '{keyword}': {video_id} ({title})")
-                    return video_id, ""
-            
-            return "", f"Siaran live ditemukan di channel, tapi judul tidak cocok dengan '{keyword}'"
-            
-        elif response.status_code == 403:
-            return "", "Kuota API YouTube habis atau akses ditolak"
-        else:
-            return "", f"API Error {response.status_code}"
-            
-    except Exception as e:
-        logger.error(f"Discovery error for {keyword}: {str(e)}")
-        return "", f"Koneksi Error: {str(e)}"
+    for _ in range(max_pages):
+        # search.list mahal (100 unit): ditunda lebih dulu saat budget menipis
+        if not quota.try_consume('search', priority=quota.PRIORITY_LOW):
+            if broadcasts:
+                break
+            return [], quota.DISCOVERY_DEFERRED_MESSAGE
+
+        try:
+            response = youtube_get(api_url, params=params, timeout=timeout)
+            if response.status_code == 200:
+                data = response.json()
+                for item in data.get('items', []):
+                    broadcasts.append((item['id']['videoId'], item['snippet']['title']))
+                
+                page_token = data.get('nextPageToken')
+                if not page_token:
+                    break
+                params['pageToken'] = page_token
+                
+            elif response.status_code == 403:
+                _handle_forbidden(response)
+                return broadcasts, "" if broadcasts else "Kuota API YouTube habis atau akses ditolak"
+            else:
+                return broadcasts, "" if broadcasts else f"API Error {response.status_code}"
+                
+        except Exception as e:
+            logger.error(f"Discovery error for channel {channel_id}: {str(e)}")
+            return broadcasts, "" if broadcasts else f"Koneksi Error: {str(e)}"
+
+    logger.info(f"Auto-Discover: Channel {channel_id} has {len(broadcasts)} live broadcasts")
+    return broadcasts, ""
+
+
+def list_multiple_channel_live_broadcasts(channel_ids: list, timeout: int = 15, max_workers: int = 1) -> dict:
+    """
+    Jalankan list_channel_live_broadcasts untuk beberapa channel sekaligus.
+
+    Args:
+        channel_ids: Daftar ID channel (duplikat otomatis digabung)
+        timeout: Timeout untuk tiap request dalam detik (default: 15)
+        max_workers: Jumlah channel yang dicari paralel (default: 1 = serial)
+
+    Returns:
+        dict: {channel_id: ([(video_id, title), ...], error_message)}
+    """
+    channel_ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+    found = _run_parallel(
+        lambda channel_id: list_channel_live_broadcasts(channel_id, timeout),
+        channel_ids,
+        max_workers,
+    )
+    return dict(zip(channel_ids, found))
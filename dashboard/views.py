@@ -2,95 +2,344 @@
 Views untuk Dashboard CCTV Lalu Lintas Kota Pontianak
 """
 
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import aget_object_or_404
+from django.template.loader import render_to_string
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.http import require_http_methods
-from .models import CCTV, Kecamatan
+from .clustering import CLUSTER_MAX_ZOOM, clusters_in_bbox, data_extent
+from .data_version import FRAGMENT_TIMEOUT, get_data_version, versioned_json_response, versioned_page_response
+from . import metrics
+from .events import astream_events, stream_events
+from .models import CCTV, StatusCheckJob
+from .spatial import DEFAULT_NEAREST_K, MAX_NEAREST_K, cctv_in_bbox, nearest_cctv, parse_bbox
+from .stats import get_dashboard_stats
+from .sync import build_cctv_payload, get_changes, parse_cursor, requires_full_sync
+from .uptime import REPORT_WINDOWS, get_uptime_report
+
+
+# Jumlah card grid per halaman (halaman pertama dirender server)
+DEFAULT_PAGE_SIZE = 24
 
 
 def index(request):
     """
     Halaman utama dashboard CCTV
     Menampilkan peta interaktif dan grid view CCTV
+    
+    Data semua CCTV disisipkan sekali sebagai JSON (json_script) untuk
+    script.js; hanya card halaman pertama yang dirender server, halaman lain
+    dibuat di browser saat dibuka.
+    
+    HTML halaman di-cache per versi data (ETag + Last-Modified, 304 untuk
+    klien yang masih punya salinan terbaru). Saat halaman harus dirender
+    ulang, grid dan filter kecamatan diambil dari cache fragmen template
+    (berumur pendek), sedangkan data CCTV untuk json_script dibaca ulang dari
+    database agar tidak ada salinan besar per versi di cache.
+    """
+    page_size = getattr(settings, 'DASHBOARD_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    status_stream = status_stream_enabled(request)
+    
+    def render_page():
+        # Dihitung saat pertama kali dipakai template (tidak sama sekali jika fragmen ada di cache)
+        cctv_payload = _memoize(build_cctv_payload)
+        stats = _memoize(get_dashboard_stats)
+        
+        context = {
+            'data_version': get_data_version(),
+            'fragment_timeout': FRAGMENT_TIMEOUT,
+            'cctv_payload': cctv_payload,
+            'cctv_list': lambda: cctv_payload()['data'][:page_size],
+            'page_size': page_size,
+            'page_count': lambda: max(1, math.ceil(cctv_payload()['count'] / page_size)),
+            'kecamatan_list': lambda: stats()['kecamatan'],
+            'total_cctv': lambda: stats()['total_cctv'],
+            'total_kecamatan': lambda: stats()['total_kecamatan'],
+            'stats': stats,
+            'status_stream': status_stream,
+        }
+        return render_to_string('dashboard/index.html', context, request)
+    
+    return versioned_page_response(
+        request, f'index:page_size={page_size}:stream={int(status_stream)}', render_page
+    )
+
+
+def status_stream_enabled(request) -> bool:
     """
-    # Ambil data untuk template (semua CCTV, termasuk yang tidak aktif)
-    cctv_list = CCTV.objects.all().select_related('kecamatan')
-    kecamatan_list = Kecamatan.objects.all()
+    True jika SSE status boleh dibuka: request dilayani ASGI, atau
+    STATUS_STREAM_SYNC diaktifkan (worker WSGI async seperti gevent).
     
-    context = {
-        'cctv_list': cctv_list,
-        'kecamatan_list': kecamatan_list,
-        'total_cctv': cctv_list.count(),
-        'total_kecamatan': kecamatan_list.count(),
-    }
+    Di worker WSGI sync, satu koneksi SSE menahan satu worker selama
+    STATUS_STREAM_MAX_DURATION, jadi klien memakai delta sync saja.
+    """
+    return isinstance(request, ASGIRequest) or getattr(settings, 'STATUS_STREAM_SYNC', False)
+
+
+def _memoize(func):
+    """Bungkus callable tanpa argumen agar hanya dievaluasi sekali"""
+    result = []
     
-    return render(request, 'dashboard/index.html', context)
+    def wrapper():
+        if not result:
+            result.append(func())
+        return result[0]
+    return wrapper
 
 
-def api_cctv_list(request):
+async def api_cctv_list(request):
     """
     API endpoint untuk mengambil data CCTV dalam format JSON
     Digunakan untuk peta interaktif dan filtering
+    
+    Respons di-cache per versi data; klien yang mengirim If-None-Match
+    dengan ETag terakhir mendapat 304 tanpa query database.
+    
+    Dengan parameter ?since=<cursor> hanya CCTV yang berubah/dicek ulang
+    setelah cursor dan ID CCTV yang dihapus yang dikembalikan.
+    
+    Dengan parameter ?bbox=minLng,minLat,maxLng,maxLat hanya CCTV di dalam
+    viewport yang dikembalikan (dibaca dari indeks spasial in-process).
     """
     # Filter berdasarkan kecamatan jika ada parameter
     kecamatan_id = request.GET.get('kecamatan')
+    if not kecamatan_id or kecamatan_id == 'all':
+        kecamatan_id = None
     
-    cctv_queryset = CCTV.objects.all().select_related('kecamatan')
+    bbox = request.GET.get('bbox')
+    if bbox:
+        try:
+            bbox = parse_bbox(bbox)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        cctv_data, truncated = await sync_to_async(cctv_in_bbox)(bbox, kecamatan_id)
+        return JsonResponse({
+            'success': True,
+            'bbox': bbox,
+            'count': len(cctv_data),
+            'truncated': truncated,
+            'data': cctv_data,
+        })
     
-    if kecamatan_id and kecamatan_id != 'all':
-        cctv_queryset = cctv_queryset.filter(kecamatan_id=kecamatan_id)
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_cursor(since)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        if not await sync_to_async(requires_full_sync)(since):
+            return JsonResponse(await sync_to_async(get_changes)(since, kecamatan_id))
     
-    cctv_data = []
-    for cctv in cctv_queryset:
-        cctv_data.append({
-            'id': cctv.id,
-            'nama_lokasi': cctv.nama_lokasi,
-            'kecamatan': cctv.kecamatan.nama,
-            'kecamatan_id': cctv.kecamatan.id,
-            'youtube_video_id': cctv.youtube_video_id,
-            'youtube_embed_url': cctv.youtube_embed_url,
-            'latitude': float(cctv.latitude) if cctv.latitude else None,
-            'longitude': float(cctv.longitude) if cctv.longitude else None,
-            'is_active': cctv.is_active,
-            'deskripsi': cctv.deskripsi or '',
-        })
+    def build_payload():
+        return build_cctv_payload(kecamatan_id)
+    
+    return await sync_to_async(versioned_json_response)(
+        request, f'cctv:kecamatan={kecamatan_id or "all"}', build_payload
+    )
+
+
+async def api_cctv_nearest(request):
+    """
+    API endpoint k CCTV terdekat dari suatu titik (misal lokasi kejadian)
+    
+    Parameter ?lat=&lng= (wajib) dan ?k= (default 5, maksimal 100).
+    Jarak dihitung dengan rumus haversine, dalam meter.
+    """
+    try:
+        lat = float(request.GET['lat'])
+        lng = float(request.GET['lng'])
+        k = int(request.GET.get('k', DEFAULT_NEAREST_K))
+    except (KeyError, ValueError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Parameter lat dan lng wajib berupa angka, k berupa bilangan bulat'
+        }, status=400)
+    
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or not (1 <= k <= MAX_NEAREST_K):
+        return JsonResponse({
+            'success': False,
+            'error': f'Koordinat di luar rentang atau k tidak di antara 1 dan {MAX_NEAREST_K}'
+        }, status=400)
     
+    cctv_data = await sync_to_async(nearest_cctv)(lat, lng, k)
     return JsonResponse({
         'success': True,
         'count': len(cctv_data),
-        'data': cctv_data
+        'data': cctv_data,
     })
 
 
-def api_kecamatan_list(request):
+async def api_cctv_clusters(request):
     """
-    API endpoint untuk mengambil daftar kecamatan
+    API endpoint marker peta yang sudah di-cluster untuk level zoom dan viewport
+    
+    Parameter ?zoom= (wajib), ?bbox=minLng,minLat,maxLng,maxLat dan ?kecamatan=<id>.
+    Sampai zoom CLUSTER_MAX_ZOOM respons berisi cluster (centroid, jumlah,
+    aktif/tidak aktif) dari piramida yang di-cache per versi data; di atasnya
+    respons berisi data CCTV individual di dalam bbox.
     """
-    kecamatan_list = Kecamatan.objects.all()
+    try:
+        zoom = int(request.GET['zoom'])
+        bbox = parse_bbox(request.GET['bbox']) if request.GET.get('bbox') else None
+    except KeyError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Parameter zoom wajib diisi'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
     
-    data = []
-    for kec in kecamatan_list:
-        data.append({
-            'id': kec.id,
-            'nama': kec.nama,
-            'jumlah_cctv': kec.cctv_list.filter(is_active=True).count()
+    kecamatan_id = request.GET.get('kecamatan')
+    if not kecamatan_id or kecamatan_id == 'all':
+        kecamatan_id = None
+    
+    if zoom > CLUSTER_MAX_ZOOM:
+        cctv_data, truncated = await sync_to_async(cctv_in_bbox)(bbox or (-180, -90, 180, 90), kecamatan_id)
+        return JsonResponse({
+            'success': True,
+            'mode': 'points',
+            'zoom': zoom,
+            'max_zoom': CLUSTER_MAX_ZOOM,
+            'count': len(cctv_data),
+            'truncated': truncated,
+            'data': cctv_data,
         })
     
+    clusters = await sync_to_async(clusters_in_bbox)(zoom, bbox, kecamatan_id)
+    extent = await sync_to_async(data_extent)(kecamatan_id)
+    return JsonResponse({
+        'success': True,
+        'mode': 'clusters',
+        'zoom': zoom,
+        'max_zoom': CLUSTER_MAX_ZOOM,
+        'extent': extent,
+        'count': len(clusters),
+        'total': sum(cluster['count'] for cluster in clusters),
+        'clusters': clusters,
+    })
+
+
+async def api_kecamatan_list(request):
+    """
+    API endpoint untuk mengambil daftar kecamatan
+    """
+    def build_payload():
+        data = []
+        for kec in get_dashboard_stats()['kecamatan']:
+            data.append({
+                'id': kec['id'],
+                'nama': kec['nama'],
+                'jumlah_cctv': kec['active']
+            })
+        
+        return {
+            'success': True,
+            'count': len(data),
+            'data': data
+        }
+    
+    return await sync_to_async(versioned_json_response)(request, 'kecamatan', build_payload)
+
+
+async def api_stats(request):
+    """
+    API endpoint statistik agregat: total, aktif, tidak aktif, stale
+    dan waktu pengecekan terakhir, per kecamatan maupun keseluruhan
+    """
+    stats = await sync_to_async(get_dashboard_stats)()
+    
     return JsonResponse({
         'success': True,
-        'count': len(data),
-        'data': data
+        **stats
     })
 
 
+async def api_uptime(request):
+    """
+    API endpoint laporan ketersediaan (uptime) per CCTV dan per kecamatan
+    
+    Parameter ?window=day|week|month (default day) dan ?kecamatan=<id>.
+    Data dibaca dari rollup per jam/hari, bukan dari riwayat mentah.
+    """
+    window = request.GET.get('window', 'day')
+    if window not in REPORT_WINDOWS:
+        return JsonResponse({
+            'success': False,
+            'error': f"window harus salah satu dari: {', '.join(REPORT_WINDOWS)}"
+        }, status=400)
+    
+    kecamatan_id = request.GET.get('kecamatan')
+    if not kecamatan_id or kecamatan_id == 'all':
+        kecamatan_id = None
+    
+    report = await sync_to_async(get_uptime_report)(window, kecamatan_id)
+    return JsonResponse({
+        'success': True,
+        **report
+    })
+
+
+def api_status_stream(request):
+    """
+    Server-Sent Events: perubahan status CCTV secara realtime
+    
+    Melanjutkan dari header Last-Event-ID (dikirim otomatis oleh EventSource
+    saat reconnect) atau parameter ?last_event_id=. Tanpa keduanya, hanya
+    perubahan berikutnya yang dikirim.
+    
+    Di worker WSGI sync (lihat status_stream_enabled) dibalas 204 No Content,
+    yang membuat EventSource berhenti reconnect.
+    """
+    if not status_stream_enabled(request):
+        return HttpResponse(status=204)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    # Di ASGI koneksi yang menunggu event tidak menahan thread (async generator)
+    if isinstance(request, ASGIRequest):
+        events = astream_events(last_event_id)
+    else:
+        events = stream_events(last_event_id)
+    
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Matikan buffering reverse proxy (nginx) agar event langsung terkirim
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @require_http_methods(["POST"])
-def api_refresh_cctv_status(request, cctv_id):
+async def api_refresh_cctv_status(request, cctv_id):
     """
     API endpoint untuk refresh status CCTV tertentu
+    
+    Request ke YouTube berjalan async, sehingga di deployment ASGI satu
+    proses bisa melayani banyak refresh bersamaan.
     """
     try:
-        cctv = get_object_or_404(CCTV, id=cctv_id)
-        is_online, error_msg = cctv.update_status_from_youtube()
+        cctv = await aget_object_or_404(CCTV, id=cctv_id)
+        is_online, error_msg = await cctv.aupdate_status_from_youtube()
         
         return JsonResponse({
             'success': True,
@@ -108,35 +357,69 @@ def api_refresh_cctv_status(request, cctv_id):
 
 
 @require_http_methods(["POST"])
-def api_refresh_all_status(request):
+async def api_refresh_all_status(request):
     """
-    API endpoint untuk refresh status semua CCTV
+    API endpoint untuk refresh status semua CCTV.
+    Pengecekan dijalankan di background oleh worker (run_status_jobs),
+    endpoint ini hanya membuat job dan langsung mengembalikan job id.
     """
     try:
-        cctv_list = CCTV.objects.all()
-        results = []
-        
-        for cctv in cctv_list:
-            is_online, error_msg = cctv.update_status_from_youtube()
-            results.append({
-                'id': cctv.id,
-                'nama_lokasi': cctv.nama_lokasi,
-                'is_active': is_online,
-                'error_message': error_msg
-            })
-        
-        online_count = sum(1 for r in results if r['is_active'])
-        offline_count = len(results) - online_count
+        job = await sync_to_async(StatusCheckJob.enqueue)()
         
         return JsonResponse({
             'success': True,
-            'total': len(results),
-            'online': online_count,
-            'offline': offline_count,
-            'results': results
-        })
+            'job_id': job.id,
+            'status': job.status,
+            'total': job.total,
+            'progress_url': reverse('dashboard:api_job_status', args=[job.id]),
+        }, status=202)
     except Exception as e:
         return JsonResponse({
             'success': False,
             'error': str(e)
         }, status=500)
+
+
+async def api_job_status(request, job_id):
+    """
+    API endpoint untuk memantau progress job pengecekan status
+    
+    Hasil per CCTV dikembalikan untuk chunk yang sudah selesai, jadi
+    sebagian hasil sudah bisa dibaca selama job berjalan.
+    """
+    job = await aget_object_or_404(StatusCheckJob, id=job_id)
+    results = await sync_to_async(job.collected_results)()
+    
+    return JsonResponse({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'finished': job.is_finished,
+        'total': job.total,
+        'done': job.done,
+        'online': job.online,
+        'offline': job.done - job.online,
+        'results': results,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
+def prometheus_metrics(request):
+    """
+    Metrik Prometheus (format teks exposition) dari semua proses: latency
+    YouTube per endpoint, durasi siklus checker, hasil discovery, kuota,
+    CCTV online/offline per kecamatan, serta latency dan query SQL per view.
+    
+    Jika METRICS_TOKEN diisi, request harus membawa header
+    Authorization: Bearer <token>.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not constant_time_compare(credentials, token):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,356 @@
+"""
+HTTP client bersama untuk semua request ke YouTube (Data API v3 & oEmbed)
+
+- Satu requests.Session dengan connection pool (keep-alive) dipakai ulang
+  lintas pemanggilan dan thread, sehingga handshake TCP+TLS ke
+  googleapis.com tidak diulang di setiap request.
+- Retry dengan exponential backoff + jitter untuk error koneksi dan 5xx.
+- Timeout per endpoint menyesuaikan latency yang teramati.
+- Counter (handshake, request, retry, bytes) untuk monitoring, serta histogram
+  latency dan counter kegagalan per endpoint untuk /metrics (dashboard.metrics).
+- Varian async (youtube_get_async) untuk view async di deployment ASGI:
+  memakai httpx.AsyncClient jika terpasang, jika tidak (atau jika loop hanya
+  hidup selama satu request, seperti view async di WSGI) request sync
+  dijalankan di thread pool terbatas tanpa memblokir event loop.
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import metrics, quota
+
+try:
+    import httpx
+except ImportError:  # httpx opsional, lihat youtube_get_async
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Default konfigurasi (bisa di-override lewat settings)
+DEFAULT_POOL_SIZE = 16
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+
+# Maksimum request async ke YouTube yang berjalan bersamaan per proses
+DEFAULT_ASYNC_CONCURRENCY = 100
+
+# Batas timeout adaptif (detik)
+MIN_TIMEOUT = 2.0
+LATENCY_MULTIPLIER = 4.0
+EWMA_ALPHA = 0.2
+
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+_stats_lock = threading.Lock()
+_stats = {
+    'requests': 0,
+    'handshakes': 0,
+    'retries': 0,
+    'failures': 0,
+    'bytes': 0,
+    'not_modified': 0,
+    'parse_seconds': 0.0,
+}
+
+_latency_lock = threading.Lock()
+_latency_ewma = {}
+
+_session = None
+_session_lock = threading.Lock()
+
+# AsyncClient terikat ke event loop tempat ia dibuat, jadi disimpan per loop
+_async_clients = weakref.WeakKeyDictionary()
+_async_executor = None
+
+
+def _incr(key: str, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    """Connection pool yang menghitung koneksi (handshake) baru"""
+
+    def _new_conn(self):
+        _incr('handshakes')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """Connection pool HTTPS yang menghitung koneksi (handshake TLS) baru"""
+
+    def _new_conn(self):
+        _incr('handshakes')
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter dengan pool class yang menghitung handshake"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def get_session() -> requests.Session:
+    """Ambil Session bersama (dibuat sekali per proses, aman dipakai lintas thread)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'YOUTUBE_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)
+                session = requests.Session()
+                adapter = _PooledAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def endpoint_name(url: str) -> str:
+    """Nama endpoint dari URL, misal 'videos', 'search', 'oembed'"""
+    path = urlparse(url).path.rstrip('/')
+    return path.rsplit('/', 1)[-1] or 'root'
+
+
+def adaptive_timeout(endpoint: str, max_timeout: float) -> float:
+    """
+    Hitung timeout untuk endpoint berdasarkan latency rata-rata (EWMA).
+
+    Timeout = latency rata-rata x LATENCY_MULTIPLIER, dibatasi antara
+    MIN_TIMEOUT dan max_timeout (timeout yang diminta pemanggil).
+    Sebelum ada data latency, max_timeout dipakai apa adanya.
+    
+    Percobaan yang timeout ikut dicatat sebagai sampel latency (lihat
+    youtube_get), sehingga saat API melambat timeout ikut naik kembali.
+    """
+    with _latency_lock:
+        ewma = _latency_ewma.get(endpoint)
+    if ewma is None:
+        return max_timeout
+    return max(MIN_TIMEOUT, min(max_timeout, ewma * LATENCY_MULTIPLIER))
+
+
+def _record_latency(endpoint: str, seconds: float):
+    metrics.observe('cctv_youtube_request_duration_seconds', seconds, endpoint=endpoint)
+    with _latency_lock:
+        previous = _latency_ewma.get(endpoint)
+        if previous is None:
+            _latency_ewma[endpoint] = seconds
+        else:
+            _latency_ewma[endpoint] = previous + EWMA_ALPHA * (seconds - previous)
+
+
+def _record_failure(endpoint: str):
+    _incr('failures')
+    metrics.inc('cctv_youtube_request_failures_total', endpoint=endpoint)
+
+
+def _attempt_timeout(endpoint: str, max_timeout: float, attempt: int) -> float:
+    """Timeout adaptif, dilipatgandakan setiap retry hingga batas pemanggil"""
+    return min(max_timeout, adaptive_timeout(endpoint, max_timeout) * (2 ** attempt))
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff dengan full jitter"""
+    base = getattr(settings, 'YOUTUBE_HTTP_BACKOFF_BASE', DEFAULT_BACKOFF_BASE)
+    cap = min(DEFAULT_BACKOFF_MAX, base * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def youtube_get(url: str, params: dict = None, timeout: float = 10, headers: dict = None) -> requests.Response:
+    """
+    GET ke YouTube memakai Session bersama, dengan retry dan timeout adaptif.
+
+    Error koneksi/timeout dan respons 5xx diulang hingga YOUTUBE_HTTP_MAX_RETRIES
+    kali; timeout tiap retry dua kali lipat percobaan sebelumnya (maksimal
+    timeout). Jika semua percobaan 5xx, respons terakhir dikembalikan; jika
+    semua percobaan gagal koneksi, exception terakhir dilempar ulang.
+
+    Retry yang sampai ke API (ada respons atau read timeout) dicatat ke ledger
+    kuota; percobaan pertama sudah dicatat pemanggil lewat quota.try_consume.
+
+    Args:
+        url: URL endpoint
+        params: Query parameter
+        timeout: Batas atas timeout per percobaan dalam detik
+        headers: Header tambahan (misal If-None-Match untuk conditional request)
+
+    Returns:
+        requests.Response
+    """
+    session = get_session()
+    endpoint = endpoint_name(url)
+    max_retries = getattr(settings, 'YOUTUBE_HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+
+    attempt = 0
+    while True:
+        request_timeout = _attempt_timeout(endpoint, timeout, attempt)
+        started = time.monotonic()
+        _incr('requests')
+        try:
+            response = session.get(url, params=params, timeout=request_timeout, headers=headers)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if isinstance(e, requests.Timeout):
+                _record_latency(endpoint, time.monotonic() - started)
+            if attempt and isinstance(e, requests.ReadTimeout):
+                quota.charge_retry(endpoint)
+            if attempt >= max_retries:
+                _record_failure(endpoint)
+                raise
+            logger.warning(f"YouTube {endpoint} connection error (attempt {attempt + 1}): {str(e)}")
+        else:
+            _record_latency(endpoint, time.monotonic() - started)
+            _incr('bytes', len(response.content))
+            if attempt:
+                quota.charge_retry(endpoint)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if attempt >= max_retries:
+                _record_failure(endpoint)
+                return response
+            logger.warning(f"YouTube {endpoint} HTTP {response.status_code} (attempt {attempt + 1}), retrying")
+
+        _incr('retries')
+        time.sleep(_backoff_delay(attempt))
+        attempt += 1
+
+
+def _async_concurrency() -> int:
+    return getattr(settings, 'YOUTUBE_ASYNC_CONCURRENCY', DEFAULT_ASYNC_CONCURRENCY)
+
+
+def _long_lived_loop() -> bool:
+    """
+    True jika event loop yang berjalan milik server ASGI (main thread proses).
+
+    Di WSGI, async_to_sync menjalankan view async di loop baru pada thread
+    lain yang ditutup setelah request selesai; AsyncClient yang dibuat untuk
+    loop itu tidak pernah ditutup dan koneksinya bocor.
+    """
+    return threading.current_thread() is threading.main_thread()
+
+
+def _get_async_client():
+    """AsyncClient httpx untuk event loop yang sedang berjalan (dibuat sekali per loop)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool_size = getattr(settings, 'YOUTUBE_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)
+        client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=_async_concurrency(),
+            max_keepalive_connections=pool_size,
+        ))
+        _async_clients[loop] = client
+    return client
+
+
+def _get_async_executor() -> ThreadPoolExecutor:
+    """Thread pool untuk youtube_get_async tanpa AsyncClient httpx"""
+    global _async_executor
+    if _async_executor is None:
+        with _session_lock:
+            if _async_executor is None:
+                _async_executor = ThreadPoolExecutor(
+                    max_workers=_async_concurrency(), thread_name_prefix='youtube-async'
+                )
+    return _async_executor
+
+
+async def youtube_get_async(url: str, params: dict = None, timeout: float = 10, headers: dict = None):
+    """
+    Versi async youtube_get dengan retry, backoff dan timeout adaptif yang sama.
+
+    Dengan httpx, request berjalan di event loop (satu koneksi per request
+    aktif, dibatasi YOUTUBE_ASYNC_CONCURRENCY). Tanpa httpx, atau jika loop
+    bukan loop server ASGI yang berumur panjang, youtube_get dijalankan di
+    thread pool berukuran YOUTUBE_ASYNC_CONCURRENCY (session bersama).
+
+    Returns:
+        httpx.Response atau requests.Response (keduanya punya status_code,
+        headers, content dan json())
+    """
+    if httpx is None or not _long_lived_loop():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_async_executor(), functools.partial(youtube_get, url, params, timeout, headers)
+        )
+
+    client = _get_async_client()
+    endpoint = endpoint_name(url)
+    max_retries = getattr(settings, 'YOUTUBE_HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+
+    attempt = 0
+    while True:
+        request_timeout = _attempt_timeout(endpoint, timeout, attempt)
+        started = time.monotonic()
+        _incr('requests')
+        try:
+            response = await client.get(url, params=params, timeout=request_timeout, headers=headers)
+        except httpx.TransportError as e:
+            if isinstance(e, httpx.TimeoutException):
+                _record_latency(endpoint, time.monotonic() - started)
+            if attempt and isinstance(e, httpx.ReadTimeout):
+                await sync_to_async(quota.charge_retry)(endpoint)
+            if attempt >= max_retries:
+                _record_failure(endpoint)
+                raise
+            logger.warning(f"YouTube {endpoint} connection error (attempt {attempt + 1}): {str(e)}")
+        else:
+            _record_latency(endpoint, time.monotonic() - started)
+            _incr('bytes', len(response.content))
+            if attempt:
+                await sync_to_async(quota.charge_retry)(endpoint)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if attempt >= max_retries:
+                _record_failure(endpoint)
+                return response
+            logger.warning(f"YouTube {endpoint} HTTP {response.status_code} (attempt {attempt + 1}), retrying")
+
+        _incr('retries')
+        await asyncio.sleep(_backoff_delay(attempt))
+        attempt += 1
+
+
+def record_not_modified():
+    """Catat respons 304 (conditional request, hasil sebelumnya dipakai ulang)"""
+    _incr('not_modified')
+
+
+def record_parse_time(seconds: float):
+    """Catat waktu parse JSON respons"""
+    _incr('parse_seconds', seconds)
+
+
+def get_stats() -> dict:
+    """Salinan counter client beserta latency rata-rata per endpoint"""
+    with _stats_lock:
+        stats = dict(_stats)
+    with _latency_lock:
+        stats['latency_ewma'] = {k: round(v, 4) for k, v in _latency_ewma.items()}
+    return stats
+
+
+def reset_stats():
+    """Reset semua counter (latency EWMA tetap dipertahankan)"""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0